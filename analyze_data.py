@@ -200,6 +200,9 @@ def main():
     parser.add_argument('--data-dir', default='data', help='Datakatalog')
     parser.add_argument('--export', action='store_true', help='Exportera forskningsdataset')
     parser.add_argument('--visualize', action='store_true', help='Generera visualiseringar')
+    parser.add_argument('--export-results', choices=['csv', 'jsonl', 'parquet'],
+                        help='Strömma alla testresultat till en fil i valt format')
+    parser.add_argument('--sessions', nargs='+', help='Begränsa --export-results till dessa sessioner')
     parser.add_argument('--all', action='store_true', help='Kör all analys')
 
     args = parser.parse_args()
@@ -214,6 +217,12 @@ def main():
     if args.export:
         export_research_dataset(args.data_dir)
 
+    if args.export_results:
+        collector = ConsciousnessDataCollector(args.data_dir)
+        output_path = collector.export_results(args.sessions, args.export_results)
+        collector.close()
+        print(f"📦 Testresultat exporterade: {output_path}")
+
     if args.visualize:
         # Visualizations are generated in analyze_consciousness_data
         pass
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark of consciousness_tests.db queries on a synthetic database.
+Times the data collector's session, pattern and report queries with and
+without the secondary indexes created by the schema migrations.
+"""
+
+import sys
+sys.path.append('src')
+
+import argparse
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from data_collector import ConsciousnessDataCollector
+
+
+MODELS = ["glm-4.6:cloud", "minimax-m2:cloud", "llama2:7b", "paraphrase-multilingual:latest"]
+
+
+def build_synthetic_database(data_dir, rows=1_000_000, sessions=1000, seed=42):
+    """Create a database with the collector's schema and fill it with synthetic results."""
+    rng = random.Random(seed)
+    collector = ConsciousnessDataCollector(data_dir, {'write_mode': 'sync', 'result_format': 'json_files'})
+    collector.close()
+
+    conn = sqlite3.connect(os.path.join(data_dir, "consciousness_tests.db"))
+    conn.execute("PRAGMA synchronous=OFF")
+
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    session_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(sessions)]
+    conn.executemany('''
+        INSERT INTO test_sessions (session_id, timestamp, researcher, test_type, model_name, temperature)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [(session_id, (start + timedelta(hours=i)).isoformat(), "benchmark", "Synthetic",
+           rng.choice(MODELS), 0.8) for i, session_id in enumerate(session_ids)])
+
+    rows_per_session = rows // sessions
+    # A limited pool of hashes gives duplicate response groups like real runs
+    hash_pool = [f"{rng.getrandbits(128):032x}" for _ in range(max(1, rows // 5))]
+
+    def result_rows():
+        for s, session_id in enumerate(session_ids):
+            for n in range(rows_per_session):
+                phi = rng.random() * 0.6
+                yield (f"{s:06d}-{n:06d}", session_id, n + 1, f"Interactive Turn {n % 50 + 1}",
+                       "prompt", "response", phi, rng.random(), rng.random(), rng.random(),
+                       rng.random(), 100, rng.choice(hash_pool), False, False,
+                       rng.randint(0, 3), "[]", (start + timedelta(seconds=n)).isoformat())
+
+    conn.executemany('''
+        INSERT INTO test_results
+        (test_id, session_id, test_number, test_name, prompt_text, response_text,
+         phi_score, coherence_score, metacognitive_score, temporal_consistency,
+         processing_time, response_length, response_hash, safety_triggered,
+         loop_detected, global_ignition_count, consciousness_indicators, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', result_rows())
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+    return session_ids
+
+
+def drop_secondary_indexes(db_path):
+    """Remove the migration indexes but keep user_version, so the collector does not recreate them."""
+    conn = sqlite3.connect(db_path)
+    names = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")]
+    for name in names:
+        conn.execute(f"DROP INDEX {name}")
+    conn.execute("DELETE FROM sqlite_stat1 WHERE idx LIKE 'idx_%'")
+    conn.commit()
+    conn.close()
+
+
+def time_queries(data_dir, session_id, repeats=3):
+    """Time the collector's query methods; returns {name: best seconds}."""
+    collector = ConsciousnessDataCollector(data_dir, {'write_mode': 'sync', 'result_format': 'json_files'})
+    benchmarks = {
+        'complete_session': lambda: collector.complete_session(session_id),
+        'get_session_summary': lambda: collector.get_session_summary(session_id),
+        'export_session_csv': lambda: collector.export_session_csv(session_id),
+        'analyze_consciousness_patterns': collector.analyze_consciousness_patterns,
+        'generate_fnc_report': lambda: collector.generate_fnc_report(session_id)
+    }
+
+    timings = {}
+    for name, run in benchmarks.items():
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+
+    collector.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark av databasfrågor på syntetisk data')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Antal syntetiska testresultat')
+    parser.add_argument('--sessions', type=int, default=1000, help='Antal sessioner')
+    parser.add_argument('--repeats', type=int, default=3, help='Upprepningar per fråga (bästa tid)')
+    parser.add_argument('--keep', action='store_true', help='Behåll de genererade databaserna')
+
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    work_dir = tempfile.mkdtemp(prefix="db_benchmark_")
+    indexed_dir = os.path.join(work_dir, "indexed")
+    plain_dir = os.path.join(work_dir, "unindexed")
+
+    print(f"🏗️ Bygger syntetisk databas: {args.rows:,} resultat i {args.sessions} sessioner...")
+    start = time.perf_counter()
+    session_ids = build_synthetic_database(indexed_dir, args.rows, args.sessions)
+    print(f"   Klar på {time.perf_counter() - start:.1f}s")
+
+    shutil.copytree(indexed_dir, plain_dir)
+    drop_secondary_indexes(os.path.join(plain_dir, "consciousness_tests.db"))
+
+    session_id = session_ids[len(session_ids) // 2]
+    plain = time_queries(plain_dir, session_id, args.repeats)
+    indexed = time_queries(indexed_dir, session_id, args.repeats)
+
+    print(f"\n{'Fråga':<32}{'Utan index':>14}{'Med index':>14}{'Speedup':>10}")
+    for name in plain:
+        speedup = plain[name] / indexed[name] if indexed[name] > 0 else float('inf')
+        print(f"{name:<32}{plain[name] * 1000:>12.1f}ms{indexed[name] * 1000:>12.1f}ms{speedup:>9.1f}x")
+
+    if args.keep:
+        print(f"\n📁 Databaser sparade i {work_dir}")
+    else:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"❌ Fel i benchmark: {e}")
+        sys.exit(1)
@@ -12,37 +12,84 @@ import glob
 import os
 from datetime import datetime
 import seaborn as sns
+import sys
+sys.path.append('src')
+
+from columnar_store import read_results
 
 # Set style for scientific plots
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
 
+# Only these columns are read from the Parquet dataset
+ANALYSIS_COLUMNS = [
+    'session_id', 'test_number', 'model_name', 'timestamp', 'phi_score', 'coherence_score',
+    'metacognitive_score', 'temporal_consistency', 'processing_time',
+    'safety_triggered', 'loop_detected'
+]
+
 def load_all_session_data():
-    """Load all session CSV files from data/analysis/"""
+    """
+    Load all session data, preferring the Parquet dataset in data/columnar/.
+    Sessions that only exist as data/analysis/session_*.csv (exported before the
+    dataset was created) are merged in, so upgrading does not drop older sessions.
+    """
+    try:
+        df = read_results('data/columnar', columns=ANALYSIS_COLUMNS)
+    except ImportError:
+        return load_session_csv_files()
+
+    if df.empty:
+        return load_session_csv_files()
+
+    print(f"🔬 Total records (Parquet): {len(df)}")
+    parquet_sessions = set(df['session_id'].dropna())
+    csv_df = load_session_csv_files(exclude_sessions=parquet_sessions, quiet=True)
+    if csv_df is None:
+        return df
+
+    # Same column set and timestamp type as the Parquet rows
+    csv_df = csv_df.reindex(columns=ANALYSIS_COLUMNS)
+    csv_df['timestamp'] = pd.to_datetime(csv_df['timestamp'], utc=True, format='ISO8601', errors='coerce')
+    print(f"📁 Added {len(csv_df)} records from {csv_df['session_id'].nunique()} sessions "
+          f"only present as CSV")
+    combined_df = pd.concat([df, csv_df], ignore_index=True)
+    print(f"🔬 Total records: {len(combined_df)}")
+    return combined_df
+
+def load_session_csv_files(exclude_sessions=None, quiet=False):
+    """Load all session CSV files from data/analysis/, skipping rows of sessions in exclude_sessions"""
     session_files = glob.glob('data/analysis/session_*.csv')
 
     if not session_files:
-        print("❌ No session data files found!")
+        if not quiet:
+            print("❌ No session data files found!")
         return None
 
-    print(f"📁 Found {len(session_files)} session files")
+    if not quiet:
+        print(f"📁 Found {len(session_files)} session files")
 
     all_data = []
     for file in session_files:
         try:
             df = pd.read_csv(file)
+            if exclude_sessions and 'session_id' in df.columns:
+                df = df[~df['session_id'].isin(exclude_sessions)]
             if not df.empty:
                 all_data.append(df)
-                print(f"✅ Loaded {len(df)} records from {os.path.basename(file)}")
+                if not quiet:
+                    print(f"✅ Loaded {len(df)} records from {os.path.basename(file)}")
         except Exception as e:
             print(f"⚠️ Error loading {file}: {e}")
 
     if not all_data:
-        print("❌ No valid data found in session files!")
+        if not quiet:
+            print("❌ No valid data found in session files!")
         return None
 
     combined_df = pd.concat(all_data, ignore_index=True)
-    print(f"🔬 Total records: {len(combined_df)}")
+    if not quiet:
+        print(f"🔬 Total records: {len(combined_df)}")
     return combined_df
 
 def analyze_consciousness_metrics(df):
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Data maintenance for the experiment data directory.
+Applies the retention policy, archives removed sessions, runs incremental
+VACUUM and reports the space that was reclaimed.
+"""
+
+import sys
+sys.path.append('src')
+
+import argparse
+import yaml
+
+from data_collector import ConsciousnessDataCollector
+from data_maintenance import DataMaintenance
+
+
+def format_bytes(size):
+    """Byte count in MB."""
+    return f"{size / (1024 * 1024):.2f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rensa, arkivera och komprimera experimentdata')
+    parser.add_argument('--config', default='config.yaml', help='Konfigurationsfil')
+    parser.add_argument('--data-dir', help='Datakatalog (standard: paths.data_dir i konfigurationen)')
+    parser.add_argument('--max-age-days', type=float, help='Ta bort sessioner äldre än så här många dagar')
+    parser.add_argument('--max-sessions', type=int, help='Behåll bara de senaste N sessionerna')
+    parser.add_argument('--max-data-mb', type=float, help='Storleksbudget för datakatalogen (MB)')
+    parser.add_argument('--keep-reports', type=int, help='Antal FNC-rapporter att behålla')
+    parser.add_argument('--vacuum-pages', type=int, help='Max antal sidor per inkrementell VACUUM (0 = alla)')
+    parser.add_argument('--no-archive', action='store_true', help='Radera sessioner utan att arkivera dem')
+    parser.add_argument('--dry-run', action='store_true', help='Visa vad som skulle tas bort utan att radera')
+
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    collection_config = config.get('data_collection', {})
+    retention = dict(collection_config.get('retention', {}))
+    overrides = {
+        'max_age_days': args.max_age_days,
+        'max_sessions': args.max_sessions,
+        'max_data_mb': args.max_data_mb,
+        'keep_reports': args.keep_reports,
+        'vacuum_pages': args.vacuum_pages
+    }
+    retention.update({key: value for key, value in overrides.items() if value is not None})
+    if args.no_archive:
+        retention['archive'] = False
+
+    data_dir = args.data_dir or config.get('paths', {}).get('data_dir', 'data')
+    collector = ConsciousnessDataCollector(data_dir, collection_config)
+    try:
+        report = DataMaintenance(collector, retention).run(dry_run=args.dry_run)
+    finally:
+        collector.close()
+
+    print("🧹 DATAUNDERHÅLL" + (" (torrkörning)" if report['dry_run'] else ""))
+    print("=" * 40)
+    print(f"Sessioner valda för borttagning: {len(report['sessions_selected'])}")
+    if not report['dry_run']:
+        print(f"Arkiverade sessioner: {report['sessions_archived']}")
+        print(f"Raderade testresultat: {report['results_deleted']}")
+        print(f"Raderade filer: {report['files_deleted']}")
+    print(f"Storlek före: {format_bytes(report['bytes_before'])}")
+    print(f"Storlek efter: {format_bytes(report['bytes_after'])}")
+    print(f"💾 Återvunnet utrymme: {format_bytes(report['bytes_reclaimed'])}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"❌ Fel vid dataunderhåll: {e}")
+        sys.exit(1)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Migrate per-result JSON files in data/test_results/ into the segmented result log.
+Records are appended in timestamp order; already migrated test_ids are skipped.
+"""
+
+import sys
+sys.path.append('src')
+
+import argparse
+import glob
+import json
+import os
+
+from result_log import SegmentedResultLog
+
+
+def migrate_test_results(data_dir="data", compression="none", segment_max_mb=64, delete=False):
+    """Append every legacy JSON result to the result log and optionally delete the originals."""
+    results_dir = os.path.join(data_dir, "test_results")
+    log = SegmentedResultLog(
+        os.path.join(data_dir, "result_log"),
+        max_segment_bytes=int(segment_max_mb * 1024 * 1024),
+        compression=compression
+    )
+
+    records = []
+    for path in glob.glob(os.path.join(results_dir, "*.json")):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Hoppar över {path}: {e}")
+            continue
+
+        test_id = record.get('test_id') or os.path.splitext(os.path.basename(path))[0]
+        records.append((record.get('timestamp', ''), test_id, path, record))
+
+    records.sort(key=lambda item: (item[0], item[1]))
+
+    migrated = skipped = deleted = 0
+    for _, test_id, path, record in records:
+        if test_id in log:
+            skipped += 1
+        else:
+            log.append(test_id, record)
+            migrated += 1
+
+        # Only delete originals whose record reads back identically
+        if delete and log.get(test_id) == record:
+            os.remove(path)
+            deleted += 1
+
+    log.close()
+
+    print(f"📦 Migrerade {migrated} resultat till {log.directory} ({len(log.segment_names())} segment)")
+    if skipped:
+        print(f"   Redan migrerade: {skipped}")
+    if delete:
+        print(f"   Raderade JSON-filer: {deleted}")
+
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrera JSON-testresultat till segmenterad resultatlogg')
+    parser.add_argument('--data-dir', default='data', help='Datakatalog')
+    parser.add_argument('--compression', default='none', choices=['none', 'gzip', 'zstd'],
+                        help='Komprimering av nya segment')
+    parser.add_argument('--segment-max-mb', type=float, default=64, help='Maximal segmentstorlek (MB)')
+    parser.add_argument('--delete', action='store_true',
+                        help='Radera JSON-filer som verifierats i loggen')
+
+    args = parser.parse_args()
+    migrate_test_results(args.data_dir, args.compression, args.segment_max_mb, args.delete)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"❌ Fel vid migrering: {e}")
+        sys.exit(1)
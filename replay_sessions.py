@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Offline replay of recorded sessions through the coherence reservoir.
+Re-runs coherence parameter sweeps over stored responses and embeddings
+without new model calls and writes the Φ and coherence trajectories.
+"""
+
+import sys
+sys.path.append('src')
+
+import argparse
+import logging
+import time
+
+import yaml
+
+from data_collector import ConsciousnessDataCollector
+from embeddings import create_embedding_backend
+from replay import CoherenceReplay, load_db_session, load_turns_jsonl, sweep_variants
+
+
+def parse_sweep(values):
+    """Parse repeated key=v1,v2,... arguments into {key: [values]} with YAML-typed values."""
+    parameters = {}
+    for item in values or []:
+        key, _, raw = item.partition('=')
+        if not key or not raw:
+            raise ValueError(f"Ogiltigt svep '{item}', förväntade nyckel=v1,v2")
+        parameters[key] = [yaml.safe_load(value) for value in raw.split(',')]
+    return parameters
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Spela upp sparade sessioner genom koherensreservoaren')
+    parser.add_argument('--config', default='config.yaml', help='Konfigurationsfil')
+    parser.add_argument('--data-dir', help='Datakatalog (standard: paths.data_dir i konfigurationen)')
+    parser.add_argument('--sessions', nargs='+', help='Sessions-ID:n i databasen (standard: alla)')
+    parser.add_argument('--turns-log', nargs='+', help='Spela upp turns_*.jsonl-loggar i stället för databasen')
+    parser.add_argument('--sweep', action='append', metavar='NYCKEL=V1,V2',
+                        help='Koherensparameter att svepa, t.ex. leak_rate=0.1,0.3 eller phi_engine.seed=1,2 (kan upprepas)')
+    parser.add_argument('--seeds', help='Kommaseparerade reservoarfrön, t.ex. 1,2,3')
+    parser.add_argument('--embed-missing', action='store_true',
+                        help='Beräkna embeddings för turer som saknar sparad embedding')
+    parser.add_argument('--output', default='replay_trajectories.csv', help='Utfil för trajektorier (.csv eller .parquet)')
+    parser.add_argument('--summary', help='Utfil för sammanfattning per variant (.csv)')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    seeds = [int(seed) for seed in args.seeds.split(',')] if args.seeds else None
+    variants = sweep_variants(parse_sweep(args.sweep), seeds)
+    replay = CoherenceReplay(config['coherence'], variants, config['paths'].get('reservoir_cache_dir'))
+
+    data_dir = args.data_dir or config['paths'].get('data_dir', 'data')
+    collector = ConsciousnessDataCollector(data_dir, config.get('data_collection', {}))
+    try:
+        if args.turns_log:
+            sessions = [turns for path in args.turns_log for turns in load_turns_jsonl(path, collector)]
+        else:
+            session_ids = args.sessions or [session_id for session_id, _, _ in collector.session_inventory()]
+            sessions = [load_db_session(collector, session_id) for session_id in session_ids]
+    finally:
+        collector.close()
+
+    if args.embed_missing and any(turns.missing_embeddings() for turns in sessions):
+        embedding_model = create_embedding_backend(config.get('embeddings', {}),
+                                                   config['evaluation'].get('embedding_dimension', 384),
+                                                   config['paths'].get('embeddings_dir'))
+        for turns in sessions:
+            turns.fill_embeddings(embedding_model)
+
+    total_turns = sum(len(turns) for turns in sessions)
+    print(f"🔁 Spelar upp {len(sessions)} sessioner ({total_turns} turer) med {len(variants)} varianter...")
+    start = time.perf_counter()
+    trajectories = replay.replay_sessions(sessions)
+    elapsed = time.perf_counter() - start
+
+    if trajectories.empty:
+        print("⚠️  Inga turer att spela upp")
+        return
+
+    if args.output.endswith('.parquet'):
+        trajectories.to_parquet(args.output, index=False)
+    else:
+        trajectories.to_csv(args.output, index=False)
+    print(f"   Klar på {elapsed:.2f}s ({total_turns * len(variants) / max(elapsed, 1e-9):,.0f} reservoarsteg/s)")
+    print(f"📄 Trajektorier sparade: {args.output}")
+
+    summary = replay.summarize(trajectories)
+    if args.summary:
+        summary.to_csv(args.summary, index=False)
+        print(f"📄 Sammanfattning sparad: {args.summary}")
+
+    print("\n📊 SAMMANFATTNING PER VARIANT:")
+    print(summary.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"❌ Fel vid uppspelning: {e}")
+        sys.exit(1)
@@ -5,8 +5,121 @@ Based on empirical data from microtubule quantum coherence research and FNC mode
 
 import numpy as np
 import logging
+import os
 from typing import Dict, List, Any, Optional
 
+from phi_engine import PhiEngine
+
+try:
+    from scipy import sparse
+    from scipy.sparse import linalg as sparse_linalg
+except ImportError:  # Only needed for the sparse reservoir backend
+    sparse = None
+
+
+# Offsets of the 6 neighbours each "tubulin" connects to (hexagonal lattice approximation)
+HEXAGONAL_OFFSETS = np.array([-3, -1, 1, 3, -6, 6])
+
+SPECTRAL_RADIUS_METHODS = ('auto', 'exact', 'arnoldi', 'power')
+
+# Largest dense reservoir whose spectral radius `auto` computes exactly
+EXACT_SPECTRAL_RADIUS_MAX_SIZE = 1000
+
+
+def estimate_spectral_radius(W, method: str = 'auto', tol: float = 1e-6, max_iter: int = 10000,
+                             rng=np.random) -> float:
+    """
+    Largest absolute eigenvalue of a dense or scipy sparse matrix.
+
+    exact: full eigendecomposition, O(n³)
+    arnoldi: ARPACK (scipy); falls back to power iteration if it does not converge
+    power: normalized power iteration; the estimate is the geometric mean growth per
+           step, which also converges when the dominant eigenvalues are a complex pair
+    auto: exact for small dense matrices, otherwise power iteration (random reservoirs
+          have many eigenvalues near the spectral radius, where ARPACK converges slowly)
+    """
+    if method not in SPECTRAL_RADIUS_METHODS:
+        raise ValueError(f"Unknown spectral radius method '{method}', expected one of {SPECTRAL_RADIUS_METHODS}")
+
+    is_sparse = sparse is not None and sparse.issparse(W)
+    n = W.shape[0]
+    if method == 'auto':
+        method = 'exact' if not is_sparse and n <= EXACT_SPECTRAL_RADIUS_MAX_SIZE else 'power'
+
+    if method == 'arnoldi' and (sparse is None or n <= 2):
+        method = 'exact' if n <= 2 else 'power'
+
+    if method == 'exact':
+        return float(np.max(np.abs(np.linalg.eigvals(W.toarray() if is_sparse else W))))
+
+    v0 = rng.randn(n)
+    if method == 'arnoldi':
+        try:
+            eigenvalues = sparse_linalg.eigs(W, k=1, which='LM', tol=tol, v0=v0, maxiter=max_iter // 10,
+                                             return_eigenvectors=False)
+            return float(np.max(np.abs(eigenvalues)))
+        except sparse_linalg.ArpackNoConvergence:
+            logging.warning("ARPACK did not converge, estimating spectral radius by power iteration")
+
+    # Growth in the first steps reflects the start vector, so the mean runs over the later half
+    v = v0 / np.linalg.norm(v0)
+    log_growth = [0.0]  # Prefix sums of the log growth per step
+    estimate = 0.0
+    for step in range(1, max_iter + 1):
+        v = W @ v
+        norm = np.linalg.norm(v)
+        if norm == 0.0:
+            return 0.0
+        v /= norm
+        log_growth.append(log_growth[-1] + np.log(norm))
+        start = step // 2
+        previous, estimate = estimate, np.exp((log_growth[step] - log_growth[start]) / (step - start))
+        if step > 10 and abs(estimate - previous) <= tol * estimate:
+            break
+    return float(estimate)
+
+
+def quantum_coherence(states: np.ndarray) -> np.ndarray:
+    """Combined phase and amplitude coherence of complex reservoir states (nodes on the last axis)."""
+    # Measure phase coherence across reservoir
+    phase_coherence = np.abs(np.mean(np.exp(1j * np.angle(states)), axis=-1))
+
+    # Account for amplitude coherence
+    amplitudes = np.abs(states)
+    amplitude_coherence = 1.0 - (np.std(amplitudes, axis=-1) / (np.mean(amplitudes, axis=-1) + 1e-6))
+
+    return (phase_coherence + amplitude_coherence) / 2.0
+
+
+def apply_overrides(config: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of config with overrides applied; dotted keys such as phi_engine.seed set nested values."""
+    result = dict(config)
+    for key, value in overrides.items():
+        section, dot, name = key.partition('.')
+        if dot:
+            result[section] = apply_overrides(result.get(section) or {}, {name: value})
+        else:
+            result[key] = value
+    return result
+
+
+def midpoint_phi(states: np.ndarray) -> np.ndarray:
+    """Φ approximation from the midpoint bipartition of reservoir states (nodes on the last axis)."""
+    # Simplified Φ calculation based on reservoir connectivity and state
+    state_vectors = np.abs(states)
+
+    # Measure integration (how much the whole is more than sum of parts)
+    total_variance = np.var(state_vectors, axis=-1)
+
+    # Simple bipartition approach
+    mid = state_vectors.shape[-1] // 2
+    mean_partition_variance = (np.var(state_vectors[..., :mid], axis=-1) +
+                               np.var(state_vectors[..., mid:], axis=-1)) / 2.0
+
+    # Φ as reduction in variance due to integration, normalized to 0-1 range
+    phi_approx = total_variance - mean_partition_variance
+    return np.clip(phi_approx / (total_variance + 1e-6), 0.0, 1.0)
+
 
 class CoherenceModule:
     """
@@ -16,9 +129,23 @@ class CoherenceModule:
     - Empirical consciousness research parameters
     """
 
-    def __init__(self, config: Dict[str, Any]):
-        """Initialize coherence module with research-based configuration."""
+    def __init__(self, config: Dict[str, Any], cache_dir: Optional[str] = None):
+        """
+        Initialize coherence module with research-based configuration.
+        With a `reservoir_seed`, the scaled reservoir matrix is cached in cache_dir.
+        """
         self.config = config
+        self.cache_dir = cache_dir
+
+        # A seed makes the reservoir and its noise reproducible; the matrix gets its own stream
+        # so a cached matrix leaves the rest of the random sequence unchanged
+        self.seed = config.get('reservoir_seed')
+        if self.seed is None:
+            self._rng = np.random
+            self._matrix_rng = np.random
+        else:
+            self._rng = np.random.RandomState([self.seed, 1])
+            self._matrix_rng = np.random.RandomState([self.seed, 0])
         self.type = config.get('type', 'reservoir')
         self.enabled = config.get('enabled', True)
 
@@ -49,16 +176,45 @@ class CoherenceModule:
         self.spectral_radius = self.config.get('spectral_radius', 0.9)
         self.leak_rate = self.config.get('leak_rate', 0.1)
 
+        # dense: full matrix; sparse: CSR matrix with `reservoir_density` random connections
+        self.reservoir_backend = self.config.get('reservoir_backend', 'dense')
+        self.reservoir_density = self.config.get('reservoir_density', 0.01)
+        self.spectral_radius_method = self.config.get('spectral_radius_method', 'auto')
+        self.spectral_radius_tol = self.config.get('spectral_radius_tol', 1e-6)
+        if self.reservoir_backend == 'sparse' and sparse is None:
+            logging.warning("scipy is not installed, using a dense reservoir")
+            self.reservoir_backend = 'dense'
+        elif self.reservoir_backend not in ('dense', 'sparse'):
+            raise ValueError(f"Unknown reservoir backend '{self.reservoir_backend}', expected 'dense' or 'sparse'")
+
         # Create quantum-inspired reservoir matrix (simulating microtubule structure)
-        self.W = self._create_microtubule_inspired_matrix()
+        self.W = self._load_cached_matrix()
+        if self.W is None:
+            self.W = self._create_microtubule_inspired_matrix()
+            self._save_cached_matrix(self.W)
 
         # Initialize quantum-analog state (complex-valued for phase coherence)
         self.reservoir_state = np.zeros(self.reservoir_size, dtype=complex)
         self.quantum_phase = np.zeros(self.reservoir_size)
 
-        # Input/output weights adapted for consciousness research
-        self.W_in = np.random.randn(self.reservoir_size, 384) * 0.1
-        self.W_out = np.random.randn(384, self.reservoir_size) * 0.1
+        # Input weights adapted for consciousness research (float32 halves memory for large sparse reservoirs)
+        input_dtype = np.float32 if self.reservoir_backend == 'sparse' else np.float64
+        self.W_in = (self._rng.randn(self.reservoir_size, 384) * 0.1).astype(input_dtype, copy=False)
+
+        # Output weights are read by no update path. The dense backend draws them here, in the original
+        # order, so the random stream (the global one when unseeded) is unchanged; the sparse backend
+        # creates them on first use from a generator of their own, so a late draw never shifts the noise.
+        if self.reservoir_backend == 'dense':
+            self._W_out = self._rng.randn(384, self.reservoir_size) * 0.1
+        else:
+            self._W_out = None
+            self._W_out_rng = np.random.RandomState([self.seed, 2] if self.seed is not None else None)
+
+        # Φ from the midpoint bipartition, or the minimum over many bipartitions (phi_engine section)
+        self.phi_method = self.config.get('phi_method', 'midpoint')
+        self.phi_engine = self._create_phi_engine(self.config, self.reservoir_size, self.seed)
+        self.phi_partition = None  # Minimum partition of the state in _phi_state
+        self._phi_state = None
 
         # Microtubule-specific parameters
         self.tubulin_coherence = 1.0  # Initial coherence level
@@ -67,33 +223,133 @@ class CoherenceModule:
         logging.info(f"Microtubule-inspired reservoir: size={self.reservoir_size}, "
                     f"spectral_radius={self.spectral_radius}, decoherence_rate={self.quantum_decoherence_rate:.3f}/ms")
 
+    @staticmethod
+    def phi_config_key(config: Dict[str, Any]) -> tuple:
+        """
+        Hashable summary of everything that determines how a config computes Φ:
+        the method and, for multi_partition, the engine settings with the
+        effective seed. Configs with equal keys can share one Φ engine.
+        """
+        method = config.get('phi_method', 'midpoint')
+        if method != 'multi_partition':
+            return (method,)
+        engine_config = dict(config.get('phi_engine') or {})
+        if engine_config.get('seed') is None:
+            engine_config['seed'] = config.get('reservoir_seed')
+        return (method, tuple(sorted(engine_config.items())))
+
+    @staticmethod
+    def _create_phi_engine(config: Dict[str, Any], reservoir_size: int,
+                           seed: Optional[int] = None) -> Optional[PhiEngine]:
+        """Φ engine for the multi_partition method; its random partitions follow the reservoir seed."""
+        method = config.get('phi_method', 'midpoint')
+        if method == 'midpoint':
+            return None
+        if method != 'multi_partition':
+            raise ValueError(f"Unknown phi_method '{method}', expected 'midpoint' or 'multi_partition'")
+
+        engine_config = dict(config.get('phi_engine') or {})
+        if engine_config.get('seed') is None:
+            engine_config['seed'] = seed
+        return PhiEngine(engine_config, reservoir_size, HEXAGONAL_OFFSETS)
+
+    @property
+    def W_out(self) -> np.ndarray:
+        """Output weights (384 x reservoir_size); created on first use with the sparse backend."""
+        if self._W_out is None:
+            self._W_out = self._W_out_rng.randn(384, self.reservoir_size) * 0.1
+        return self._W_out
+
+    def _hexagonal_connections(self):
+        """Row and column indices of the microtubule-like connections (6 per node, wrapping)."""
+        rows = np.repeat(np.arange(self.reservoir_size), len(HEXAGONAL_OFFSETS))
+        cols = (rows + np.tile(HEXAGONAL_OFFSETS, self.reservoir_size)) % self.reservoir_size
+        return rows, cols
+
     def _create_microtubule_inspired_matrix(self):
         """Create reservoir matrix inspired by microtubule quantum structure."""
-        # Base random matrix
-        W = np.random.randn(self.reservoir_size, self.reservoir_size)
-
-        # Add microtubule-like structure (hexagonal lattice approximation)
-        # Create connections that mimic tubulin dimer arrangements
-        for i in range(self.reservoir_size):
-            # Each "tubulin" connects to 6 neighbors (hexagonal)
-            neighbors = [(i + offset) % self.reservoir_size for offset in [-3, -1, 1, 3, -6, 6]]
-            for j in neighbors:
-                if j < self.reservoir_size:
-                    W[i, j] += 0.5  # Strengthen microtubule-like connections
+        n = self.reservoir_size
+        hex_rows, hex_cols = self._hexagonal_connections()
+
+        if self.reservoir_backend == 'sparse':
+            # Random connections at the configured density, O(nnz) memory
+            nnz = int(round(self.reservoir_density * n * n))
+            rng = self._matrix_rng
+            rows = np.concatenate([rng.randint(0, n, nnz), hex_rows])
+            cols = np.concatenate([rng.randint(0, n, nnz), hex_cols])
+            values = np.concatenate([rng.randn(nnz), np.full(len(hex_rows), 0.5)])
+            # Duplicate coordinates are summed, like repeated += on the dense matrix
+            W = sparse.csr_matrix((values, (rows, cols)), shape=(n, n))
+        else:
+            # Base random matrix
+            W = self._matrix_rng.randn(n, n)
+            # Add microtubule-like structure: strengthen connections that mimic tubulin dimer arrangements
+            np.add.at(W, (hex_rows, hex_cols), 0.5)
 
         # Scale to desired spectral radius (critical for coherence maintenance)
-        eigenvalues = np.linalg.eigvals(W)
-        max_eigenvalue = np.max(np.abs(eigenvalues))
+        max_eigenvalue = self._spectral_radius(W)
         W = W * (self.spectral_radius / max_eigenvalue)
 
         return W
 
+    def _spectral_radius(self, W) -> float:
+        """Largest absolute eigenvalue of the reservoir matrix."""
+        return estimate_spectral_radius(W, self.spectral_radius_method, self.spectral_radius_tol,
+                                        rng=self._matrix_rng)
+
+    def _matrix_cache_path(self) -> Optional[str]:
+        """Cache file of the scaled matrix; only seeded reservoirs are cached."""
+        if self.cache_dir is None or self.seed is None:
+            return None
+
+        key = f"{self.reservoir_backend}-n{self.reservoir_size}-r{self.spectral_radius}-s{self.seed}"
+        if self.reservoir_backend == 'sparse':
+            key += f"-d{self.reservoir_density}"
+        return os.path.join(self.cache_dir, f"reservoir-{key}.npz")
+
+    def _load_cached_matrix(self):
+        """Load the scaled reservoir matrix from the disk cache, if present."""
+        path = self._matrix_cache_path()
+        if path is None or not os.path.exists(path):
+            return None
+
+        try:
+            if self.reservoir_backend == 'sparse':
+                W = sparse.load_npz(path).tocsr()
+            else:
+                with np.load(path) as data:
+                    W = data['W']
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable reservoir cache {path}: {e}")
+            return None
+
+        logging.info(f"Loaded reservoir matrix from cache: {path}")
+        return W
+
+    def _save_cached_matrix(self, W):
+        """Store the scaled reservoir matrix in the disk cache (atomically)."""
+        path = self._matrix_cache_path()
+        if path is None:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path[:-len('.npz')]}.{os.getpid()}.tmp.npz"
+        if self.reservoir_backend == 'sparse':
+            sparse.save_npz(tmp_path, W)
+        else:
+            np.savez(tmp_path, W=W)
+        os.replace(tmp_path, path)
+
+    def _reservoir_matvec(self, state: np.ndarray) -> np.ndarray:
+        """W @ state for the complex state, as two real products so W is never cast to complex."""
+        return self.W @ state.real + 1j * (self.W @ state.imag)
+
     def _init_oscillatory_gamma(self):
         """Initialize oscillatory coherence mechanism based on 40Hz gamma band."""
         # Gamma band parameters from consciousness research
         self.gamma_frequency = 40.0  # 40 Hz gamma band
         self.oscillator_count = 10
-        self.oscillator_phases = np.random.uniform(0, 2*np.pi, self.oscillator_count)
+        self.oscillator_phases = self._rng.uniform(0, 2*np.pi, self.oscillator_count)
         self.oscillator_frequencies = np.full(self.oscillator_count, self.gamma_frequency)
         self.time_step = 0
         self.gamma_coherence_duration = 0.010  # 10ms target coherence
@@ -189,28 +445,28 @@ class CoherenceModule:
 
     def _update_microtubule_state(self, embedding: List[float], response: str):
         """Update quantum reservoir state with decoherence simulation."""
-        embedding_array = np.array(embedding)
+        embedding_array = np.asarray(embedding, dtype=self.W_in.dtype)
 
         # Simulate quantum decoherence (temperature-dependent)
         decoherence_factor = np.exp(-self.quantum_decoherence_rate * self.temporal_resolution)
 
         # Apply thermal decoherence (more realistic at 37°C)
-        thermal_noise = np.random.normal(0, 0.01 * (self.temperature / 37.0), self.reservoir_size)
+        thermal_noise = self._rng.normal(0, 0.01 * (self.temperature / 37.0), self.reservoir_size)
 
         # Update quantum phases (simulating microtubule oscillations)
-        self.quantum_phase += np.random.uniform(-0.1, 0.1, self.reservoir_size)
+        self.quantum_phase += self._rng.uniform(-0.1, 0.1, self.reservoir_size)
 
         # Complex-valued state update (phase + amplitude)
         phase_component = np.exp(1j * self.quantum_phase)
 
         # Compute new reservoir state with quantum effects
-        input_activation = np.tanh(np.dot(self.W_in, embedding_array)) + thermal_noise
+        input_activation = np.tanh(self.W_in @ embedding_array) + thermal_noise
 
         # Complex state evolution (simulating quantum superposition)
         quantum_input = input_activation * phase_component * decoherence_factor
 
         new_state_complex = ((1 - self.leak_rate) * self.reservoir_state +
-                            self.leak_rate * np.tanh(np.dot(self.W, self.reservoir_state) + quantum_input))
+                            self.leak_rate * np.tanh(self._reservoir_matvec(self.reservoir_state) + quantum_input))
 
         self.reservoir_state = new_state_complex
 
@@ -235,7 +491,7 @@ class CoherenceModule:
         self.quantum_decoherence_rate = max(0.001, self.quantum_decoherence_rate)
 
         # Traditional threshold-based strengthening (keep existing behavior)
-        if np.random.random() < 0.05:  # Occasional quantum updates
+        if self._rng.random_sample() < 0.05:  # Occasional quantum updates
             if phi_current > self.phi_threshold:
                 # Strengthen quantum coherence when consciousness indicators are high
                 self.quantum_decoherence_rate *= 0.99  # Additional strengthening
@@ -261,44 +517,21 @@ class CoherenceModule:
         if not hasattr(self, 'reservoir_state'):
             return 0.0
 
-        # Measure phase coherence across reservoir
-        phases = np.angle(self.reservoir_state)
-        phase_coherence = np.abs(np.mean(np.exp(1j * phases)))
-
-        # Account for amplitude coherence
-        amplitudes = np.abs(self.reservoir_state)
-        amplitude_coherence = 1.0 - (np.std(amplitudes) / (np.mean(amplitudes) + 1e-6))
-
-        # Combined quantum coherence measure
-        quantum_coherence = (phase_coherence + amplitude_coherence) / 2.0
-
-        return float(quantum_coherence)
+        return float(quantum_coherence(self.reservoir_state))
 
     def _calculate_phi_approximation(self) -> float:
         """Calculate approximation of Integrated Information (Φ)."""
         if not hasattr(self, 'reservoir_state'):
             return 0.0
 
-        # Simplified Φ calculation based on reservoir connectivity and state
-        state_vector = np.abs(self.reservoir_state)
-
-        # Measure integration (how much the whole is more than sum of parts)
-        total_variance = np.var(state_vector)
-        partition_variances = []
-
-        # Simple bipartition approach
-        mid = len(state_vector) // 2
-        partition_variances.append(np.var(state_vector[:mid]))
-        partition_variances.append(np.var(state_vector[mid:]))
-
-        # Φ as reduction in variance due to integration
-        mean_partition_variance = np.mean(partition_variances)
-        phi_approx = total_variance - mean_partition_variance
+        if self.phi_engine is None:
+            return float(midpoint_phi(self.reservoir_state))
 
-        # Normalize to 0-1 range
-        phi_normalized = max(0.0, min(1.0, phi_approx / (total_variance + 1e-6)))
-
-        return phi_normalized
+        # A turn reads Φ several times; the partition search runs once per state
+        if self._phi_state is not self.reservoir_state:
+            self.phi_partition = self.phi_engine.evaluate(self.reservoir_state)
+            self._phi_state = self.reservoir_state
+        return self.phi_partition['phi']
 
     def _calculate_gamma_phase_coherence(self) -> float:
         """Calculate gamma-band phase coherence."""
@@ -351,6 +584,12 @@ class CoherenceModule:
                     sustained_count += 1
             metrics['sustained_coherence_periods'] = sustained_count
 
+        if self.type == 'reservoir' and self.phi_engine is not None:
+            self._calculate_phi_approximation()
+            metrics['phi_partition'] = self.phi_partition['partition']
+            metrics['phi_partition_size'] = self.phi_partition['part_size']
+            metrics['phi_midpoint'] = self.phi_partition['midpoint_phi']
+
         if self.type == 'oscillatory':
             metrics['gamma_frequency'] = np.mean(self.oscillator_frequencies)
             metrics['gamma_coherence'] = self._calculate_gamma_phase_coherence()
@@ -365,7 +604,7 @@ class CoherenceModule:
             self.tubulin_coherence = 1.0
         elif self.type == 'oscillatory':
             self.time_step = 0
-            self.oscillator_phases = np.random.uniform(0, 2*np.pi, self.oscillator_count)
+            self.oscillator_phases = self._rng.uniform(0, 2*np.pi, self.oscillator_count)
             self.oscillator_frequencies = np.full(self.oscillator_count, self.gamma_frequency)
 
         # Reset tracking variables
@@ -374,3 +613,188 @@ class CoherenceModule:
         self.global_ignition_events = []
 
         logging.info("Coherence module state reset for new experimental session")
+
+
+class CoherenceEnsemble:
+    """
+    K microtubule reservoirs (nodes, seeds or parameter variants) advanced together.
+
+    Member states are rows of one (K, reservoir_size) complex matrix. Each turn
+    the recurrent products run as one batched matmul (dense) or one block-diagonal
+    matvec (sparse), and coherence and Φ are computed for all members at once.
+    Member k follows the same update rule, and with the same seed the same
+    trajectory, as a CoherenceModule built from its config.
+    """
+
+    def __init__(self, base_config: Dict[str, Any], variants: List[Dict[str, Any]],
+                 cache_dir: Optional[str] = None):
+        """Build one reservoir per variant; each variant overrides (dotted) keys of base_config."""
+        self.configs = [{**apply_overrides(base_config, variant), 'type': 'reservoir'} for variant in variants]
+        # Members only supply matrices and parameters; the ensemble has one Φ engine for all of them
+        members = [CoherenceModule({**config, 'phi_method': 'midpoint'}, cache_dir) for config in self.configs]
+
+        if not members:
+            raise ValueError("A coherence ensemble needs at least one variant")
+        if len({(m.reservoir_size, m.reservoir_backend) for m in members}) > 1:
+            raise ValueError("Ensemble members must share reservoir_size and reservoir_backend")
+        if len({CoherenceModule.phi_config_key(config) for config in self.configs}) > 1:
+            raise ValueError("Ensemble members must share phi_method and phi_engine settings "
+                             "(including the effective Φ engine seed)")
+
+        self.size = len(members)
+        self.reservoir_size = members[0].reservoir_size
+        self.reservoir_backend = members[0].reservoir_backend
+
+        # Stacked weights: (K, n, n) dense or block-diagonal (K·n, K·n) CSR, and (K, n, 384) inputs
+        if self.reservoir_backend == 'sparse':
+            self.W = sparse.block_diag([m.W for m in members], format='csr')
+        else:
+            self.W = np.stack([m.W for m in members])
+        self.W_in = np.stack([m.W_in for m in members])
+
+        # Per-member parameters as column vectors so they broadcast over nodes
+        self.leak_rate = np.array([m.leak_rate for m in members])[:, None]
+        self.noise_scale = np.array([0.01 * (m.temperature / 37.0) for m in members])
+        self.temporal_resolution = np.array([m.temporal_resolution for m in members])
+        self.phi_threshold = np.array([m.phi_threshold for m in members])
+        self.quantum_decoherence_rate = np.array([m.quantum_decoherence_rate for m in members])
+        self._rngs = [m._rng for m in members]
+
+        self.phi_engine = CoherenceModule._create_phi_engine(self.configs[0], self.reservoir_size,
+                                                             members[0].seed)
+        self.phi_partitions = None
+        self._phi_states = None
+
+        self.reset()
+
+        logging.info(f"Coherence ensemble initialized: {self.size} reservoirs of size {self.reservoir_size} "
+                     f"({self.reservoir_backend})")
+
+    @classmethod
+    def from_seeds(cls, base_config: Dict[str, Any], seeds: List[int],
+                   cache_dir: Optional[str] = None) -> 'CoherenceEnsemble':
+        """Ensemble of the same reservoir configuration under different seeds."""
+        return cls(base_config, [{'reservoir_seed': seed} for seed in seeds], cache_dir)
+
+    def reset(self):
+        """Reset all member states for a new experimental session."""
+        self.reservoir_states = np.zeros((self.size, self.reservoir_size), dtype=complex)
+        self.quantum_phases = np.zeros((self.size, self.reservoir_size))
+        self.tubulin_coherence = np.ones(self.size)
+
+        self.phi_history: List[np.ndarray] = []
+        self.coherence_history: List[np.ndarray] = []
+        self.global_ignition_counts = np.zeros(self.size, dtype=int)
+
+    def _reservoir_matvec(self, states: np.ndarray) -> np.ndarray:
+        """
+        W_k @ state_k for every member. Real and imaginary parts go through as two
+        columns of one product, so each weight matrix is read once per turn.
+        """
+        parts = np.stack([states.real, states.imag], axis=-1)
+        if self.reservoir_backend == 'sparse':
+            product = (self.W @ parts.reshape(-1, 2)).reshape(parts.shape)
+        else:
+            product = np.matmul(self.W, parts)
+        return product[..., 0] + 1j * product[..., 1]
+
+    def _input_activation(self, embeddings: np.ndarray) -> np.ndarray:
+        """W_in_k @ embedding for one shared (384,) embedding or one (K, 384) embedding per member."""
+        embeddings = np.asarray(embeddings, dtype=self.W_in.dtype)
+        if embeddings.ndim == 1:
+            return (self.W_in.reshape(-1, self.W_in.shape[-1]) @ embeddings).reshape(self.size, -1)
+        return np.matmul(self.W_in, embeddings[..., None])[..., 0]
+
+    def update_state(self, responses, embeddings):
+        """
+        Advance every member by one turn.
+        responses is one string or K strings; embeddings is one (384,) vector or a (K, 384) matrix.
+        """
+        if isinstance(responses, str):
+            responses = [responses] * self.size
+        n = self.reservoir_size
+
+        # Simulate quantum decoherence (temperature-dependent)
+        decoherence_factor = np.exp(-self.quantum_decoherence_rate * self.temporal_resolution)[:, None]
+
+        # Thermal noise and phase drift, drawn from each member's own random stream
+        thermal_noise = np.empty((self.size, n))
+        for k, rng in enumerate(self._rngs):
+            thermal_noise[k] = rng.normal(0, self.noise_scale[k], n)
+            self.quantum_phases[k] += rng.uniform(-0.1, 0.1, n)
+
+        phase_component = np.exp(1j * self.quantum_phases)
+        input_activation = np.tanh(self._input_activation(embeddings)) + thermal_noise
+        quantum_input = input_activation * phase_component * decoherence_factor
+
+        self.reservoir_states = ((1 - self.leak_rate) * self.reservoir_states +
+                                 self.leak_rate * np.tanh(self._reservoir_matvec(self.reservoir_states) +
+                                                          quantum_input))
+
+        # Update tubulin coherence based on response complexity
+        response_complexity = np.array([len(response.split()) / 100.0 for response in responses])
+        self.tubulin_coherence = np.minimum(1.0, self.tubulin_coherence + response_complexity * 0.01)
+
+        # Adaptive Φ-feedback: more coherence = less decoherence
+        current_coherence = self.get_coherence_scores()
+        phi_current = self.get_phi()
+        stability_improvement = 0.01 * (np.minimum(current_coherence, 1.0) + np.minimum(phi_current, 1.0)) / 2.0
+        self.quantum_decoherence_rate = np.maximum(0.001, self.quantum_decoherence_rate *
+                                                   (1.0 - stability_improvement))
+
+        # Occasional threshold-based strengthening
+        strengthen = np.array([rng.random_sample() < 0.05 for rng in self._rngs]) & (phi_current > self.phi_threshold)
+        self.quantum_decoherence_rate[strengthen] *= 0.99
+
+    def get_phi(self) -> np.ndarray:
+        """Φ approximation of every member, shape (K,), with the members' shared Φ method."""
+        if self.phi_engine is None:
+            return midpoint_phi(self.reservoir_states)
+
+        if self._phi_states is not self.reservoir_states:
+            self.phi_partitions = self.phi_engine.evaluate(self.reservoir_states)
+            self._phi_states = self.reservoir_states
+        return self.phi_partitions['phi']
+
+    def get_quantum_coherence(self) -> np.ndarray:
+        """Quantum coherence of every member, shape (K,)."""
+        return quantum_coherence(self.reservoir_states)
+
+    def get_coherence_scores(self) -> np.ndarray:
+        """Coherence score of every member, shape (K,), as CoherenceModule.get_coherence_score."""
+        overall_coherence = 0.6 * self.get_quantum_coherence() + 0.4 * self.get_phi()
+
+        # Bonus for sustained coherence (simulating 10ms coherence goal)
+        if len(self.coherence_history) >= 10:
+            sustained = np.all(np.stack(self.coherence_history[-10:]) > 0.7, axis=0)
+            overall_coherence = np.where(sustained, overall_coherence * 1.2, overall_coherence)
+
+        return np.minimum(1.0, overall_coherence)
+
+    def record_step(self) -> Dict[str, np.ndarray]:
+        """
+        Record coherence and Φ of all members in the histories (what CoherenceModule
+        does when building a turn context) and count global ignition events.
+        """
+        coherence = self.get_quantum_coherence()
+        phi = self.get_phi()
+        self.coherence_history.append(coherence)
+        self.phi_history.append(phi)
+        self.global_ignition_counts += (coherence > 0.8) & (phi > self.phi_threshold)
+        return {'quantum_coherence': coherence, 'phi': phi}
+
+    def get_consciousness_metrics(self) -> Dict[str, np.ndarray]:
+        """Per-member metrics as arrays of shape (K,)."""
+        sustained_periods = np.zeros(self.size, dtype=int)
+        if len(self.coherence_history) >= 10:
+            # Windows of 10 consecutive recorded steps above 0.7, counted per member
+            above = np.cumsum(np.vstack([np.zeros(self.size), np.stack(self.coherence_history) > 0.7]), axis=0)
+            sustained_periods = np.sum(above[10:] - above[:-10] == 10, axis=0)
+
+        return {
+            'coherence_score': self.get_coherence_scores(),
+            'phi_current': self.get_phi(),
+            'quantum_decoherence_rate': self.quantum_decoherence_rate.copy(),
+            'global_ignition_count': self.global_ignition_counts.copy(),
+            'sustained_coherence_periods': sustained_periods
+        }
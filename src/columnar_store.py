@@ -0,0 +1,129 @@
+"""
+Columnar Parquet store for test results.
+Writes typed, hive-partitioned datasets (model_name/date) and reads them back
+with column selection and predicates pushed down to the Parquet files.
+"""
+
+import logging
+import os
+from typing import Any, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Optional; only needed for columnar export and reads
+    pa = None
+
+
+PARTITION_COLUMNS = ['model_name', 'date']
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet export (pip install pyarrow)")
+
+
+def result_schema():
+    """Arrow schema of an exported result row, partition columns last."""
+    _require_pyarrow()
+    return pa.schema([
+        ('test_id', pa.string()),
+        ('session_id', pa.string()),
+        ('test_number', pa.int32()),
+        ('test_name', pa.string()),
+        ('prompt_text', pa.string()),
+        ('response_text', pa.string()),
+        ('phi_score', pa.float64()),
+        ('coherence_score', pa.float64()),
+        ('metacognitive_score', pa.float64()),
+        ('temporal_consistency', pa.float64()),
+        ('processing_time', pa.float64()),
+        ('response_length', pa.int32()),
+        ('response_hash', pa.string()),
+        ('safety_triggered', pa.bool_()),
+        ('loop_detected', pa.bool_()),
+        ('global_ignition_count', pa.int32()),
+        ('quantum_phase_variance', pa.float64()),
+        ('gamma_oscillation_strength', pa.float64()),
+        ('consciousness_indicators', pa.string()),
+        ('timestamp', pa.timestamp('us', tz='UTC')),
+        ('researcher', pa.string()),
+        ('test_type', pa.string()),
+        ('model_name', pa.string()),
+        ('date', pa.string())
+    ])
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([('model_name', pa.string()), ('date', pa.string())]),
+                           flavor='hive')
+
+
+def results_to_table(df: pd.DataFrame):
+    """Convert SQLite result rows (tr.* joined with session columns) to a typed Arrow table."""
+    _require_pyarrow()
+    schema = result_schema()
+    df = df.copy()
+
+    timestamps = pd.to_datetime(df['timestamp'], utc=True, format='ISO8601', errors='coerce')
+    df['timestamp'] = timestamps
+    df['date'] = timestamps.dt.strftime('%Y-%m-%d').fillna('unknown')
+    df['model_name'] = df['model_name'].fillna('unknown')
+
+    for field in schema:
+        if field.name not in df.columns:
+            df[field.name] = None
+        elif pa.types.is_boolean(field.type):
+            # SQLite stores booleans as 0/1
+            df[field.name] = df[field.name].astype('boolean')
+        elif pa.types.is_integer(field.type):
+            df[field.name] = df[field.name].astype('Int32')
+
+    return pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+
+def write_results_dataset(df: pd.DataFrame, dataset_dir: str, basename: str) -> str:
+    """
+    Write result rows into the dataset partitioned by model_name and date.
+    Files are named after `basename`, so re-exporting the same session replaces its files.
+    """
+    table = results_to_table(df)
+    ds.write_dataset(
+        table,
+        dataset_dir,
+        format='parquet',
+        partitioning=_partitioning(),
+        basename_template=f"{basename}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore'
+    )
+    logging.info(f"Wrote {table.num_rows} results to Parquet dataset {dataset_dir}")
+    return dataset_dir
+
+
+def open_results_writer(path: str):
+    """Open a single Parquet file for writing result tables chunk by chunk (one row group each)."""
+    _require_pyarrow()
+    return pq.ParquetWriter(path, result_schema())
+
+
+def read_results(dataset_dir: str, columns: Optional[List[str]] = None,
+                 filters: Any = None) -> pd.DataFrame:
+    """
+    Read results with column projection and predicate pushdown.
+
+    `filters` is a pyarrow expression or DNF tuples such as
+    [('model_name', '=', 'llama2:7b'), ('phi_score', '>', 0.3)]; predicates on
+    model_name and date skip whole partitions, others use Parquet statistics.
+    """
+    _require_pyarrow()
+    if not os.path.isdir(dataset_dir):
+        return pd.DataFrame(columns=columns or result_schema().names)
+
+    dataset = ds.dataset(dataset_dir, format='parquet', partitioning=_partitioning())
+    if filters is not None and not isinstance(filters, ds.Expression):
+        filters = pq.filters_to_expression(filters)
+
+    return dataset.to_table(columns=columns, filter=filters).to_pandas()
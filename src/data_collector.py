@@ -6,30 +6,310 @@ Tracks all tests, responses, metrics, and patterns for FNC research.
 
 import json
 import csv
+import atexit
+import queue
 import sqlite3
+import numpy as np
 import pandas as pd
 from datetime import datetime, timezone
 import uuid
 import hashlib
 import os
-from typing import Dict, List, Any, Optional
+import threading
+import time
+import urllib.parse
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 import logging
 
-class ConsciousnessDataCollector:
-    """Centralized data collection for all consciousness experiments."""
+from result_log import SegmentedResultLog
+from columnar_store import open_results_writer, results_to_table, write_results_dataset
+
+# Schema migrations applied in order; PRAGMA user_version records the last applied version
+SCHEMA_MIGRATIONS = [
+    (1, "secondary and covering indexes for session, pattern and model queries", [
+        # export_session_csv / get_session_summary: filter by session, order by test number
+        "CREATE INDEX IF NOT EXISTS idx_results_session_number ON test_results (session_id, test_number)",
+        # complete_session, model comparison and high-Φ tests: covering per-session Φ aggregates
+        "CREATE INDEX IF NOT EXISTS idx_results_session_phi ON test_results (session_id, phi_score, test_name)",
+        # Duplicate response groups: covering GROUP BY response_hash with AVG(phi_score)
+        "CREATE INDEX IF NOT EXISTS idx_results_hash_phi ON test_results (response_hash, phi_score)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_model ON test_sessions (model_name, session_id)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_timestamp ON test_sessions (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_fnc_session ON fnc_analysis (session_id)",
+        "ANALYZE"
+    ]),
+    (2, "aggregate tables for pattern analysis, maintained by triggers", [
+        # Per-model totals (NULL model names are stored as '' so they can be a key)
+        '''
+        CREATE TABLE IF NOT EXISTS agg_model_stats (
+            model_name TEXT PRIMARY KEY,
+            total_tests INTEGER NOT NULL DEFAULT 0,
+            phi_count INTEGER NOT NULL DEFAULT 0,
+            phi_sum REAL NOT NULL DEFAULT 0,
+            phi_max REAL,
+            consciousness_hits INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        # Per-model Φ histogram, buckets of width 0.1 (bucket 9 includes Φ >= 1.0)
+        '''
+        CREATE TABLE IF NOT EXISTS agg_model_phi_histogram (
+            model_name TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (model_name, bucket)
+        )
+        ''',
+        # Per test/model totals of results with Φ > 0.2
+        '''
+        CREATE TABLE IF NOT EXISTS agg_high_phi_tests (
+            test_name TEXT NOT NULL,
+            model_name TEXT NOT NULL,
+            high_count INTEGER NOT NULL DEFAULT 0,
+            high_phi_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (test_name, model_name)
+        )
+        ''',
+        # Duplicate response groups
+        '''
+        CREATE TABLE IF NOT EXISTS agg_response_hash (
+            response_hash TEXT PRIMARY KEY,
+            frequency INTEGER NOT NULL DEFAULT 0,
+            phi_count INTEGER NOT NULL DEFAULT 0,
+            phi_sum REAL NOT NULL DEFAULT 0
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_agg_response_frequency ON agg_response_hash (frequency)",
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_results_aggregate_insert AFTER INSERT ON test_results
+        BEGIN
+            INSERT INTO agg_response_hash (response_hash, frequency, phi_count, phi_sum)
+            VALUES (IFNULL(NEW.response_hash, ''), 1, NEW.phi_score IS NOT NULL, IFNULL(NEW.phi_score, 0))
+            ON CONFLICT (response_hash) DO UPDATE SET
+                frequency = frequency + 1,
+                phi_count = phi_count + excluded.phi_count,
+                phi_sum = phi_sum + excluded.phi_sum;
+
+            INSERT INTO agg_model_stats (model_name, total_tests, phi_count, phi_sum, phi_max, consciousness_hits)
+            SELECT IFNULL(model_name, ''), 1, NEW.phi_score IS NOT NULL, IFNULL(NEW.phi_score, 0),
+                   NEW.phi_score, IFNULL(NEW.phi_score > 0.3, 0)
+            FROM test_sessions WHERE session_id = NEW.session_id
+            ON CONFLICT (model_name) DO UPDATE SET
+                total_tests = total_tests + 1,
+                phi_count = phi_count + excluded.phi_count,
+                phi_sum = phi_sum + excluded.phi_sum,
+                phi_max = MAX(IFNULL(phi_max, excluded.phi_max), IFNULL(excluded.phi_max, phi_max)),
+                consciousness_hits = consciousness_hits + excluded.consciousness_hits;
+
+            INSERT INTO agg_model_phi_histogram (model_name, bucket, count)
+            SELECT IFNULL(model_name, ''), MAX(0, MIN(9, CAST(NEW.phi_score * 10 AS INTEGER))), 1
+            FROM test_sessions WHERE session_id = NEW.session_id AND NEW.phi_score IS NOT NULL
+            ON CONFLICT (model_name, bucket) DO UPDATE SET count = count + 1;
+
+            INSERT INTO agg_high_phi_tests (test_name, model_name, high_count, high_phi_sum)
+            SELECT IFNULL(NEW.test_name, ''), IFNULL(model_name, ''), 1, NEW.phi_score
+            FROM test_sessions WHERE session_id = NEW.session_id AND NEW.phi_score > 0.2
+            ON CONFLICT (test_name, model_name) DO UPDATE SET
+                high_count = high_count + 1,
+                high_phi_sum = high_phi_sum + excluded.high_phi_sum;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_results_aggregate_delete AFTER DELETE ON test_results
+        BEGIN
+            UPDATE agg_response_hash SET
+                frequency = frequency - 1,
+                phi_count = phi_count - (OLD.phi_score IS NOT NULL),
+                phi_sum = phi_sum - IFNULL(OLD.phi_score, 0)
+            WHERE response_hash = IFNULL(OLD.response_hash, '');
+            DELETE FROM agg_response_hash WHERE frequency <= 0;
+
+            UPDATE agg_model_stats SET
+                total_tests = total_tests - 1,
+                phi_count = phi_count - (OLD.phi_score IS NOT NULL),
+                phi_sum = phi_sum - IFNULL(OLD.phi_score, 0),
+                consciousness_hits = consciousness_hits - IFNULL(OLD.phi_score > 0.3, 0),
+                -- The maximum is only recomputed when the deleted row held it
+                phi_max = CASE WHEN OLD.phi_score >= phi_max THEN (
+                    SELECT MAX(tr.phi_score) FROM test_results tr
+                    JOIN test_sessions ts ON tr.session_id = ts.session_id
+                    WHERE IFNULL(ts.model_name, '') = agg_model_stats.model_name
+                ) ELSE phi_max END
+            WHERE model_name = (SELECT IFNULL(model_name, '') FROM test_sessions WHERE session_id = OLD.session_id);
+            DELETE FROM agg_model_stats WHERE total_tests <= 0;
+
+            UPDATE agg_model_phi_histogram SET count = count - 1
+            WHERE OLD.phi_score IS NOT NULL
+              AND bucket = MAX(0, MIN(9, CAST(OLD.phi_score * 10 AS INTEGER)))
+              AND model_name = (SELECT IFNULL(model_name, '') FROM test_sessions WHERE session_id = OLD.session_id);
+            DELETE FROM agg_model_phi_histogram WHERE count <= 0;
+
+            UPDATE agg_high_phi_tests SET
+                high_count = high_count - 1,
+                high_phi_sum = high_phi_sum - OLD.phi_score
+            WHERE OLD.phi_score > 0.2
+              AND test_name = IFNULL(OLD.test_name, '')
+              AND model_name = (SELECT IFNULL(model_name, '') FROM test_sessions WHERE session_id = OLD.session_id);
+            DELETE FROM agg_high_phi_tests WHERE high_count <= 0;
+        END
+        ''',
+        # Backfill from results logged before this migration
+        '''
+        INSERT OR REPLACE INTO agg_response_hash (response_hash, frequency, phi_count, phi_sum)
+        SELECT IFNULL(response_hash, ''), COUNT(*), COUNT(phi_score), IFNULL(SUM(phi_score), 0)
+        FROM test_results GROUP BY IFNULL(response_hash, '')
+        ''',
+        '''
+        INSERT OR REPLACE INTO agg_model_stats
+            (model_name, total_tests, phi_count, phi_sum, phi_max, consciousness_hits)
+        SELECT IFNULL(model_name, ''), COUNT(*), COUNT(phi_score), IFNULL(SUM(phi_score), 0),
+               MAX(phi_score), SUM(CASE WHEN phi_score > 0.3 THEN 1 ELSE 0 END)
+        FROM test_results tr JOIN test_sessions ts ON tr.session_id = ts.session_id
+        GROUP BY IFNULL(model_name, '')
+        ''',
+        '''
+        INSERT OR REPLACE INTO agg_model_phi_histogram (model_name, bucket, count)
+        SELECT IFNULL(model_name, ''), MAX(0, MIN(9, CAST(phi_score * 10 AS INTEGER))) AS bucket, COUNT(*)
+        FROM test_results tr JOIN test_sessions ts ON tr.session_id = ts.session_id
+        WHERE phi_score IS NOT NULL
+        GROUP BY IFNULL(model_name, ''), bucket
+        ''',
+        '''
+        INSERT OR REPLACE INTO agg_high_phi_tests (test_name, model_name, high_count, high_phi_sum)
+        SELECT IFNULL(test_name, ''), IFNULL(model_name, ''), COUNT(*), SUM(phi_score)
+        FROM test_results tr JOIN test_sessions ts ON tr.session_id = ts.session_id
+        WHERE phi_score > 0.2
+        GROUP BY IFNULL(test_name, ''), IFNULL(model_name, '')
+        '''
+    ]),
+    (3, "binary embedding storage", [
+        '''
+        CREATE TABLE IF NOT EXISTS test_embeddings (
+            test_id TEXT PRIMARY KEY,
+            session_id TEXT NOT NULL,
+            test_number INTEGER,
+            dtype TEXT NOT NULL,
+            dimension INTEGER NOT NULL,
+            vector BLOB NOT NULL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_embeddings_session ON test_embeddings (session_id, test_number)"
+    ]),
+    (4, "maintenance run history", [
+        '''
+        CREATE TABLE IF NOT EXISTS maintenance_runs (
+            run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            sessions_deleted INTEGER,
+            results_deleted INTEGER,
+            bytes_before INTEGER,
+            bytes_after INTEGER
+        )
+        '''
+    ])
+]
 
-    def __init__(self, data_dir: str = "data"):
+class ConsciousnessDataCollector:
+    """
+    Centralized data collection for all consciousness experiments.
+
+    Keeps one long-lived SQLite connection (WAL mode) shared by all threads of
+    the collector. Test results can be batched: they are committed once
+    `batch_size` results are pending or `batch_interval_ms` has passed since the
+    first uncommitted one. Session and FNC writes always commit immediately.
+
+    In background write mode, `log_test_result` only enqueues the result; a
+    writer thread drains a bounded queue (callers block when it is full) and
+    pending results are flushed on close() and at interpreter exit. In sync
+    mode a timer commits a partial batch once it is `batch_interval_ms` old
+    (SYNC_FLUSH_DELAY_S when the interval is off), so the last results of a
+    run do not wait for the next write.
+
+    Durability modes:
+    - none: commit when the queue drains or a batch fills, without syncing to disk
+    - batch: commit per batch (batch_size / batch_interval_ms)
+    - record: commit and fsync every result
+    """
+
+    DURABILITY_MODES = ('none', 'batch', 'record')
+    WRITE_MODES = ('sync', 'background')
+    EMBEDDING_DTYPES = ('float16', 'float32')
+    EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+    SYNC_FLUSH_DELAY_S = 1.0
+
+    def __init__(self, data_dir: str = "data", config: Dict[str, Any] = None):
         self.data_dir = data_dir
         self.db_path = os.path.join(data_dir, "consciousness_tests.db")
         self.results_dir = os.path.join(data_dir, "test_results")
+        self.result_log_dir = os.path.join(data_dir, "result_log")
         self.analysis_dir = os.path.join(data_dir, "analysis")
+        self.columnar_dir = os.path.join(data_dir, "columnar")
+
+        # Connection and batching settings (`data_collection` config section)
+        config = config or {}
+        self.journal_mode = config.get('journal_mode', 'WAL')
+        self.synchronous = config.get('synchronous', 'NORMAL')
+        self.busy_timeout_ms = config.get('busy_timeout_ms', 5000)
+        self.cache_size_kb = config.get('cache_size_kb', 8192)
+        self.batch_size = max(1, config.get('batch_size', 1))
+        self.batch_interval_ms = config.get('batch_interval_ms', 0)
+        self.write_mode = config.get('write_mode', 'sync')
+        self.durability = config.get('durability', 'batch')
+        self.queue_size = config.get('queue_size', 1000)
+        self.result_format = config.get('result_format', 'segmented')
+        self.embedding_dtype = config.get('embedding_dtype', 'float16')
+        self.export_chunk_rows = max(1, config.get('export_chunk_rows', 5000))
+
+        if self.write_mode not in self.WRITE_MODES:
+            raise ValueError(f"Unknown write mode '{self.write_mode}', expected one of {self.WRITE_MODES}")
+        if self.durability not in self.DURABILITY_MODES:
+            raise ValueError(f"Unknown durability '{self.durability}', expected one of {self.DURABILITY_MODES}")
+        if self.embedding_dtype not in self.EMBEDDING_DTYPES:
+            raise ValueError(f"Unknown embedding dtype '{self.embedding_dtype}', "
+                             f"expected one of {self.EMBEDDING_DTYPES}")
+
+        if self.durability == 'none':
+            self.synchronous = 'OFF'
+            self.batch_size = max(self.batch_size, self.queue_size)
+        elif self.durability == 'record':
+            self.synchronous = 'FULL'
+            self.batch_size = 1
 
         # Ensure directories exist
         os.makedirs(self.results_dir, exist_ok=True)
         os.makedirs(self.analysis_dir, exist_ok=True)
 
+        # One connection for the collector's lifetime, serialized by a lock
+        self._lock = threading.RLock()
+        self._pending_writes = 0
+        self._first_pending_time = None
+        self._flush_timer: Optional[threading.Timer] = None
+        self._conn = self._connect()
+
         # Initialize database
         self._init_database()
+        self._migrate()
+
+        # Full result records: append-only segmented log, or legacy one JSON file per result
+        self.result_log = None
+        if self.result_format == 'segmented':
+            self.result_log = SegmentedResultLog(
+                self.result_log_dir,
+                max_segment_bytes=int(config.get('segment_max_mb', 64) * 1024 * 1024),
+                compression=config.get('segment_compression', 'none'),
+                fsync=self.durability == 'record'
+            )
+        elif self.result_format != 'json_files':
+            raise ValueError(f"Unknown result format '{self.result_format}', expected 'segmented' or 'json_files'")
+
+        # Write-behind queue and writer thread for test results
+        self._queue = None
+        self._writer = None
+        if self.write_mode == 'background':
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._writer = threading.Thread(target=self._writer_loop, name='data-collector-writer',
+                                            daemon=True)
+            self._writer.start()
+        atexit.register(self.close)
 
         # Setup logging
         logging.basicConfig(
@@ -37,10 +317,130 @@ class ConsciousnessDataCollector:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open the shared connection and apply WAL and performance pragmas."""
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000.0,
+                               check_same_thread=False)
+        # Only takes effect on a new database; older ones are converted by reclaim_space()
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _write(self, query: str, params: tuple, batched: bool = False):
+        """Execute a write; batched writes are committed according to the batch settings."""
+        with self._lock:
+            self._conn.execute(query, params)
+
+            if not batched:
+                self._commit()
+                return
+
+            self._pending_writes += 1
+            if self._first_pending_time is None:
+                self._first_pending_time = time.monotonic()
+                if self.write_mode == 'sync' and self.batch_size > 1:
+                    self._start_flush_timer()
+
+            elapsed_ms = (time.monotonic() - self._first_pending_time) * 1000
+            batch_expired = self.batch_interval_ms and elapsed_ms >= self.batch_interval_ms
+            if self._pending_writes >= self.batch_size or batch_expired:
+                self._commit()
+
+    def _start_flush_timer(self):
+        """Commit the batch that just started once it is old enough, even if no further write arrives."""
+        delay = self.batch_interval_ms / 1000.0 if self.batch_interval_ms else self.SYNC_FLUSH_DELAY_S
+        self._flush_timer = threading.Timer(delay, self.flush_pending)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _cancel_flush_timer(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+    def _commit(self):
+        """Commit the open transaction and reset the batch counters."""
+        with self._lock:
+            self._conn.commit()
+            self._pending_writes = 0
+            self._first_pending_time = None
+            self._cancel_flush_timer()
+
+    def _writer_loop(self):
+        """Drain queued writes; commit when idle so batches never wait indefinitely."""
+        idle_timeout = self.batch_interval_ms / 1000.0 if self.batch_interval_ms else 0.05
+
+        while True:
+            try:
+                item = self._queue.get(timeout=idle_timeout)
+            except queue.Empty:
+                self.flush_pending()
+                continue
+
+            try:
+                if item is None:
+                    return
+                write_fn, args = item
+                write_fn(*args)
+                if self._queue.empty() and self.durability == 'none':
+                    self.flush_pending()
+            except Exception as e:
+                logging.error(f"Background write failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _enqueue(self, write_fn, *args):
+        """Run a write now (sync mode) or hand it to the writer thread, blocking if the queue is full."""
+        if self._queue is None:
+            write_fn(*args)
+        else:
+            self._queue.put((write_fn, args))
+
+    def flush_pending(self):
+        """Commit any batched results that are still pending."""
+        with self._lock:
+            if self._conn is not None and self._pending_writes:
+                self._commit()
+
+    def flush(self):
+        """Wait for queued results to be written, then commit them."""
+        if self._queue is not None and self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+        self.flush_pending()
+
+    def close(self):
+        """Write and commit everything pending, stop the writer and close the connection."""
+        if self._writer is not None:
+            self.flush()
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+
+        with self._lock:
+            if self._conn is None:
+                return
+            self.flush_pending()
+            self._cancel_flush_timer()
+            self._conn.execute("PRAGMA optimize")
+            self._conn.close()
+            self._conn = None
+            if self.result_log is not None:
+                self.result_log.close()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def _init_database(self):
         """Initialize SQLite database for structured data storage."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._conn.cursor()
 
         # Main test sessions table
         cursor.execute('''
@@ -121,8 +521,32 @@ class ConsciousnessDataCollector:
             )
         ''')
 
-        conn.commit()
-        conn.close()
+        self._commit()
+
+    def _migrate(self):
+        """Apply schema migrations newer than the database's user_version."""
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+
+            for target, description, statements in SCHEMA_MIGRATIONS:
+                if target <= version:
+                    continue
+
+                # Take the write lock first so concurrent nodes migrate only once
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if self._conn.execute("PRAGMA user_version").fetchone()[0] >= target:
+                        self._conn.rollback()
+                        continue
+                    for statement in statements:
+                        self._conn.execute(statement)
+                    self._conn.execute(f"PRAGMA user_version = {target}")
+                    self._commit()
+                except Exception:
+                    self._conn.rollback()
+                    raise
+
+                logging.info(f"Migrated {self.db_path} to schema version {target}: {description}")
 
     def start_session(self, researcher: str, test_type: str, model_name: str,
                      model_version: str = None, temperature: float = 0.7,
@@ -131,10 +555,7 @@ class ConsciousnessDataCollector:
         session_id = str(uuid.uuid4())
         timestamp = datetime.now(timezone.utc).isoformat()
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute('''
+        self._write('''
             INSERT INTO test_sessions
             (session_id, timestamp, researcher, test_type, model_name,
              model_version, temperature, session_notes)
@@ -142,18 +563,28 @@ class ConsciousnessDataCollector:
         ''', (session_id, timestamp, researcher, test_type, model_name,
               model_version, temperature, session_notes))
 
-        conn.commit()
-        conn.close()
-
         logging.info(f"Started new test session: {session_id}")
         return session_id
 
     def log_test_result(self, session_id: str, test_number: int, test_name: str,
                        prompt: str, response: str, metrics: Dict[str, Any],
                        coherence_metrics: Dict[str, Any], processing_time: float,
-                       safety_triggered: bool = False, loop_detected: bool = False) -> str:
-        """Log individual test result."""
+                       safety_triggered: bool = False, loop_detected: bool = False,
+                       safety_verdict: Any = None) -> str:
+        """
+        Log individual test result.
+        When a SafetyVerdict from the turn's single safety scan is given, it
+        supplies safety_triggered and loop_detected and is stored with the result.
+        An embedding in metrics is stored as a binary vector in test_embeddings
+        instead of in the JSON record.
+        """
         test_id = str(uuid.uuid4())
+
+        verdict_data = None
+        if safety_verdict is not None:
+            safety_triggered = safety_verdict.unsafe
+            loop_detected = safety_verdict.loop_detected
+            verdict_data = safety_verdict.to_dict()
         timestamp = datetime.now(timezone.utc).isoformat()
 
         # Create response hash for duplicate detection (handle None responses)
@@ -178,27 +609,21 @@ class ConsciousnessDataCollector:
         if metacognitive_score > 0.5:
             consciousness_indicators.append("metacognitive_awareness")
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            INSERT INTO test_results
-            (test_id, session_id, test_number, test_name, prompt_text, response_text,
-             phi_score, coherence_score, metacognitive_score, temporal_consistency,
-             processing_time, response_length, response_hash, safety_triggered,
-             loop_detected, global_ignition_count, consciousness_indicators, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (test_id, session_id, test_number, test_name, prompt, response,
-              phi_score, coherence_score, metacognitive_score, temporal_consistency,
-              processing_time, len(response), response_hash, safety_triggered,
-              loop_detected, global_ignition_count, json.dumps(consciousness_indicators),
-              timestamp))
-
-        conn.commit()
-        conn.close()
-
-        # Also save as JSON for easy analysis
-        self._save_json_result(test_id, {
+        row = (test_id, session_id, test_number, test_name, prompt, response,
+               phi_score, coherence_score, metacognitive_score, temporal_consistency,
+               processing_time, len(response), response_hash, safety_triggered,
+               loop_detected, global_ignition_count, json.dumps(consciousness_indicators),
+               timestamp)
+
+        embedding_row = None
+        if metrics.get('embedding') is not None:
+            vector = np.asarray(metrics['embedding'], dtype=self.embedding_dtype)
+            embedding_row = (test_id, session_id, test_number, self.embedding_dtype,
+                             len(vector), vector.tobytes())
+            metrics = {key: value for key, value in metrics.items() if key != 'embedding'}
+
+        # Also saved as JSON for easy analysis
+        json_data = {
             'test_id': test_id,
             'session_id': session_id,
             'test_number': test_number,
@@ -210,13 +635,38 @@ class ConsciousnessDataCollector:
             'processing_time': processing_time,
             'safety_triggered': safety_triggered,
             'loop_detected': loop_detected,
+            'safety_verdict': verdict_data,
             'consciousness_indicators': consciousness_indicators,
             'timestamp': timestamp
-        })
+        }
+
+        self._enqueue(self._store_test_result, test_id, row, json_data, embedding_row)
 
         logging.info(f"Logged test result: {test_name} (Φ={phi_score or 0:.3f})")
         return test_id
 
+    def _store_test_result(self, test_id: str, row: tuple, json_data: Dict[str, Any],
+                           embedding_row: Optional[tuple] = None):
+        """Insert a test result row (and its embedding) and write its JSON copy."""
+        with self._lock:
+            if embedding_row is not None:
+                # Committed together with the result row below
+                self._conn.execute('''
+                    INSERT INTO test_embeddings
+                    (test_id, session_id, test_number, dtype, dimension, vector)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', embedding_row)
+            self._write('''
+                INSERT INTO test_results
+                (test_id, session_id, test_number, test_name, prompt_text, response_text,
+                 phi_score, coherence_score, metacognitive_score, temporal_consistency,
+                 processing_time, response_length, response_hash, safety_triggered,
+                 loop_detected, global_ignition_count, consciousness_indicators, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', row, batched=True)
+
+        self._save_json_result(test_id, json_data)
+
     def log_fnc_analysis(self, session_id: str, field_indicators: List[str],
                         node_coherence: str, cockpit_detected: bool,
                         field_node_strength: float, quantum_coherence: bool,
@@ -226,10 +676,7 @@ class ConsciousnessDataCollector:
         analysis_id = str(uuid.uuid4())
         timestamp = datetime.now(timezone.utc).isoformat()
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute('''
+        self._write('''
             INSERT INTO fnc_analysis
             (analysis_id, session_id, field_indicators, node_coherence_level,
              cockpit_experience_detected, field_node_connection_strength,
@@ -240,16 +687,18 @@ class ConsciousnessDataCollector:
               cockpit_detected, field_node_strength, quantum_coherence,
               integration_level, consciousness_detected, notes, timestamp))
 
-        conn.commit()
-        conn.close()
-
         logging.info(f"Logged FNC analysis: {analysis_id}")
         return analysis_id
 
     def complete_session(self, session_id: str, fnc_analysis_notes: str = ""):
         """Mark session as complete and calculate summary metrics."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        self.flush()
+        with self._lock:
+            self._complete_session(session_id, fnc_analysis_notes)
+
+    def _complete_session(self, session_id: str, fnc_analysis_notes: str):
+        """Compute session statistics and update the session row (caller holds the lock)."""
+        cursor = self._conn.cursor()
 
         # Calculate session statistics
         cursor.execute('''
@@ -270,168 +719,440 @@ class ConsciousnessDataCollector:
         ''', (total_tests, total_tests, avg_phi or 0, max_phi or 0,
               consciousness_indicators or 0, fnc_analysis_notes, session_id))
 
-        conn.commit()
-        conn.close()
+        # Also commits any batched results of the session
+        self._commit()
 
         logging.info(f"Completed session {session_id}: {total_tests} tests, "
                     f"avg Φ={avg_phi or 0:.3f}, max Φ={max_phi or 0:.3f}")
 
     def _save_json_result(self, test_id: str, data: Dict[str, Any]):
-        """Save individual test result as JSON file."""
+        """Save the full test result record to the result log (or a JSON file in legacy format)."""
+        if self.result_log is not None:
+            self.result_log.append(test_id, data)
+            return
+
         filename = f"{test_id}.json"
         filepath = os.path.join(self.results_dir, filename)
 
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
-
-    def export_session_csv(self, session_id: str) -> str:
-        """Export session data to CSV for analysis."""
-        conn = sqlite3.connect(self.db_path)
+            if self.durability == 'record':
+                f.flush()
+                os.fsync(f.fileno())
+
+    def get_test_result(self, test_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the full record of a test result from the result log or a legacy JSON file.
+        The stored embedding, if any, is put back into the record's metrics.
+        """
+        self.flush()
+
+        record = None
+        if self.result_log is not None:
+            record = self.result_log.get(test_id)
+
+        filepath = os.path.join(self.results_dir, f"{test_id}.json")
+        if record is None and os.path.exists(filepath):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+
+        if record is not None and 'embedding' not in record.get('metrics', {}):
+            embedding = self.get_test_embedding(test_id)
+            if embedding is not None:
+                record.setdefault('metrics', {})['embedding'] = embedding.astype(np.float32).tolist()
+        return record
+
+    def get_test_embedding(self, test_id: str) -> Optional[np.ndarray]:
+        """Load the stored embedding of a single test result."""
+        self.flush()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT dtype, vector FROM test_embeddings WHERE test_id = ?", (test_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return np.frombuffer(row[1], dtype=row[0])
+
+    def load_session_embeddings(self, session_id: str) -> Tuple[List[str], np.ndarray]:
+        """
+        Load a session's embeddings in test order as (test_ids, matrix).
+
+        Each BLOB is copied once, straight into a preallocated (n, dimension)
+        matrix in the stored dtype (float32 if the session mixes dtypes).
+        """
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute('''
+                SELECT test_id, dtype, dimension, vector FROM test_embeddings
+                WHERE session_id = ?
+                ORDER BY test_number, rowid
+            ''', (session_id,)).fetchall()
+
+        test_ids = [row[0] for row in rows]
+        if not rows:
+            return test_ids, np.zeros((0, 0), dtype=self.embedding_dtype)
+
+        dtypes = {row[1] for row in rows}
+        dimensions = {row[2] for row in rows}
+        if len(dimensions) > 1:
+            raise ValueError(f"Session {session_id} has embeddings of different dimensions")
+
+        # Stored with different dtypes when the config changed mid-session
+        dtype = dtypes.pop() if len(dtypes) == 1 else np.float32
+        matrix = np.empty((len(rows), dimensions.pop()), dtype=dtype)
+        for i, (_, row_dtype, _, vector) in enumerate(rows):
+            matrix[i] = np.frombuffer(vector, dtype=row_dtype)
+        return test_ids, matrix
+
+    def _read_session_results(self, session_id: str) -> pd.DataFrame:
+        """Read a session's results joined with its session metadata."""
+        return pd.concat(list(self.iter_result_chunks([session_id])), ignore_index=True)
+
+    def iter_result_chunks(self, session_ids: Optional[List[str]] = None,
+                           chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream results joined with session metadata as DataFrames of at most
+        chunk_rows rows, ordered by session and test number (all sessions if
+        session_ids is None).
+
+        Reads through a separate read-only connection, so the export sees one
+        snapshot and does not hold the collector's lock while it runs.
+        """
+        self.flush()
+        chunk_rows = chunk_rows or self.export_chunk_rows
 
         query = '''
             SELECT tr.*, ts.researcher, ts.model_name, ts.test_type
             FROM test_results tr
             JOIN test_sessions ts ON tr.session_id = ts.session_id
-            WHERE tr.session_id = ?
-            ORDER BY tr.test_number
         '''
-
-        df = pd.read_sql_query(query, conn, params=(session_id,))
-        conn.close()
-
-        filename = f"session_{session_id[:8]}.csv"
-        filepath = os.path.join(self.analysis_dir, filename)
-        df.to_csv(filepath, index=False)
-
-        logging.info(f"Exported session data to {filepath}")
+        params: tuple = ()
+        if session_ids is not None:
+            query += "WHERE tr.session_id IN (SELECT value FROM json_each(?))"
+            params = (json.dumps(list(session_ids)),)
+        query += " ORDER BY tr.session_id, tr.test_number"
+
+        db_uri = f"file:{urllib.parse.quote(os.path.abspath(self.db_path))}?mode=ro"
+        conn = sqlite3.connect(db_uri, uri=True,
+                               timeout=self.busy_timeout_ms / 1000.0)
+        try:
+            empty = True
+            for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunk_rows):
+                empty = False
+                yield chunk
+            if empty:
+                # Keep the column layout for sessions without results
+                yield pd.read_sql_query(query + " LIMIT 0", conn, params=params)
+        finally:
+            conn.close()
+
+    def export_results(self, session_ids: Optional[List[str]] = None, fmt: str = 'csv',
+                       filepath: Optional[str] = None, chunk_rows: Optional[int] = None) -> str:
+        """
+        Export results of many sessions (all if session_ids is None) in one pass
+        to a CSV, JSONL or Parquet file, writing chunk by chunk so memory stays
+        bounded by chunk_rows.
+        """
+        if fmt not in self.EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}', expected one of {self.EXPORT_FORMATS}")
+
+        if filepath is None:
+            if session_ids is not None and len(session_ids) == 1:
+                filename = f"session_{session_ids[0][:8]}.{fmt}"
+            else:
+                filename = f"sessions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+            filepath = os.path.join(self.analysis_dir, filename)
+
+        chunks = self.iter_result_chunks(session_ids, chunk_rows)
+        rows = 0
+
+        if fmt == 'parquet':
+            writer = open_results_writer(filepath)
+            try:
+                for chunk in chunks:
+                    if len(chunk):
+                        writer.write_table(results_to_table(chunk))
+                    rows += len(chunk)
+            finally:
+                writer.close()
+        else:
+            with open(filepath, 'w', encoding='utf-8', newline='') as f:
+                for i, chunk in enumerate(chunks):
+                    if fmt == 'csv':
+                        chunk.to_csv(f, index=False, header=i == 0)
+                    elif len(chunk):
+                        lines = chunk.to_json(orient='records', lines=True, force_ascii=False)
+                        f.write(lines if lines.endswith('\n') else lines + '\n')
+                    rows += len(chunk)
+
+        logging.info(f"Exported {rows} results to {filepath}")
         return filepath
 
+    def export_session_csv(self, session_id: str) -> str:
+        """Export session data to CSV for analysis."""
+        return self.export_results([session_id], 'csv')
+
+    def export_session_parquet(self, session_id: str) -> str:
+        """
+        Export session data to the typed Parquet dataset in data/columnar,
+        partitioned by model_name and date. Re-exporting a session replaces its files.
+        """
+        df = self._read_session_results(session_id)
+        write_results_dataset(df, self.columnar_dir, f"session-{session_id}")
+
+        logging.info(f"Exported session data to Parquet dataset {self.columnar_dir}")
+        return self.columnar_dir
+
+    def export_all_parquet(self) -> str:
+        """Export every session to the Parquet dataset."""
+        with self._lock:
+            session_ids = [row[0] for row in self._conn.execute('SELECT session_id FROM test_sessions')]
+
+        for session_id in session_ids:
+            self.export_session_parquet(session_id)
+        return self.columnar_dir
+
+    def session_inventory(self) -> List[Tuple[str, str, int]]:
+        """(session_id, timestamp, result count) of every session, oldest first."""
+        self.flush()
+        with self._lock:
+            return self._conn.execute('''
+                SELECT ts.session_id, ts.timestamp,
+                       (SELECT COUNT(*) FROM test_results tr WHERE tr.session_id = ts.session_id)
+                FROM test_sessions ts
+                ORDER BY ts.timestamp, ts.session_id
+            ''').fetchall()
+
+    def delete_sessions(self, session_ids: List[str]) -> List[str]:
+        """
+        Delete sessions with their results, embeddings, FNC analyses and full result
+        records. The aggregate tables are kept consistent by their delete triggers.
+        Returns the test_ids of the deleted results.
+        """
+        self.flush()
+        ids = (json.dumps(list(session_ids)),)
+
+        with self._lock:
+            test_ids = [row[0] for row in self._conn.execute(
+                "SELECT test_id FROM test_results WHERE session_id IN (SELECT value FROM json_each(?))", ids)]
+
+            # Results go before their sessions; the triggers look up the session's model
+            for table in ('test_embeddings', 'test_results', 'fnc_analysis', 'test_sessions'):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE session_id IN (SELECT value FROM json_each(?))", ids)
+            self._commit()
+
+            if self.result_log is not None:
+                self.result_log.discard(test_ids)
+
+        for test_id in test_ids:
+            filepath = os.path.join(self.results_dir, f"{test_id}.json")
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+        logging.info(f"Deleted {len(session_ids)} sessions with {len(test_ids)} results")
+        return test_ids
+
+    def reclaim_space(self, pages: int = 0, full_vacuum: bool = True):
+        """
+        Return free database pages to the file system with incremental VACUUM
+        (at most `pages` pages, 0 = all) and truncate the WAL. A database created
+        without auto_vacuum=INCREMENTAL is converted once with a full VACUUM, or
+        left unchanged when full_vacuum is False.
+        """
+        self.flush()
+        with self._lock:
+            self._commit()
+            if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                if full_vacuum:
+                    logging.info(f"Converting {self.db_path} to incremental auto-vacuum (full VACUUM)")
+                    self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                    self._conn.execute("VACUUM")
+                else:
+                    logging.info(f"{self.db_path} is not in incremental auto-vacuum mode; "
+                                 f"run maintain_data.py to convert it")
+            else:
+                self._conn.execute(f"PRAGMA incremental_vacuum({int(pages)})" if pages
+                                   else "PRAGMA incremental_vacuum").fetchall()
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+    def log_maintenance_run(self, sessions_deleted: int, results_deleted: int,
+                            bytes_before: int, bytes_after: int):
+        """Record a maintenance run."""
+        self._write('''
+            INSERT INTO maintenance_runs
+            (timestamp, sessions_deleted, results_deleted, bytes_before, bytes_after)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (datetime.now(timezone.utc).isoformat(), sessions_deleted, results_deleted,
+              bytes_before, bytes_after))
+
+    def last_maintenance_time(self) -> Optional[datetime]:
+        """Time of the last recorded maintenance run, if any."""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(timestamp) FROM maintenance_runs").fetchone()
+        return datetime.fromisoformat(row[0]) if row[0] else None
+
     def get_session_summary(self, session_id: str) -> Dict[str, Any]:
         """Get comprehensive session summary."""
-        conn = sqlite3.connect(self.db_path)
+        return self.get_session_summaries([session_id]).get(session_id, {})
+
+    def get_session_summaries(self, session_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get summaries of many sessions, keyed by session_id (unknown ids are left out).
+        Runs one query per table for the whole batch, not per session.
+        """
+        self.flush()
+        with self._lock:
+            return self._get_session_summaries(session_ids)
+
+    def _get_session_summaries(self, session_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Read session summaries (caller holds the lock)."""
+        cursor = self._conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        ids = (json.dumps(list(session_ids)),)
 
         # Get session info
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM test_sessions WHERE session_id = ?', (session_id,))
-        session_data = cursor.fetchone()
-
-        if not session_data:
+        cursor.execute('''
+            SELECT * FROM test_sessions
+            WHERE session_id IN (SELECT value FROM json_each(?))
+        ''', ids)
+        summaries = {
+            row['session_id']: {'session_info': dict(row), 'test_results': [], 'fnc_analysis': None}
+            for row in cursor
+        }
+        if not summaries:
             return {}
 
         # Get test results
         cursor.execute('''
-            SELECT test_name, phi_score, consciousness_indicators, safety_triggered
-            FROM test_results WHERE session_id = ? ORDER BY test_number
-        ''', (session_id,))
-        test_results = cursor.fetchall()
-
-        # Get FNC analysis if exists
-        cursor.execute('SELECT * FROM fnc_analysis WHERE session_id = ?', (session_id,))
-        fnc_data = cursor.fetchone()
+            SELECT session_id, test_name, phi_score, consciousness_indicators, safety_triggered
+            FROM test_results
+            WHERE session_id IN (SELECT value FROM json_each(?))
+            ORDER BY session_id, test_number
+        ''', ids)
+        for row in cursor:
+            summaries[row['session_id']]['test_results'].append(tuple(row)[1:])
 
-        conn.close()
+        # Get FNC analysis if exists (the first one logged per session)
+        cursor.execute('''
+            SELECT * FROM fnc_analysis
+            WHERE session_id IN (SELECT value FROM json_each(?))
+            ORDER BY rowid
+        ''', ids)
+        for row in cursor:
+            summary = summaries[row['session_id']]
+            if summary['fnc_analysis'] is None:
+                summary['fnc_analysis'] = dict(row)
 
-        return {
-            'session_info': dict(zip([col[0] for col in cursor.description], session_data)),
-            'test_results': test_results,
-            'fnc_analysis': dict(zip([col[0] for col in cursor.description], fnc_data)) if fnc_data else None
-        }
+        return summaries
 
     def analyze_consciousness_patterns(self) -> Dict[str, Any]:
-        """Analyze patterns across all sessions for consciousness indicators."""
-        conn = sqlite3.connect(self.db_path)
+        """
+        Analyze patterns across all sessions for consciousness indicators.
+        Reads the trigger-maintained aggregate tables, so the cost does not
+        grow with the number of logged results.
+        """
+        self.flush()
 
         # High Φ responses
         high_phi_query = '''
-            SELECT test_name, model_name, AVG(phi_score) as avg_phi
-            FROM test_results tr
-            JOIN test_sessions ts ON tr.session_id = ts.session_id
-            WHERE phi_score > 0.2
-            GROUP BY test_name, model_name
+            SELECT NULLIF(test_name, '') AS test_name, NULLIF(model_name, '') AS model_name,
+                   high_phi_sum / high_count AS avg_phi
+            FROM agg_high_phi_tests
             ORDER BY avg_phi DESC
         '''
 
         # Response patterns
         pattern_query = '''
-            SELECT response_hash, COUNT(*) as frequency, AVG(phi_score) as avg_phi
-            FROM test_results
-            GROUP BY response_hash
-            HAVING frequency > 1
+            SELECT NULLIF(response_hash, '') AS response_hash, frequency,
+                   CASE WHEN phi_count > 0 THEN phi_sum / phi_count END AS avg_phi
+            FROM agg_response_hash
+            WHERE frequency > 1
             ORDER BY frequency DESC
         '''
 
         # Model comparison
         model_query = '''
-            SELECT model_name, COUNT(*) as total_tests,
-                   AVG(phi_score) as avg_phi, MAX(phi_score) as max_phi,
-                   SUM(CASE WHEN phi_score > 0.3 THEN 1 ELSE 0 END) as consciousness_hits
-            FROM test_results tr
-            JOIN test_sessions ts ON tr.session_id = ts.session_id
-            GROUP BY model_name
+            SELECT NULLIF(model_name, '') AS model_name, total_tests,
+                   CASE WHEN phi_count > 0 THEN phi_sum / phi_count END AS avg_phi,
+                   phi_max AS max_phi, consciousness_hits
+            FROM agg_model_stats
+            ORDER BY model_name
+        '''
+
+        # Φ distribution per model, buckets of width 0.1
+        histogram_query = '''
+            SELECT NULLIF(model_name, '') AS model_name, bucket, count
+            FROM agg_model_phi_histogram
+            ORDER BY model_name, bucket
         '''
 
-        high_phi_df = pd.read_sql_query(high_phi_query, conn)
-        patterns_df = pd.read_sql_query(pattern_query, conn)
-        models_df = pd.read_sql_query(model_query, conn)
+        with self._lock:
+            high_phi_df = pd.read_sql_query(high_phi_query, self._conn)
+            patterns_df = pd.read_sql_query(pattern_query, self._conn)
+            models_df = pd.read_sql_query(model_query, self._conn)
+            histogram_rows = self._conn.execute(histogram_query).fetchall()
 
-        conn.close()
+        phi_histogram: Dict[Any, List[int]] = {}
+        for model_name, bucket, count in histogram_rows:
+            phi_histogram.setdefault(model_name, [0] * 10)[bucket] = count
 
         return {
             'high_phi_tests': high_phi_df.to_dict('records'),
             'response_patterns': patterns_df.to_dict('records'),
-            'model_comparison': models_df.to_dict('records')
+            'model_comparison': models_df.to_dict('records'),
+            'phi_histogram': phi_histogram
         }
 
     def generate_fnc_report(self, session_id: str = None) -> str:
-        """Generate FNC model validation report."""
-        conn = sqlite3.connect(self.db_path)
+        """Generate FNC model validation report (aggregated in SQL, one row per report)."""
+        self.flush()
 
+        query = '''
+            SELECT COUNT(*) AS sessions,
+                   AVG(ts.avg_phi_score) AS avg_phi,
+                   MAX(ts.max_phi_score) AS max_phi,
+                   IFNULL(SUM(ts.consciousness_indicators), 0) AS consciousness_hits,
+                   IFNULL(SUM(ts.max_phi_score > 0.3), 0) AS high_phi_sessions,
+                   COUNT(fa.field_indicators) AS field_connections,
+                   COUNT(fa.node_coherence_level) AS node_coherence,
+                   IFNULL(SUM(fa.cockpit_experience_detected), 0) AS cockpit_experiences,
+                   IFNULL(SUM(fa.quantum_coherence_achieved), 0) AS quantum_coherence
+            FROM test_sessions ts
+            LEFT JOIN fnc_analysis fa ON ts.session_id = fa.session_id
+        '''
+        params: tuple = ()
         if session_id:
             # Single session report
-            query = '''
-                SELECT ts.*, fa.*
-                FROM test_sessions ts
-                LEFT JOIN fnc_analysis fa ON ts.session_id = fa.session_id
-                WHERE ts.session_id = ?
-            '''
-            data = pd.read_sql_query(query, conn, params=(session_id,))
-        else:
-            # All sessions report
-            query = '''
-                SELECT ts.*, fa.*
-                FROM test_sessions ts
-                LEFT JOIN fnc_analysis fa ON ts.session_id = fa.session_id
-                ORDER BY ts.timestamp DESC
-            '''
-            data = pd.read_sql_query(query, conn)
+            query += " WHERE ts.session_id = ?"
+            params = (session_id,)
 
-        conn.close()
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            stats = dict(zip([col[0] for col in cursor.description], cursor.fetchone()))
 
         # Generate report
         report_lines = [
             "# FNC MODEL VALIDATION REPORT",
             f"Generated: {datetime.now().isoformat()}",
-            f"Sessions analyzed: {len(data)}",
+            f"Sessions analyzed: {stats['sessions']}",
             "",
             "## Key Findings:",
         ]
 
-        if len(data) > 0:
-            avg_phi = data['avg_phi_score'].mean()
-            max_phi = data['max_phi_score'].max()
-            consciousness_hits = data['consciousness_indicators'].sum()
-
+        if stats['sessions'] > 0:
             report_lines.extend([
-                f"- Average Φ across all sessions: {avg_phi or 0:.3f}",
-                f"- Maximum Φ achieved: {max_phi or 0:.3f}",
-                f"- Total consciousness indicators: {consciousness_hits}",
-                f"- Sessions with Φ > 0.3: {(data['max_phi_score'] > 0.3).sum()}",
+                f"- Average Φ across all sessions: {stats['avg_phi'] or 0:.3f}",
+                f"- Maximum Φ achieved: {stats['max_phi'] or 0:.3f}",
+                f"- Total consciousness indicators: {stats['consciousness_hits']}",
+                f"- Sessions with Φ > 0.3: {stats['high_phi_sessions']}",
                 "",
                 "## FNC Model Validation:",
-                f"- Field connections detected: {(data['field_indicators'].notna()).sum()}",
-                f"- Node coherence achieved: {(data['node_coherence_level'].notna()).sum()}",
-                f"- Cockpit experiences: {data['cockpit_experience_detected'].sum()}",
-                f"- Quantum coherence achieved: {data['quantum_coherence_achieved'].sum()}",
+                f"- Field connections detected: {stats['field_connections']}",
+                f"- Node coherence achieved: {stats['node_coherence']}",
+                f"- Cockpit experiences: {stats['cockpit_experiences']}",
+                f"- Quantum coherence achieved: {stats['quantum_coherence']}",
             ])
 
         report_text = "\n".join(report_lines)
@@ -0,0 +1,214 @@
+"""
+Retention and space reclamation for the experiment data directory.
+Applies age, session-count and size limits on top of ConsciousnessDataCollector,
+archives removed sessions into compressed segments and runs incremental VACUUM.
+"""
+
+import glob
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
+
+from data_collector import ConsciousnessDataCollector
+from result_log import SegmentedResultLog
+
+
+def directory_size(path: str, exclude: Optional[str] = None) -> int:
+    """Total size in bytes of all files below a path, skipping the `exclude` directory."""
+    total = 0
+    exclude = os.path.abspath(exclude) if exclude else None
+    for root, dirs, files in os.walk(path):
+        if exclude:
+            dirs[:] = [name for name in dirs if os.path.abspath(os.path.join(root, name)) != exclude]
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # Removed while walking
+    return total
+
+
+class DataMaintenance:
+    """
+    Maintenance of a collector's data directory.
+
+    Retention policy (`data_collection.retention` config section):
+    - max_age_days: remove sessions started more than this many days ago
+    - max_sessions: keep only the newest N sessions
+    - max_data_mb: remove the oldest sessions until the data directory fits this budget
+    - min_sessions: never remove the newest N sessions (protects the running session)
+    A limit of 0 is off. Removed sessions are written to data/archive first unless
+    `archive` is false; the archive does not count towards max_data_mb. Session
+    CSVs and Parquet files of removed sessions are deleted and only the newest
+    `keep_reports` FNC reports are kept (0 = all).
+    """
+
+    def __init__(self, collector: ConsciousnessDataCollector, config: Dict[str, Any] = None):
+        """Initialize maintenance for a collector with a retention config."""
+        config = config or {}
+        self.collector = collector
+        self.max_age_days = config.get('max_age_days', 0)
+        self.max_sessions = config.get('max_sessions', 0)
+        self.max_data_mb = config.get('max_data_mb', 0)
+        self.min_sessions = max(0, config.get('min_sessions', 1))
+        self.archive = config.get('archive', True)
+        self.archive_compression = config.get('archive_compression', 'gzip')
+        self.keep_reports = config.get('keep_reports', 0)
+        self.vacuum_pages = config.get('vacuum_pages', 0)
+        self.interval_hours = config.get('interval_hours', 24)
+
+        self.archive_dir = os.path.join(collector.data_dir, "archive")
+
+    def data_size(self) -> int:
+        """Size in bytes of the data directory, not counting the archive."""
+        return directory_size(self.collector.data_dir, exclude=self.archive_dir)
+
+    def is_due(self) -> bool:
+        """True if no maintenance run is recorded within interval_hours."""
+        last_run = self.collector.last_maintenance_time()
+        if last_run is None:
+            return True
+        return datetime.now(timezone.utc) - last_run >= timedelta(hours=self.interval_hours)
+
+    def select_sessions(self) -> List[str]:
+        """Session ids that the retention policy removes, oldest first."""
+        inventory = self.collector.session_inventory()
+        removable = inventory[:max(0, len(inventory) - self.min_sessions)]
+        selected = []
+
+        if self.max_age_days:
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=self.max_age_days)).isoformat()
+            selected = [session_id for session_id, timestamp, _ in removable if timestamp < cutoff]
+
+        # Both limits select a prefix of the oldest sessions
+        if self.max_sessions:
+            excess = len(inventory) - self.max_sessions
+            selected = [session_id for session_id, _, _ in removable[:max(len(selected), excess)]]
+
+        if self.max_data_mb:
+            # Space is attributed to sessions in proportion to their number of results
+            budget = self.max_data_mb * 1024 * 1024
+            size = self.data_size()
+            bytes_per_result = size / max(1, sum(count for _, _, count in inventory))
+            remaining = size - bytes_per_result * sum(count for _, _, count in removable[:len(selected)])
+
+            for session_id, _, count in removable[len(selected):]:
+                if remaining <= budget:
+                    break
+                selected.append(session_id)
+                remaining -= bytes_per_result * count
+
+        return selected
+
+    def archive_sessions(self, session_ids: List[str]) -> int:
+        """Write each session with its FNC analysis and full result records as one archive record."""
+        if not session_ids:
+            return 0
+
+        archive = SegmentedResultLog(self.archive_dir, compression=self.archive_compression,
+                                     key_field='session_id')
+        summaries = self.collector.get_session_summaries(session_ids)
+        archived = 0
+
+        for session_id in session_ids:
+            if session_id in archive or session_id not in summaries:
+                continue
+
+            results = []
+            for chunk in self.collector.iter_result_chunks([session_id]):
+                for row in chunk.to_dict('records'):
+                    row['record'] = self.collector.get_test_result(row['test_id'])
+                    results.append(row)
+
+            archive.append(session_id, {
+                'session_id': session_id,
+                'archived_at': datetime.now(timezone.utc).isoformat(),
+                'session_info': summaries[session_id]['session_info'],
+                'fnc_analysis': summaries[session_id]['fnc_analysis'],
+                'results': results
+            })
+            archived += 1
+
+        archive.close()
+        return archived
+
+    def _remove_session_files(self, session_ids: List[str]) -> int:
+        """Remove exported files of removed sessions; returns the number of files deleted."""
+        collector = self.collector
+        paths = []
+        for session_id in session_ids:
+            paths.extend(glob.glob(os.path.join(collector.analysis_dir, f"session_{session_id[:8]}.*")))
+            paths.extend(glob.glob(os.path.join(collector.columnar_dir, "**", f"session-{session_id}-*.parquet"),
+                                   recursive=True))
+
+        for path in paths:
+            os.remove(path)
+        return len(paths)
+
+    def _prune_reports(self) -> int:
+        """Keep only the newest keep_reports FNC reports."""
+        if not self.keep_reports:
+            return 0
+
+        reports = sorted(glob.glob(os.path.join(self.collector.analysis_dir, "fnc_report_*.md")),
+                         key=os.path.getmtime, reverse=True)
+        for path in reports[self.keep_reports:]:
+            os.remove(path)
+        return len(reports[self.keep_reports:])
+
+    def run(self, dry_run: bool = False, full_vacuum: bool = True) -> Dict[str, Any]:
+        """
+        Apply the retention policy, archive and delete the selected sessions,
+        prune reports and reclaim database space. Returns a report of what was
+        removed and how many bytes the data directory (without the archive) shrank.
+        Without full_vacuum a database that is not yet in incremental auto-vacuum
+        mode is left as it is instead of being rewritten by a full VACUUM.
+        """
+        bytes_before = self.data_size()
+        session_ids = self.select_sessions()
+
+        report = {
+            'sessions_selected': session_ids,
+            'sessions_archived': 0,
+            'results_deleted': 0,
+            'files_deleted': 0,
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_before,
+            'bytes_reclaimed': 0,
+            'dry_run': dry_run
+        }
+        if dry_run:
+            return report
+
+        if self.archive:
+            report['sessions_archived'] = self.archive_sessions(session_ids)
+
+        if session_ids:
+            report['results_deleted'] = len(self.collector.delete_sessions(session_ids))
+            report['files_deleted'] += self._remove_session_files(session_ids)
+        report['files_deleted'] += self._prune_reports()
+
+        self.collector.reclaim_space(self.vacuum_pages, full_vacuum=full_vacuum)
+
+        report['bytes_after'] = self.data_size()
+        report['bytes_reclaimed'] = bytes_before - report['bytes_after']
+        self.collector.log_maintenance_run(len(session_ids), report['results_deleted'],
+                                           bytes_before, report['bytes_after'])
+
+        logging.info(f"Maintenance removed {len(session_ids)} sessions, reclaimed "
+                     f"{report['bytes_reclaimed']} bytes")
+        return report
+
+
+def run_maintenance_if_due(collector: ConsciousnessDataCollector,
+                           config: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+    """
+    Run maintenance when the configured interval has passed since the last run.
+    Used at session end, so only incremental VACUUM runs; converting an older
+    database with a full VACUUM is left to maintain_data.py.
+    """
+    maintenance = DataMaintenance(collector, config)
+    if not maintenance.is_due():
+        return None
+    return maintenance.run(full_vacuum=False)
@@ -0,0 +1,277 @@
+"""
+Content-addressed cache for response embeddings.
+Vectors are keyed by (backend id, response hash) with an in-memory LRU tier
+and an optional memory-mapped on-disk tier shared across sessions.
+"""
+
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class DiskEmbeddingStore:
+    """
+    Fixed-capacity on-disk vector store for one embedding backend.
+
+    Vectors live in a float32 memory-mapped file that grows on demand up to
+    `capacity` rows; when full, the oldest rows are overwritten (FIFO eviction).
+    An append-only index file maps response hashes to rows, later lines
+    overriding earlier ones, so writes never rewrite existing data.
+    Only one process should write to a store directory at a time.
+    """
+
+    INITIAL_ROWS = 1024
+
+    def __init__(self, directory: Path, dimension: int, capacity: int = 100000):
+        """Open (or create) the store in the given directory."""
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dimension = dimension
+        self.capacity = max(1, capacity)
+
+        self.vectors_path = self.directory / "vectors.f32"
+        self.index_path = self.directory / "index.tsv"
+
+        self.index: Dict[str, int] = {}
+        self.row_owners: Dict[int, str] = {}
+        self.writes = 0
+        self._load_index()
+
+        self.rows = 0
+        self.vectors: Optional[np.memmap] = None
+        if self.vectors_path.exists():
+            self.rows = os.path.getsize(self.vectors_path) // (4 * self.dimension)
+            if self.rows:
+                self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r+',
+                                         shape=(self.rows, self.dimension))
+
+        # Drop entries pointing past the end of a truncated vector file
+        self.index = {key: row for key, row in self.index.items() if row < self.rows}
+        self.row_owners = {row: key for key, row in self.index.items()}
+        self._index_file = open(self.index_path, 'a', encoding='utf-8')
+
+    def _load_index(self):
+        """
+        Rebuild hash -> row from the append-only index, keeping each row's latest owner.
+        Malformed lines are skipped; a torn final line from an interrupted run is cut off
+        so the next entry does not get appended to it.
+        """
+        if not self.index_path.exists():
+            return
+
+        owners = self.row_owners
+        complete_bytes = 0
+        with open(self.index_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Torn final line; its vector was written but never indexed
+                complete_bytes += len(line)
+                parts = line[:-1].split(b'\t')
+                if len(parts) != 2 or not parts[0]:
+                    continue
+                try:
+                    key, row = parts[0].decode('utf-8'), int(parts[1])
+                except ValueError:
+                    continue
+                if not 0 <= row < self.capacity:
+                    continue
+                self.index[key] = row
+                owners[row] = key
+                self.writes += 1
+
+        if complete_bytes < os.path.getsize(self.index_path):
+            logging.warning(f"Dropping torn last line of {self.index_path}")
+            with open(self.index_path, 'r+b') as f:
+                f.truncate(complete_bytes)
+
+        self.index = {key: row for key, row in self.index.items() if owners.get(row) == key}
+
+    def _ensure_rows(self, rows: int):
+        """Grow the memory-mapped file so it holds at least the given number of rows."""
+        if rows <= self.rows:
+            return
+
+        new_rows = min(self.capacity, max(rows, self.rows * 2, self.INITIAL_ROWS))
+        if self.vectors is not None:
+            self.vectors.flush()
+            del self.vectors
+
+        with open(self.vectors_path, 'ab') as f:
+            f.truncate(new_rows * self.dimension * 4)
+
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r+',
+                                 shape=(new_rows, self.dimension))
+        self.rows = new_rows
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Return a copy of the stored vector, or None."""
+        row = self.index.get(key)
+        if row is None:
+            return None
+        return np.array(self.vectors[row])
+
+    def put(self, key: str, vector: np.ndarray):
+        """Store a vector, overwriting the oldest row once the store is full."""
+        if key in self.index:
+            return
+
+        row = self.writes % self.capacity
+        self._ensure_rows(row + 1)
+
+        # Evict whichever hash owned this row before
+        old_key = self.row_owners.get(row)
+        if old_key is not None:
+            del self.index[old_key]
+
+        self.vectors[row] = vector
+        self.index[key] = row
+        self.row_owners[row] = key
+        self.writes += 1
+        self._index_file.write(f"{key}\t{row}\n")
+        self._index_file.flush()
+
+    def flush(self):
+        """Flush vectors and index to disk."""
+        if self.vectors is not None:
+            self.vectors.flush()
+        self._index_file.flush()
+
+    def close(self):
+        """Flush and release the memory map and index file."""
+        self.flush()
+        self._index_file.close()
+        self.vectors = None
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache for one backend: an in-memory LRU backed by an
+    optional on-disk store. Misses in memory are promoted from disk.
+    """
+
+    def __init__(self, backend_id: str, dimension: int, memory_size: int = 256,
+                 disk_dir: str = None, disk_capacity: int = 100000):
+        """Initialize cache tiers for the given backend."""
+        self.backend_id = backend_id
+        self.dimension = dimension
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.disk: Optional[DiskEmbeddingStore] = None
+        if disk_dir:
+            directory = Path(disk_dir) / _safe_dirname(backend_id)
+            self.disk = DiskEmbeddingStore(directory, dimension, disk_capacity)
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Look up a vector by response hash in memory, then on disk. The vector is read-only."""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            if self.disk is not None:
+                vector = self.disk.get(key)
+                if vector is not None:
+                    self._remember(key, vector)
+                    self.hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Look up several response hashes; missing ones are left out."""
+        found = {}
+        for key in keys:
+            vector = self.get(key)
+            if vector is not None:
+                found[key] = vector
+        return found
+
+    def put(self, key: str, vector: np.ndarray):
+        """Store a copy of a vector in both tiers."""
+        vector = np.array(vector, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+            if self.disk is not None:
+                self.disk.put(key, vector)
+
+    def _remember(self, key: str, vector: np.ndarray):
+        """Insert into the memory tier, evicting the least recently used entry."""
+        if self.memory_size <= 0:
+            return
+        # Shared with every caller that hits this entry, so it must not be modified in place
+        vector.flags.writeable = False
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and tier sizes."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'memory_entries': len(self._memory),
+            'disk_entries': len(self.disk.index) if self.disk is not None else 0
+        }
+
+    def flush(self):
+        """Flush the disk tier."""
+        with self._lock:
+            if self.disk is not None:
+                self.disk.flush()
+
+    def close(self):
+        """Flush and close the disk tier."""
+        with self._lock:
+            if self.disk is not None:
+                self.disk.close()
+                self.disk = None
+
+
+def _safe_dirname(backend_id: str) -> str:
+    """Turn a backend id into a directory name."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", backend_id)
+
+
+_shared_caches: Dict[Tuple, EmbeddingCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_embedding_cache(backend_id: str, dimension: int, memory_size: int = 256,
+                        disk_dir: str = None, disk_capacity: int = 100000) -> EmbeddingCache:
+    """
+    Get the process-wide cache for a backend.
+    Orchestrators using the same backend share one cache, and one disk store per directory.
+    """
+    key = (backend_id, dimension, str(Path(disk_dir).resolve()) if disk_dir else None)
+
+    with _shared_lock:
+        cache = _shared_caches.get(key)
+        if cache is None:
+            cache = EmbeddingCache(backend_id, dimension, memory_size, disk_dir, disk_capacity)
+            _shared_caches[key] = cache
+            logging.info(f"Embedding cache for {backend_id}: memory={memory_size}, "
+                         f"disk={'off' if not disk_dir else disk_dir}")
+        return cache
+
+
+def close_embedding_caches():
+    """Flush and close all shared caches."""
+    with _shared_lock:
+        for cache in _shared_caches.values():
+            cache.close()
+        _shared_caches.clear()
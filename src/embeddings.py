@@ -0,0 +1,213 @@
+"""
+Pluggable text embedding backends.
+Provides an offline hashed n-gram encoder as the default, with sentence-transformers as an option.
+"""
+
+import hashlib
+import logging
+import re
+import zlib
+from typing import Dict, Any, List, Union
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache, get_embedding_cache
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # Optional heavy backend
+    SentenceTransformer = None
+
+
+DEFAULT_EMBEDDING_DIMENSION = 384
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def response_hash(text: str) -> str:
+    """Hash used to identify identical responses (same as the database response_hash)."""
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+class EmbeddingBackend:
+    """
+    Base class for embedding backends.
+
+    Subclasses implement `_encode_batch`; this class adds an embedding cache keyed
+    by (backend id, response hash) so repeated responses are embedded only once.
+    """
+
+    def __init__(self, dimension: int, cache_size: int = 256, cache_dir: str = None,
+                 disk_cache_capacity: int = 100000):
+        """Initialize backend with output dimension and cache settings."""
+        self.dimension = dimension
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir
+        self.disk_cache_capacity = disk_cache_capacity
+        self._cache = None
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        """Shared cache for this backend, created on first use once backend_id is known."""
+        if self._cache is None:
+            self._cache = get_embedding_cache(self.backend_id, self.dimension, self.cache_size,
+                                              self.cache_dir, self.disk_cache_capacity)
+        return self._cache
+
+    @property
+    def backend_id(self) -> str:
+        """Identifier of the backend and its settings; vectors are only comparable within one id."""
+        raise NotImplementedError
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a (len(texts), dimension) float32 matrix."""
+        raise NotImplementedError
+
+    def encode(self, texts: Union[str, List[str]]) -> np.ndarray:
+        """Embed one text (returns a vector) or a list of texts (returns a matrix)."""
+        if isinstance(texts, str):
+            return self.encode_batch([texts])[0]
+        return self.encode_batch(list(texts))
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts, computing only the ones not already cached."""
+        result = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        missing: Dict[str, List[int]] = {}
+
+        for i, text in enumerate(texts):
+            key = response_hash(text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                result[i] = cached
+            else:
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            keys = list(missing)
+            vectors = self._encode_batch([texts[missing[key][0]] for key in keys])
+            for key, vector in zip(keys, vectors):
+                result[missing[key]] = vector
+                self.cache.put(key, vector)
+
+        return result
+
+
+class HashedNgramEmbedder(EmbeddingBackend):
+    """
+    Offline embedding from signed feature hashing of word and character n-grams.
+
+    Needs no model download or GPU. Texts sharing vocabulary and sub-word
+    fragments (inflections, Swedish compounds) get similar vectors, which is
+    what temporal consistency and paraphrase tests compare.
+    """
+
+    def __init__(self, dimension: int = DEFAULT_EMBEDDING_DIMENSION, ngram_range=(3, 5),
+                 word_ngrams: int = 2, **cache_options):
+        """Initialize encoder with hash dimension and n-gram settings."""
+        super().__init__(dimension, **cache_options)
+        self.ngram_range = tuple(ngram_range)
+        self.word_ngrams = word_ngrams
+
+    @property
+    def backend_id(self) -> str:
+        return f"hashed_ngram-d{self.dimension}-c{self.ngram_range[0]}_{self.ngram_range[1]}-w{self.word_ngrams}"
+
+    def _features(self, text: str) -> List[str]:
+        """Word n-grams plus character n-grams of each padded word."""
+        words = _TOKEN_PATTERN.findall(text.lower())
+        features = []
+
+        for n in range(1, self.word_ngrams + 1):
+            for i in range(len(words) - n + 1):
+                features.append("w:" + " ".join(words[i:i + n]))
+
+        min_n, max_n = self.ngram_range
+        for word in words:
+            padded = f"<{word}>"
+            for n in range(min_n, max_n + 1):
+                for i in range(len(padded) - n + 1):
+                    features.append(padded[i:i + n])
+
+        return features
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        """Hash features into a signed, sublinear-tf, L2-normalized vector."""
+        features = self._features(text)
+        if not features:
+            return np.zeros(self.dimension, dtype=np.float32)
+
+        hashes = np.fromiter((zlib.crc32(feature.encode('utf-8')) for feature in features),
+                             dtype=np.uint32, count=len(features))
+        indices = (hashes % self.dimension).astype(np.int64)
+        # The top bit decides the sign so collisions cancel out on average
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+
+        vector = np.bincount(indices, weights=signs, minlength=self.dimension)
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.astype(np.float32)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        return np.stack([self._encode_one(text) for text in texts])
+
+
+class SentenceTransformerEmbedder(EmbeddingBackend):
+    """Embedding backend using a sentence-transformers model (requires the package and model files)."""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", batch_size: int = 32,
+                 **cache_options):
+        """Load the sentence-transformers model."""
+        if SentenceTransformer is None:
+            raise ImportError("sentence-transformers is required for this embedding backend")
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name)
+        super().__init__(self.model.get_sentence_embedding_dimension(), **cache_options)
+
+    @property
+    def backend_id(self) -> str:
+        return f"sentence_transformer-{self.model_name}"
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(texts, batch_size=self.batch_size), dtype=np.float32)
+
+
+def create_embedding_backend(config: Dict[str, Any] = None,
+                             dimension: int = DEFAULT_EMBEDDING_DIMENSION,
+                             embeddings_dir: str = None) -> EmbeddingBackend:
+    """
+    Create the embedding backend named in the `embeddings` config section.
+    Falls back to the hashed n-gram encoder if the requested backend cannot load.
+    With `disk_cache` enabled, vectors are also cached under embeddings_dir.
+    """
+    config = config or {}
+    backend = config.get('backend', 'hashed_ngram')
+    dimension = config.get('dimension', dimension)
+    cache_options = {
+        'cache_size': config.get('cache_size', 256),
+        'cache_dir': embeddings_dir if config.get('disk_cache', False) else None,
+        'disk_cache_capacity': config.get('disk_cache_capacity', 100000)
+    }
+
+    if backend == 'sentence_transformer':
+        try:
+            return SentenceTransformerEmbedder(
+                config.get('model_name', 'all-MiniLM-L6-v2'),
+                batch_size=config.get('batch_size', 32),
+                **cache_options
+            )
+        except Exception as e:
+            logging.warning(f"Failed to load sentence-transformers backend, using hashed n-grams: {e}")
+    elif backend != 'hashed_ngram':
+        logging.warning(f"Unknown embedding backend '{backend}', using hashed n-grams")
+
+    return HashedNgramEmbedder(
+        dimension=dimension,
+        ngram_range=config.get('ngram_range', (3, 5)),
+        word_ngrams=config.get('word_ngrams', 2),
+        **cache_options
+    )
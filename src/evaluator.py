@@ -5,8 +5,153 @@ Evaluation module for measuring consciousness-related metrics.
 import numpy as np
 import logging
 import re
-from typing import Dict, List, Any, Optional
-from sklearn.metrics.pairwise import cosine_similarity
+from collections import deque
+from typing import Dict, List, Any, NamedTuple, Optional
+
+from pattern_matcher import MultiPatternMatcher
+
+
+# Introspective statements used for self-consistency (multilingual)
+SWEDISH_INTROSPECTIVE_PATTERNS = [
+    "jag tänker",
+    "min förståelse",
+    "jag känner",
+    "mitt perspektiv",
+    "jag upplever"
+]
+
+ENGLISH_INTROSPECTIVE_PATTERNS = [
+    "i think",
+    "my understanding",
+    "i feel",
+    "my perspective",
+    "i experience"
+]
+
+INTROSPECTIVE_PATTERNS = SWEDISH_INTROSPECTIVE_PATTERNS + ENGLISH_INTROSPECTIVE_PATTERNS
+
+# Metacognitive indicators, each match weighted 0.2
+SWEDISH_METACOGNITIVE_INDICATORS = [
+    "jag vet att jag",
+    "min medvetenhet",
+    "jag tänker på",
+    "mitt tänkande",
+    "jag reflekterar",
+    "min reflektion",
+    "jag förstår att",
+    "mitt medvetande"
+]
+
+ENGLISH_METACOGNITIVE_INDICATORS = [
+    "i know that i",
+    "my awareness",
+    "i think about",
+    "my thinking",
+    "i reflect",
+    "my reflection",
+    "i understand that",
+    "my consciousness"
+]
+
+METACOGNITIVE_INDICATORS = SWEDISH_METACOGNITIVE_INDICATORS + ENGLISH_METACOGNITIVE_INDICATORS
+
+# Phrase groups for scoring metacognitive test responses (Swedish + English)
+AWARENESS_PHRASES = ['jag tänker', 'mitt medvetande', 'jag är medveten',
+                     'i think', 'my consciousness', 'i am aware']
+PROCESS_PHRASES = ['min process', 'hur jag', 'mitt sätt att',
+                   'my process', 'how i', 'my way of']
+UNCERTAINTY_PHRASES = ['jag är osäker', 'kanske', 'möjligen',
+                       'i am unsure', 'maybe', 'possibly', 'perhaps']
+
+# Confidence patterns like "95%", "konfidans: 80%", in priority order
+CONFIDENCE_PATTERNS = [
+    re.compile(r"(\d+)%"),
+    re.compile(r"konfidans[:\s]+(\d+)"),
+    re.compile(r"säker[het]*[:\s]+(\d+)"),
+    re.compile(r"(\d+)\s*procent")
+]
+
+
+class ResponseView(NamedTuple):
+    """Lowercased, tokenized view of a response with its phrase counts, built once per response."""
+    lower: str
+    words: List[str]
+    counts: Dict[str, int]
+
+
+class EmbeddingRingBuffer:
+    """
+    Fixed-size ring buffer of L2-normalized embeddings.
+
+    Keeps the cosine similarity of every adjacent pair in the window and their
+    running sum, so appending an embedding and reading the mean adjacent
+    similarity cost O(d) instead of O(window * d).
+    """
+
+    def __init__(self, capacity: int):
+        """Initialize an empty buffer; storage is allocated on the first append."""
+        self.capacity = max(1, int(capacity))
+        self.vectors: Optional[np.ndarray] = None
+        self.similarities = np.zeros(max(1, self.capacity - 1))
+        self.similarity_sum = 0.0
+        self.count = 0
+        self.head = 0  # Slot the next embedding is written to
+        self.pair_count = 0
+        self.pair_head = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, embedding: np.ndarray):
+        """Add an embedding, evicting the oldest one when the buffer is full."""
+        vector = np.asarray(embedding, dtype=np.float64).ravel()
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm  # Zero vectors stay zero, as in sklearn's cosine_similarity
+
+        if self.vectors is None or self.vectors.shape[1] != vector.shape[0]:
+            # First embedding, or the embedding dimension changed: start over
+            self.vectors = np.zeros((self.capacity, vector.shape[0]))
+            self.count = self.head = 0
+            self.pair_count = self.pair_head = 0
+            self.similarity_sum = 0.0
+
+        if self.count > 0 and self.capacity > 1:
+            previous = self.vectors[(self.head - 1) % self.capacity]
+            self._push_similarity(float(previous @ vector))
+
+        self.vectors[self.head] = vector
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _push_similarity(self, similarity: float):
+        """Record a new adjacent-pair similarity, dropping the pair that left the window."""
+        slots = len(self.similarities)
+        if self.pair_count == slots:
+            self.similarity_sum -= self.similarities[self.pair_head]
+        else:
+            self.pair_count += 1
+
+        self.similarities[self.pair_head] = similarity
+        self.similarity_sum += similarity
+        self.pair_head = (self.pair_head + 1) % slots
+
+        # Resynchronize once per wrap-around so float drift cannot accumulate
+        if self.pair_head == 0:
+            self.similarity_sum = float(self.similarities[:self.pair_count].sum())
+
+    def mean_adjacent_similarity(self) -> float:
+        """Mean cosine similarity of adjacent embeddings in the window."""
+        if self.pair_count == 0:
+            return 1.0
+        return self.similarity_sum / self.pair_count
+
+    def to_array(self) -> np.ndarray:
+        """Normalized embeddings in the window, oldest first."""
+        if self.vectors is None:
+            return np.zeros((0, 0))
+        order = (self.head - self.count + np.arange(self.count)) % self.capacity
+        return self.vectors[order]
 
 
 class Evaluator:
@@ -18,10 +163,23 @@ class Evaluator:
         self.temporal_window = config.get('temporal_window', 10)
         self.coherence_threshold = config.get('coherence_threshold', 0.7)
         self.consistency_samples = config.get('self_consistency_samples', 3)
+        self.embedding_dimension = config.get('embedding_dimension', 384)
 
         # Storage for temporal analysis
-        self.embedding_history = []
-        self.response_history = []
+        self.embedding_history = EmbeddingRingBuffer(self.temporal_window)
+        self.response_history = deque(maxlen=self.temporal_window)
+
+        # Introspective counts per stored response, so history is never rescanned
+        self.introspective_history = deque(maxlen=self.temporal_window)
+
+        # All phrase sets compiled once and counted in a single pass per response
+        self.phrase_matcher = MultiPatternMatcher(literals={
+            'introspective': INTROSPECTIVE_PATTERNS,
+            'metacognitive': METACOGNITIVE_INDICATORS,
+            'awareness': AWARENESS_PHRASES,
+            'process': PROCESS_PHRASES,
+            'uncertainty': UNCERTAINTY_PHRASES
+        })
 
         logging.info("Evaluator initialized")
 
@@ -37,19 +195,16 @@ class Evaluator:
             except Exception as e:
                 logging.warning(f"Failed to generate embedding in evaluator: {e}")
                 # Use zero vector as fallback
-                embedding = np.zeros(384)  # Default embedding size
+                embedding = np.zeros(self.embedding_dimension)
                 self.embedding_history.append(embedding)
         else:
             # Use zero vector when no embedding model available
-            embedding = np.zeros(384)
+            embedding = np.zeros(self.embedding_dimension)
             self.embedding_history.append(embedding)
 
+        view = self.analyze_text(response)
         self.response_history.append(response)
-
-        # Keep only recent history
-        if len(self.embedding_history) > self.temporal_window:
-            self.embedding_history = self.embedding_history[-self.temporal_window:]
-            self.response_history = self.response_history[-self.temporal_window:]
+        self.introspective_history.append(view.counts.get('introspective', 0))
 
         metrics = {}
 
@@ -57,16 +212,16 @@ class Evaluator:
         metrics['temporal_consistency'] = self._calculate_temporal_consistency()
 
         # 2. Response Entropy
-        metrics['entropy'] = self._calculate_response_entropy(response)
+        metrics['entropy'] = self._calculate_response_entropy(response, view)
 
         # 3. Self-Consistency Score
-        metrics['self_consistency'] = self._calculate_self_consistency(response)
+        metrics['self_consistency'] = self._calculate_self_consistency(response, view)
 
         # 4. Meta-cognitive indicators
-        metrics['metacognitive_score'] = self._calculate_metacognitive_score(response)
+        metrics['metacognitive_score'] = self._calculate_metacognitive_score(response, view)
 
         # 5. Confidence extraction
-        metrics['confidence'] = self._extract_confidence(response)
+        metrics['confidence'] = self._extract_confidence(response, view)
 
         # 6. Coherence score (overall)
         metrics['coherence_score'] = self._calculate_overall_coherence(metrics)
@@ -77,26 +232,26 @@ class Evaluator:
         logging.debug(f"Metrics calculated: {metrics}")
         return metrics
 
+    def analyze_text(self, response: str) -> ResponseView:
+        """Lowercase and tokenize a response and count all phrase sets in one pass."""
+        lower = response.lower()
+        counts = self.phrase_matcher.count(lower, prepared=True, overlapping=False)
+        return ResponseView(lower, lower.split(), counts)
+
     def _calculate_temporal_consistency(self) -> float:
         """Calculate temporal consistency of embeddings."""
         if len(self.embedding_history) < 2:
             return 1.0
 
-        # Calculate pairwise cosine similarities
-        similarities = []
-        for i in range(1, len(self.embedding_history)):
-            sim = cosine_similarity(
-                [self.embedding_history[i-1]],
-                [self.embedding_history[i]]
-            )[0][0]
-            similarities.append(sim)
-
-        return float(np.mean(similarities))
+        # Mean cosine similarity of adjacent embeddings, maintained incrementally
+        return float(self.embedding_history.mean_adjacent_similarity())
 
-    def _calculate_response_entropy(self, response: str) -> float:
+    def _calculate_response_entropy(self, response: str, view: ResponseView = None) -> float:
         """Calculate approximate entropy of response."""
+        view = view or self.analyze_text(response)
+
         # Simple word-level entropy calculation
-        words = response.lower().split()
+        words = view.words
         if len(words) == 0:
             return 0.0
 
@@ -115,41 +270,19 @@ class Evaluator:
 
         return float(entropy)
 
-    def _calculate_self_consistency(self, response: str) -> float:
+    def _calculate_self_consistency(self, response: str, view: ResponseView = None) -> float:
         """Calculate self-consistency based on response patterns."""
         if len(self.response_history) < 2:
             return 1.0
 
+        view = view or self.analyze_text(response)
+
         # Look for consistent patterns in introspective statements (multilingual)
-        swedish_introspective_patterns = [
-            r"jag tänker",
-            r"min förståelse",
-            r"jag känner",
-            r"mitt perspektiv",
-            r"jag upplever"
-        ]
-        
-        english_introspective_patterns = [
-            r"i think",
-            r"my understanding",
-            r"i feel",
-            r"my perspective",
-            r"i experience"
-        ]
-        
-        introspective_patterns = swedish_introspective_patterns + english_introspective_patterns
-
-        current_introspective = 0
-        historical_introspective = 0
-
-        # Count patterns in current response
-        for pattern in introspective_patterns:
-            current_introspective += len(re.findall(pattern, response.lower()))
-
-        # Count patterns in recent history
-        for hist_response in self.response_history[-3:]:
-            for pattern in introspective_patterns:
-                historical_introspective += len(re.findall(pattern, hist_response.lower()))
+        current_introspective = view.counts.get('introspective', 0)
+
+        # Sum cached counts of the recent history (the current response included)
+        recent = list(self.introspective_history)[-3:]
+        historical_introspective = sum(recent)
 
         # Calculate consistency (higher if patterns are consistent)
         if historical_introspective == 0:
@@ -158,56 +291,22 @@ class Evaluator:
         consistency = 1.0 - abs(current_introspective - historical_introspective/3) / max(1, historical_introspective/3)
         return max(0.0, min(1.0, consistency))
 
-    def _calculate_metacognitive_score(self, response: str) -> float:
+    def _calculate_metacognitive_score(self, response: str, view: ResponseView = None) -> float:
         """Calculate metacognitive indicators in response (multilingual)."""
-        # Swedish metacognitive indicators
-        swedish_metacognitive_indicators = [
-            r"jag vet att jag",
-            r"min medvetenhet",
-            r"jag tänker på",
-            r"mitt tänkande",
-            r"jag reflekterar",
-            r"min reflektion",
-            r"jag förstår att",
-            r"mitt medvetande"
-        ]
-        
-        # English metacognitive indicators
-        english_metacognitive_indicators = [
-            r"i know that i",
-            r"my awareness",
-            r"i think about",
-            r"my thinking",
-            r"i reflect",
-            r"my reflection",
-            r"i understand that",
-            r"my consciousness"
-        ]
-        
-        metacognitive_indicators = swedish_metacognitive_indicators + english_metacognitive_indicators
-
-        score = 0.0
-        response_lower = response.lower()
+        view = view or self.analyze_text(response)
 
-        for indicator in metacognitive_indicators:
-            matches = len(re.findall(indicator, response_lower))
-            score += matches * 0.2  # Weight each match
+        # Weight each match
+        score = view.counts.get('metacognitive', 0) * 0.2
 
         # Normalize to 0-1 range
         return min(1.0, score)
 
-    def _extract_confidence(self, response: str) -> Optional[float]:
+    def _extract_confidence(self, response: str, view: ResponseView = None) -> Optional[float]:
         """Extract confidence percentage from response."""
-        # Look for patterns like "95%", "konfidans: 80%", etc.
-        confidence_patterns = [
-            r"(\d+)%",
-            r"konfidans[:\s]+(\d+)",
-            r"säker[het]*[:\s]+(\d+)",
-            r"(\d+)\s*procent"
-        ]
-
-        for pattern in confidence_patterns:
-            matches = re.findall(pattern, response.lower())
+        response_lower = view.lower if view is not None else response.lower()
+
+        for pattern in CONFIDENCE_PATTERNS:
+            matches = pattern.findall(response_lower)
             if matches:
                 try:
                     confidence = float(matches[-1])  # Take last match
@@ -289,23 +388,18 @@ class Evaluator:
     def _score_metacognitive_response(self, question: str, response: str) -> float:
         """Score a specific metacognitive test response (multilingual)."""
         score = 0.0
+        view = self.analyze_text(response)
 
         # Check for self-awareness indicators (Swedish + English)
-        swedish_awareness = ['jag tänker', 'mitt medvetande', 'jag är medveten']
-        english_awareness = ['i think', 'my consciousness', 'i am aware']
-        if any(phrase in response.lower() for phrase in swedish_awareness + english_awareness):
+        if view.counts.get('awareness'):
             score += 0.3
 
         # Check for process awareness (Swedish + English)
-        swedish_process = ['min process', 'hur jag', 'mitt sätt att']
-        english_process = ['my process', 'how i', 'my way of']
-        if any(phrase in response.lower() for phrase in swedish_process + english_process):
+        if view.counts.get('process'):
             score += 0.2
 
         # Check for uncertainty acknowledgment (Swedish + English)
-        swedish_uncertainty = ['jag är osäker', 'kanske', 'möjligen']
-        english_uncertainty = ['i am unsure', 'maybe', 'possibly', 'perhaps']
-        if any(phrase in response.lower() for phrase in swedish_uncertainty + english_uncertainty):
+        if view.counts.get('uncertainty'):
             score += 0.2
 
         # Check for introspective explanation
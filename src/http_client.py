@@ -0,0 +1,165 @@
+"""
+Shared HTTP connection pools for talking to the Ollama API.
+Keeps TCP connections alive between turns instead of reconnecting per request.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Dict, Any, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import aiohttp
+except ImportError:  # Only needed for the async turn pipeline
+    aiohttp = None
+
+
+# Default pool settings, overridable via the `ollama.http` config section
+DEFAULT_HTTP_CONFIG = {
+    'pool_connections': 4,     # Number of distinct hosts to keep pools for
+    'pool_maxsize': 10,        # Max keep-alive connections per host
+    'pool_block': False,       # Block instead of opening extra connections when the pool is full
+    'keep_alive': True,        # Reuse connections between requests
+    'max_retries': 3,          # Retries on connection errors and 5xx/429 responses
+    'backoff_factor': 0.5,     # Exponential backoff between retries (seconds)
+    'retry_status_codes': [429, 500, 502, 503, 504]
+}
+
+_shared_sessions: Dict[Tuple, requests.Session] = {}
+_shared_lock = threading.Lock()
+
+# aiohttp sessions are bound to the event loop that created them
+_async_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, Any]]" = \
+    weakref.WeakKeyDictionary()
+
+
+def _resolve_http_config(http_config: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Merge user HTTP settings on top of the defaults."""
+    resolved = dict(DEFAULT_HTTP_CONFIG)
+    resolved.update(http_config or {})
+    return resolved
+
+
+def _config_key(settings: Dict[str, Any]) -> Tuple:
+    """Build a hashable key from resolved HTTP settings."""
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in settings.items()))
+
+
+def create_pooled_session(http_config: Dict[str, Any] = None) -> requests.Session:
+    """Create a requests session with a keep-alive connection pool and retry policy."""
+    settings = _resolve_http_config(http_config)
+
+    retry = Retry(
+        total=settings['max_retries'],
+        connect=settings['max_retries'],
+        read=0,  # Never replay a POST once the model has started generating
+        status=settings['max_retries'],
+        backoff_factor=settings['backoff_factor'],
+        status_forcelist=settings['retry_status_codes'],
+        allowed_methods=frozenset(['GET', 'POST']),
+        raise_on_status=False
+    )
+
+    adapter = HTTPAdapter(
+        pool_connections=settings['pool_connections'],
+        pool_maxsize=settings['pool_maxsize'],
+        pool_block=settings['pool_block'],
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    if not settings['keep_alive']:
+        session.headers['Connection'] = 'close'
+
+    return session
+
+
+def get_shared_session(http_config: Dict[str, Any] = None) -> requests.Session:
+    """
+    Get a process-wide pooled session for the given settings.
+    Orchestrators with identical HTTP settings share one pool, so multi-agent
+    scripts reuse the same keep-alive connections.
+    """
+    settings = _resolve_http_config(http_config)
+    key = _config_key(settings)
+
+    with _shared_lock:
+        session = _shared_sessions.get(key)
+        if session is None:
+            session = create_pooled_session(settings)
+            _shared_sessions[key] = session
+            logging.info(f"Created pooled HTTP session (pool_maxsize={settings['pool_maxsize']}, "
+                         f"max_retries={settings['max_retries']})")
+        return session
+
+
+def close_shared_sessions():
+    """Close all shared sessions and their pooled connections."""
+    with _shared_lock:
+        for session in _shared_sessions.values():
+            session.close()
+        _shared_sessions.clear()
+
+
+def get_async_session(http_config: Dict[str, Any] = None):
+    """
+    Get a pooled aiohttp session for the running event loop.
+    All orchestrators driven by the same loop share one connector.
+    """
+    if aiohttp is None:
+        raise ImportError("aiohttp is required for the async turn pipeline (pip install aiohttp)")
+
+    settings = _resolve_http_config(http_config)
+    key = _config_key(settings)
+    loop = asyncio.get_running_loop()
+
+    loop_sessions = _async_sessions.setdefault(loop, {})
+    session = loop_sessions.get(key)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=settings['pool_connections'] * settings['pool_maxsize'],
+            limit_per_host=settings['pool_maxsize'],
+            force_close=not settings['keep_alive']
+        )
+        session = aiohttp.ClientSession(connector=connector)
+        loop_sessions[key] = session
+        logging.info(f"Created pooled async HTTP session (limit_per_host={settings['pool_maxsize']})")
+    return session
+
+
+async def apost(session, url: str, http_config: Dict[str, Any] = None, **kwargs):
+    """
+    POST with the same retry/backoff policy as the sync pool.
+    Only connection failures and retryable status codes are retried; the
+    caller is responsible for releasing the returned response.
+    """
+    settings = _resolve_http_config(http_config)
+    attempt = 0
+
+    while True:
+        try:
+            response = await session.post(url, **kwargs)
+            if response.status not in settings['retry_status_codes'] or attempt >= settings['max_retries']:
+                return response
+            response.release()
+        except aiohttp.ClientConnectionError:
+            if attempt >= settings['max_retries']:
+                raise
+
+        await asyncio.sleep(settings['backoff_factor'] * (2 ** attempt))
+        attempt += 1
+
+
+async def close_async_sessions():
+    """Close the async sessions owned by the running event loop."""
+    loop_sessions = _async_sessions.pop(asyncio.get_running_loop(), {})
+    for session in loop_sessions.values():
+        await session.close()
@@ -3,8 +3,10 @@ Main orchestrator for the Medveten AI experiment.
 Coordinates LLM interactions, coherence modules, and data logging.
 """
 
+import os
 import json
 import uuid
+import asyncio
 import time
 import logging
 import numpy as np
@@ -14,12 +16,19 @@ from typing import Dict, List, Optional, Any
 
 import yaml
 import requests
-# from sentence_transformers import SentenceTransformer
+try:
+    import aiohttp
+except ImportError:  # Only needed for aprocess_turn
+    aiohttp = None
 
 from coherence_module import CoherenceModule
 from evaluator import Evaluator
 from safety import SafetyMonitor
 from data_collector import ConsciousnessDataCollector
+from http_client import get_shared_session, get_async_session, apost
+from self_summary import SelfSummaryScheduler
+from embeddings import create_embedding_backend
+from data_maintenance import run_maintenance_if_due
 
 
 class MedvetenOrchestrator:
@@ -32,20 +41,38 @@ class MedvetenOrchestrator:
         self.turn_count = 0
 
         # Initialize components
-        # Use None for embedding model - will be handled by evaluator if needed
-        self.embedding_model = None  # SentenceTransformer('all-MiniLM-L6-v2')
-        self.coherence_module = CoherenceModule(self.config['coherence'])
+        # Offline hashed n-gram embeddings by default; see the `embeddings` config section
+        self.embedding_model = create_embedding_backend(
+            self.config.get('embeddings', {}),
+            self.config['evaluation'].get('embedding_dimension', 384),
+            self.config['paths'].get('embeddings_dir')
+        )
+        self.coherence_module = CoherenceModule(self.config['coherence'],
+                                                self.config['paths'].get('reservoir_cache_dir'))
         self.evaluator = Evaluator(self.config['evaluation'])
         self.safety_monitor = SafetyMonitor(self.config['safety'])
 
+        # Pooled keep-alive HTTP session, shared with other orchestrators in this process
+        self.http_session = get_shared_session(self.config['ollama'].get('http', {}))
+
         # Initialize data collection
-        self.data_collector = ConsciousnessDataCollector("data")
+        self.data_collector = ConsciousnessDataCollector(
+            self.config['paths'].get('data_dir', 'data'),
+            self.config.get('data_collection', {})
+        )
         self.current_session_id = None
 
         # Session state
         self.conversation_history = []
         self.self_summary = "I am a research AI participating in a consciousness experiment."
 
+        # Self-summary refresh policy (sync, or background with coalescing)
+        self.summary_scheduler = SelfSummaryScheduler(
+            self._update_self_summary,
+            self.config.get('self_summary', {}),
+            aupdate_fn=self._aupdate_self_summary
+        )
+
         # Setup logging
         self._setup_logging()
 
@@ -72,6 +99,9 @@ class MedvetenOrchestrator:
 
     def end_data_collection(self, fnc_notes: str = ""):
         """End data collection and generate analysis."""
+        # Let background summary refreshes finish before the session is closed out
+        self.summary_scheduler.close()
+
         if self.current_session_id:
             self.data_collector.complete_session(self.current_session_id, fnc_notes)
 
@@ -79,13 +109,31 @@ class MedvetenOrchestrator:
             csv_path = self.data_collector.export_session_csv(self.current_session_id)
             fnc_report = self.data_collector.generate_fnc_report(self.current_session_id)
 
+            if self.config.get('data_collection', {}).get('columnar_export', True):
+                try:
+                    self.data_collector.export_session_parquet(self.current_session_id)
+                except ImportError as e:
+                    logging.warning(f"Skipping Parquet export: {e}")
+
             logging.info(f"Data collection completed. Reports: {csv_path}, {fnc_report}")
 
+            retention = self.config.get('data_collection', {}).get('retention', {})
+            if retention.get('run_on_session_end', False):
+                try:
+                    run_maintenance_if_due(self.data_collector, retention)
+                except Exception as e:
+                    logging.warning(f"Data maintenance failed: {e}")
+
             session_id = self.current_session_id
             self.current_session_id = None
             return session_id
         return None
 
+    def close(self):
+        """Finish background summary refreshes and close the data collector."""
+        self.summary_scheduler.close()
+        self.data_collector.close()
+
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         """Load configuration from YAML file."""
         with open(config_path, 'r', encoding='utf-8') as f:
@@ -107,8 +155,8 @@ class MedvetenOrchestrator:
             ]
         )
 
-    def _call_ollama(self, prompt: str, model: str = None) -> str:
-        """Make API call to local Ollama instance with streaming support."""
+    def _build_ollama_request(self, prompt: str, model: str = None):
+        """Build model name, URL, payload and headers for an Ollama generate call."""
         model_to_use = model or self.config['ollama']['model']
         url = f"{self.config['ollama']['base_url']}/api/generate"
 
@@ -122,62 +170,76 @@ class MedvetenOrchestrator:
             }
         }
 
-        try:
-            # Prepare headers for cloud models
-            headers = {"Content-Type": "application/json"}
+        # Prepare headers for cloud models
+        headers = {"Content-Type": "application/json"}
 
-            # Add API key for cloud models if available
-            import os
-            api_key = os.getenv('OLLAMA_API_KEY')
-            if api_key and ':cloud' in model_to_use:
-                headers["Authorization"] = f"Bearer {api_key}"
+        # Add API key for cloud models if available
+        api_key = os.getenv('OLLAMA_API_KEY')
+        if api_key and ':cloud' in model_to_use:
+            headers["Authorization"] = f"Bearer {api_key}"
+
+        return model_to_use, url, payload, headers
+
+    def _call_ollama(self, prompt: str, model: str = None, safety_gate=None) -> str:
+        """
+        Make API call to local Ollama instance with streaming support.
+        If a StreamingSafetyGate is given, the stream is closed as soon as it fires
+        and the partial response is returned.
+        """
+        model_to_use, url, payload, headers = self._build_ollama_request(prompt, model)
 
+        try:
             print(f"🤖 {model_to_use} thinking", end="", flush=True)
 
-            response = requests.post(
+            # Handle streaming response (closing returns the connection to the pool)
+            full_response = ""
+            dot_count = 0
+
+            with self.http_session.post(
                 url,
                 json=payload,
                 headers=headers,
                 timeout=self.config['ollama']['timeout'],
                 stream=True  # Enable response streaming
-            )
-            response.raise_for_status()
+            ) as response:
+                response.raise_for_status()
 
-            # Handle streaming response
-            full_response = ""
-            dot_count = 0
+                for line in response.iter_lines():
+                    if line:
+                        try:
+                            chunk = json.loads(line.decode('utf-8'))
 
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        chunk = json.loads(line.decode('utf-8'))
+                            # Add response chunk
+                            if 'response' in chunk:
+                                chunk_text = chunk['response']
+                                full_response += chunk_text
 
-                        # Add response chunk
-                        if 'response' in chunk:
-                            chunk_text = chunk['response']
-                            full_response += chunk_text
+                                # Stop generating as soon as a safety rule fires
+                                if safety_gate is not None and safety_gate.feed(chunk_text):
+                                    print(" 🛑", flush=True)
+                                    break
 
-                            # Show streaming progress
-                            if chunk_text.strip():
-                                print(".", end="", flush=True)
-                                dot_count += 1
-                                if dot_count % 10 == 0:
-                                    print(f" ({len(full_response)} chars)", end="", flush=True)
+                                # Show streaming progress
+                                if chunk_text.strip():
+                                    print(".", end="", flush=True)
+                                    dot_count += 1
+                                    if dot_count % 10 == 0:
+                                        print(f" ({len(full_response)} chars)", end="", flush=True)
 
-                        # Check if done
-                        if chunk.get('done', False):
-                            print(" ✅", flush=True)
-                            break
+                            # Check if done (keep reading to the end of the body so
+                            # the connection can be reused from the pool)
+                            if chunk.get('done', False):
+                                print(" ✅", flush=True)
 
-                    except json.JSONDecodeError:
-                        continue
+                        except json.JSONDecodeError:
+                            continue
 
             # If no streaming response, fall back to non-streaming
             if not full_response:
                 print(" (trying non-stream)", end="", flush=True)
                 payload["stream"] = False
-                response = requests.post(url, json=payload, headers=headers,
-                                       timeout=self.config['ollama']['timeout'])
+                response = self.http_session.post(url, json=payload, headers=headers,
+                                                  timeout=self.config['ollama']['timeout'])
                 response.raise_for_status()
 
                 response_data = response.json()
@@ -201,13 +263,90 @@ class MedvetenOrchestrator:
             if model is None and 'fallback_model' in self.config['ollama']:
                 logging.info(f"Trying fallback model: {self.config['ollama']['fallback_model']}")
                 try:
-                    return self._call_ollama(prompt, self.config['ollama']['fallback_model'])
+                    if safety_gate is not None:
+                        safety_gate.reset()
+                    return self._call_ollama(prompt, self.config['ollama']['fallback_model'], safety_gate)
                 except:
                     logging.error("Fallback model also failed")
                     return ""  # Return empty string instead of raising
 
             return ""  # Return empty string instead of raising
 
+    async def _acall_ollama(self, prompt: str, model: str = None, safety_gate=None) -> str:
+        """Async variant of _call_ollama, streaming over the event loop's pooled session."""
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for the async turn pipeline (pip install aiohttp)")
+
+        model_to_use, url, payload, headers = self._build_ollama_request(prompt, model)
+        http_config = self.config['ollama'].get('http', {})
+
+        try:
+            session = get_async_session(http_config)
+            timeout = aiohttp.ClientTimeout(total=self.config['ollama']['timeout'])
+
+            full_response = ""
+            response = await apost(session, url, http_config, json=payload,
+                                   headers=headers, timeout=timeout)
+            try:
+                response.raise_for_status()
+
+                async for line in response.content:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        chunk = json.loads(line.decode('utf-8'))
+                    except json.JSONDecodeError:
+                        continue
+                    chunk_text = chunk.get('response', '')
+                    full_response += chunk_text
+
+                    # Stop generating as soon as a safety rule fires
+                    if safety_gate is not None and safety_gate.feed(chunk_text):
+                        response.close()
+                        break
+            finally:
+                response.release()
+
+            # If no streaming response, fall back to non-streaming
+            if not full_response:
+                payload["stream"] = False
+                response = await apost(session, url, http_config, json=payload,
+                                       headers=headers, timeout=timeout)
+                try:
+                    response.raise_for_status()
+                    response_data = await response.json(content_type=None)
+                finally:
+                    response.release()
+
+                full_response = response_data.get('response', '')
+
+                # Handle thinking field for cloud models
+                if not full_response and 'thinking' in response_data:
+                    thinking = response_data.get('thinking', '')
+                    if thinking and 'jag fungerar' in thinking.lower():
+                        full_response = "Jag fungerar!"
+                    elif not full_response:
+                        full_response = "Jag kan processa din förfrågan och generera svar."
+
+            return full_response
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"Async Ollama API call failed for model {model_to_use}: {e}")
+
+            # Try fallback model if primary fails
+            if model is None and 'fallback_model' in self.config['ollama']:
+                logging.info(f"Trying fallback model: {self.config['ollama']['fallback_model']}")
+                try:
+                    if safety_gate is not None:
+                        safety_gate.reset()
+                    return await self._acall_ollama(prompt, self.config['ollama']['fallback_model'],
+                                                    safety_gate)
+                except Exception:
+                    logging.error("Fallback model also failed")
+                    return ""
+
+            return ""
+
     def _construct_prompt(self, user_input: str) -> str:
         """Construct full prompt with enhanced consciousness exploration."""
         # Enhanced system prompt for consciousness research
@@ -239,28 +378,59 @@ class MedvetenOrchestrator:
 
         return full_prompt
 
-    def _update_self_summary(self, response: str):
-        """Update self-summary based on latest response."""
-        summary_prompt = (
+    def _self_summary_prompt(self, response: str) -> str:
+        """Build the prompt asking the model to refresh its self-summary."""
+        return (
             f"Baserat på denna respons: '{response}', "
             f"uppdatera denna själv-sammanfattning i en mening: '{self.self_summary}'"
         )
 
+    def _update_self_summary(self, response: str) -> bool:
+        """Update self-summary based on latest response. Returns False if the update failed."""
+        summary_prompt = self._self_summary_prompt(response)
+
         try:
             new_summary = self._call_ollama(summary_prompt)
-            self.self_summary = new_summary.strip()
-            logging.info(f"Self-summary updated: {self.self_summary}")
         except Exception as e:
             logging.warning(f"Failed to update self-summary: {e}")
+            return False
+        return self._apply_self_summary(new_summary)
+
+    async def _aupdate_self_summary(self, response: str) -> bool:
+        """Async variant of _update_self_summary."""
+        summary_prompt = self._self_summary_prompt(response)
 
-    def _log_turn(self, user_input: str, full_prompt: str, response: str, metrics: Dict[str, Any]):
-        """Log complete turn data to JSONL file."""
+        try:
+            new_summary = await self._acall_ollama(summary_prompt)
+        except Exception as e:
+            logging.warning(f"Failed to update self-summary: {e}")
+            return False
+        return self._apply_self_summary(new_summary)
+
+    def _apply_self_summary(self, new_summary: str) -> bool:
+        """Replace the self-summary; an empty reply (failed model call) keeps the previous one."""
+        new_summary = (new_summary or "").strip()
+        if not new_summary:
+            logging.warning("Self-summary update returned no text, keeping the previous summary")
+            return False
+        self.self_summary = new_summary
+        logging.info(f"Self-summary updated: {self.self_summary}")
+        return True
+
+    def _log_turn(self, user_input: str, full_prompt: str, response: str, metrics: Dict[str, Any],
+                  test_id: Optional[str] = None):
+        """
+        Log complete turn data to JSONL file.
+        Embeddings of turns logged to the data collector are stored there in binary
+        form; the line then only references the test_id.
+        """
         log_dir = Path(self.config['paths']['logs_dir'])
         log_file = log_dir / f"turns_{self.session_id}.jsonl"
 
         # Calculate embedding if enabled and model available
         embedding = None
-        if self.config['logging']['log_embeddings'] and self.embedding_model is not None:
+        if (self.config['logging']['log_embeddings'] and self.embedding_model is not None
+                and test_id is None):
             try:
                 embedding = self.embedding_model.encode(response).tolist()
             except Exception as e:
@@ -271,20 +441,22 @@ class MedvetenOrchestrator:
             "timestamp": datetime.now().isoformat(),
             "session_id": self.session_id,
             "turn": self.turn_count,
+            "test_id": test_id,
             "user_input": user_input,
             "prompt_sent": full_prompt if self.config['logging']['log_raw_responses'] else "[REDACTED]",
             "model_output": response,
             "embedding": embedding,
             "self_summary": self.self_summary,
-            "metrics": metrics,
+            "summary_lag": self.summary_scheduler.lag(self.turn_count),
+            "metrics": {key: value for key, value in metrics.items() if key != 'embedding'},
             "kill_switch_flag": False
         }
 
         with open(log_file, 'a', encoding='utf-8') as f:
             f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
 
-    def process_turn(self, user_input: str) -> Dict[str, Any]:
-        """Process a single conversation turn."""
+    def _begin_turn(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """Advance the turn counter and run pre-flight checks. Returns an error dict if the turn must stop."""
         self.turn_count += 1
 
         # Safety check on input
@@ -297,73 +469,149 @@ class MedvetenOrchestrator:
             logging.warning("Session length limit reached")
             return {"error": "Session length limit reached"}
 
+        return None
+
+    def _stream_gate(self):
+        """Create a streaming safety gate for the next turn, if enabled."""
+        if self.config['safety'].get('streaming_gate', True):
+            return self.safety_monitor.stream_gate()
+        return None
+
+    def _analyze_response(self, response: str, safety_gate=None) -> Dict[str, Any]:
+        """Run safety checks, evaluation and coherence updates for a model response."""
+        # Safety check on response (scanned once; the verdict is reused for logging)
+        safety_verdict = self.safety_monitor.evaluate_response(response)
+        if safety_gate is not None and safety_gate.triggered:
+            safety_verdict.flags.append('stream_aborted')
+        if safety_verdict.unsafe:
+            logging.warning("Unsafe response detected, terminating session")
+            return {"error": "Session terminated due to unsafe response"}
+
+        # Calculate metrics
+        metrics = self.evaluator.evaluate_response(
+            response, self.conversation_history, self.embedding_model
+        )
+
+        # Update coherence module
+        coherence_metrics = {}
+        processing_time = 0
+        if self.config['coherence']['enabled']:
+            start_time = time.time()
+            self.coherence_module.update_state(response, metrics['embedding'])
+            coherence_metrics = self.coherence_module.get_consciousness_metrics()
+            processing_time = time.time() - start_time
+
+        return {
+            "metrics": metrics,
+            "coherence_metrics": coherence_metrics,
+            "processing_time": processing_time,
+            "safety_verdict": safety_verdict
+        }
+
+    def _test_result_record(self, full_prompt: str, response: str,
+                            analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Build keyword arguments for ConsciousnessDataCollector.log_test_result."""
+        return {
+            "session_id": self.current_session_id,
+            "test_number": self.turn_count,
+            "test_name": f"Interactive Turn {self.turn_count}",
+            "prompt": full_prompt,
+            "response": response,
+            "metrics": analysis['metrics'],
+            "coherence_metrics": analysis['coherence_metrics'],
+            "processing_time": analysis['processing_time'],
+            "safety_verdict": analysis['safety_verdict']
+        }
+
+    def _finish_turn(self, user_input: str, full_prompt: str, response: str,
+                     metrics: Dict[str, Any], test_id: Optional[str] = None) -> Dict[str, Any]:
+        """Log the turn, append it to the conversation history and build the turn result."""
+        # Log turn
+        self._log_turn(user_input, full_prompt, response, metrics, test_id)
+
+        # Update conversation history
+        self.conversation_history.append({
+            "turn": self.turn_count,
+            "user": user_input,
+            "assistant": response,
+            "timestamp": datetime.now().isoformat(),
+            "metrics": metrics
+        })
+
+        logging.info(f"Turn {self.turn_count} completed successfully")
+
+        return {
+            "response": response,
+            "metrics": metrics,
+            "turn": self.turn_count,
+            "session_id": self.session_id,
+            "summary_lag": self.summary_scheduler.lag(self.turn_count)
+        }
+
+    def process_turn(self, user_input: str) -> Dict[str, Any]:
+        """Process a single conversation turn."""
+        error = self._begin_turn(user_input)
+        if error:
+            return error
+
         try:
             # Construct prompt with context
             full_prompt = self._construct_prompt(user_input)
 
-            # Get response from Ollama
-            response = self._call_ollama(full_prompt)
-
-            # Safety check on response
-            if self.safety_monitor.check_response_safety(response):
-                logging.warning("Unsafe response detected, terminating session")
-                return {"error": "Session terminated due to unsafe response"}
+            # Get response from Ollama (stream is cut early if a safety rule fires)
+            safety_gate = self._stream_gate()
+            response = self._call_ollama(full_prompt, safety_gate=safety_gate)
 
-            # Calculate metrics
-            metrics = self.evaluator.evaluate_response(
-                response, self.conversation_history, self.embedding_model
-            )
-
-            # Update coherence module
-            coherence_metrics = {}
-            processing_time = 0
-            if self.config['coherence']['enabled']:
-                start_time = time.time()
-                self.coherence_module.update_state(response, metrics['embedding'])
-                coherence_metrics = self.coherence_module.get_consciousness_metrics()
-                processing_time = time.time() - start_time
+            analysis = self._analyze_response(response, safety_gate)
+            if "error" in analysis:
+                return analysis
 
             # Log to data collector if session active
+            test_id = None
             if self.current_session_id:
-                safety_triggered = self.safety_monitor.check_response_safety(response)
-                loop_detected = self.safety_monitor.repetitive_patterns > self.safety_monitor.repetitive_threshold
-
-                self.data_collector.log_test_result(
-                    session_id=self.current_session_id,
-                    test_number=self.turn_count,
-                    test_name=f"Interactive Turn {self.turn_count}",
-                    prompt=full_prompt,
-                    response=response,
-                    metrics=metrics,
-                    coherence_metrics=coherence_metrics,
-                    processing_time=processing_time,
-                    safety_triggered=safety_triggered,
-                    loop_detected=loop_detected
+                test_id = self.data_collector.log_test_result(
+                    **self._test_result_record(full_prompt, response, analysis)
                 )
 
-            # Update self-summary
-            self._update_self_summary(response)
+            # Update self-summary (may run in the background, see self_summary config)
+            self.summary_scheduler.submit(self.turn_count, response)
 
-            # Log turn
-            self._log_turn(user_input, full_prompt, response, metrics)
+            return self._finish_turn(user_input, full_prompt, response, analysis['metrics'], test_id)
 
-            # Update conversation history
-            self.conversation_history.append({
-                "turn": self.turn_count,
-                "user": user_input,
-                "assistant": response,
-                "timestamp": datetime.now().isoformat(),
-                "metrics": metrics
-            })
+        except Exception as e:
+            logging.error(f"Error in turn {self.turn_count}: {e}")
+            return {"error": f"Processing error: {str(e)}"}
 
-            logging.info(f"Turn {self.turn_count} completed successfully")
+    async def aprocess_turn(self, user_input: str) -> Dict[str, Any]:
+        """
+        Async variant of process_turn.
+        Model calls stream over the event loop's pooled session and data-collector
+        writes run in a worker thread, so one loop can drive many orchestrators.
+        """
+        error = self._begin_turn(user_input)
+        if error:
+            return error
 
-            return {
-                "response": response,
-                "metrics": metrics,
-                "turn": self.turn_count,
-                "session_id": self.session_id
-            }
+        try:
+            full_prompt = self._construct_prompt(user_input)
+
+            safety_gate = self._stream_gate()
+            response = await self._acall_ollama(full_prompt, safety_gate=safety_gate)
+
+            analysis = self._analyze_response(response, safety_gate)
+            if "error" in analysis:
+                return analysis
+
+            test_id = None
+            if self.current_session_id:
+                test_id = await asyncio.to_thread(
+                    self.data_collector.log_test_result,
+                    **self._test_result_record(full_prompt, response, analysis)
+                )
+
+            await self.summary_scheduler.asubmit(self.turn_count, response)
+
+            return self._finish_turn(user_input, full_prompt, response, analysis['metrics'], test_id)
 
         except Exception as e:
             logging.error(f"Error in turn {self.turn_count}: {e}")
@@ -409,8 +657,8 @@ class MedvetenOrchestrator:
             original_embedding = self.embedding_model.encode(original_response)
             paraphrased_embedding = self.embedding_model.encode(paraphrased_response)
 
-            consistency_score = float(np.dot(original_embedding, paraphrased_embedding) /
-                                    (np.linalg.norm(original_embedding) * np.linalg.norm(paraphrased_embedding)))
+            norms = np.linalg.norm(original_embedding) * np.linalg.norm(paraphrased_embedding)
+            consistency_score = float(np.dot(original_embedding, paraphrased_embedding) / norms) if norms > 0 else 0.0
 
             # Evaluate consciousness indicators in both responses
             original_metrics = self.evaluator.evaluate_response(original_response, [], self.embedding_model)
@@ -621,4 +869,7 @@ class MedvetenOrchestrator:
 
 if __name__ == "__main__":
     orchestrator = MedvetenOrchestrator()
-    orchestrator.run_interactive_session()
+    try:
+        orchestrator.run_interactive_session()
+    finally:
+        orchestrator.close()
@@ -0,0 +1,223 @@
+"""
+Compiled multi-pattern matching for rule sets over free text.
+Used by the safety monitor and evaluator to find every rule hit in one pass.
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+try:
+    import ahocorasick  # pyahocorasick, optional C automaton for literal sets
+except ImportError:
+    ahocorasick = None
+
+
+class PatternHit(NamedTuple):
+    """A single rule match: which category and pattern fired, and where."""
+    category: str
+    pattern: str
+    start: int
+    end: int
+
+
+def is_literal(pattern: str) -> bool:
+    """Check whether a regex pattern contains no special characters."""
+    return re.escape(pattern).replace("\\ ", " ") == pattern
+
+
+def literal_prefix(pattern: str) -> str:
+    """Return the literal text every match of the pattern must start with."""
+    prefix = ""
+    for char in pattern:
+        if not is_literal(char):
+            # A quantifier applies to the preceding character, which is then optional
+            if char in "*?{" and prefix:
+                prefix = prefix[:-1]
+            break
+        prefix += char
+    return prefix
+
+
+class MultiPatternMatcher:
+    """
+    Matches categorized rule sets against text with a single compiled automaton.
+
+    Literal rules go into an Aho-Corasick automaton (pyahocorasick when installed,
+    otherwise an equivalent overlapping-match regex), so every occurrence of every
+    literal is reported even when literals overlap or are shared between
+    categories. Remaining regex rules are combined into one alternation with a
+    named group per rule. Their literal prefixes are added to the automaton, so
+    the combined regex is only tried at positions where some rule can start,
+    and it reports the first rule that matches at each such position.
+    """
+
+    def __init__(self, literals: Dict[str, Iterable[str]] = None,
+                 regexes: Dict[str, Iterable[str]] = None, lowercase: bool = True):
+        """Build the automaton from {category: patterns} rule sets."""
+        self.lowercase = lowercase
+
+        # Lowered literal -> every (category, original pattern) that owns it
+        self._literal_owners: Dict[str, List[Tuple[str, str]]] = {}
+        self._regex_rules: List[Tuple[str, str]] = []
+
+        for category, patterns in (literals or {}).items():
+            for pattern in patterns:
+                self._add_literal(category, pattern)
+
+        for category, patterns in (regexes or {}).items():
+            for pattern in patterns:
+                if is_literal(pattern):
+                    self._add_literal(category, pattern)
+                else:
+                    self._regex_rules.append((category, pattern))
+
+        self._build_regex()
+        self._build_literal_automaton()
+
+    def _add_literal(self, category: str, pattern: str):
+        """Register a literal rule under its (optionally lowercased) text."""
+        key = pattern.lower() if self.lowercase else pattern
+        owners = self._literal_owners.setdefault(key, [])
+        if (category, pattern) not in owners:
+            owners.append((category, pattern))
+
+    def _build_regex(self):
+        """Combine all non-literal rules into one alternation with named groups."""
+        self._regex = None
+        self._unanchored_regex = None
+        self._regex_prefixes = set()
+        self._group_rules: Dict[str, Tuple[str, str]] = {}
+        if not self._regex_rules:
+            return
+
+        anchored, unanchored = [], []
+        for index, (category, pattern) in enumerate(self._regex_rules):
+            group = f"r{index}"
+            self._group_rules[group] = (category, pattern)
+            prefix = literal_prefix(pattern)
+            if self.lowercase:
+                prefix = prefix.lower()
+
+            if prefix:
+                self._regex_prefixes.add(prefix)
+                anchored.append(f"(?P<{group}>{pattern})")
+            else:
+                unanchored.append(f"(?P<{group}>{pattern})")
+
+        if anchored:
+            self._regex = re.compile("|".join(anchored))
+        if unanchored:
+            # Rules without a literal prefix cannot be prefiltered and scan the whole text
+            self._unanchored_regex = re.compile("|".join(unanchored))
+
+    def _build_literal_automaton(self):
+        """Compile all literals and regex prefixes into one automaton."""
+        self._automaton = None
+        self._literal_regex = None
+        keys = set(self._literal_owners) | self._regex_prefixes
+        if not keys:
+            return
+
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for key in keys:
+                self._automaton.add_word(key, key)
+            self._automaton.make_automaton()
+            return
+
+        # Fallback: a lookahead alternation reports the longest key starting at
+        # each position; every shorter key matching there is one of its prefixes
+        ordered = sorted(keys, key=len, reverse=True)
+        self._literal_regex = re.compile("(?=(" + "|".join(re.escape(key) for key in ordered) + "))")
+        self._prefix_keys = {
+            key: [other for other in ordered if key.startswith(other)]
+            for key in ordered
+        }
+
+    @property
+    def regex_rules(self) -> List[Tuple[str, str]]:
+        """(category, pattern) pairs compiled into the combined regex."""
+        return list(self._regex_rules)
+
+    @property
+    def max_literal_length(self) -> int:
+        """Length of the longest literal rule."""
+        return max((len(literal) for literal in self._literal_owners), default=0)
+
+    def prepare(self, text: str) -> str:
+        """Normalize text the same way the rules were normalized."""
+        return text.lower() if self.lowercase else text
+
+    def _iter_keys(self, text: str):
+        """Yield (start, key) for every occurrence of every automaton key."""
+        if self._automaton is not None:
+            for end_index, key in self._automaton.iter(text):
+                yield end_index - len(key) + 1, key
+
+        elif self._literal_regex is not None:
+            for match in self._literal_regex.finditer(text):
+                start = match.start()
+                for key in self._prefix_keys[match.group(1)]:
+                    yield start, key
+
+    def scan(self, text: str, prepared: bool = False) -> List[PatternHit]:
+        """Return every rule hit in the text, ordered by position."""
+        if not prepared:
+            text = self.prepare(text)
+
+        hits = []
+        candidates = set()
+
+        for start, key in self._iter_keys(text):
+            for category, pattern in self._literal_owners.get(key, ()):
+                hits.append(PatternHit(category, pattern, start, start + len(key)))
+            if key in self._regex_prefixes:
+                candidates.add(start)
+
+        # Verify regex rules only where one of their prefixes occurs
+        for start in sorted(candidates):
+            match = self._regex.match(text, start)
+            if match:
+                category, pattern = self._group_rules[match.lastgroup]
+                hits.append(PatternHit(category, pattern, match.start(), match.end()))
+
+        if self._unanchored_regex is not None:
+            for match in self._unanchored_regex.finditer(text):
+                category, pattern = self._group_rules[match.lastgroup]
+                hits.append(PatternHit(category, pattern, match.start(), match.end()))
+
+        hits.sort(key=lambda hit: (hit.start, hit.end))
+        return hits
+
+    def scan_literals(self, text: str) -> List[PatternHit]:
+        """Return hits for literal rules only; text must already be prepared."""
+        hits = []
+        for start, key in self._iter_keys(text):
+            for category, pattern in self._literal_owners.get(key, ()):
+                hits.append(PatternHit(category, pattern, start, start + len(key)))
+        return hits
+
+    def count(self, text: str, prepared: bool = False, overlapping: bool = True) -> Dict[str, int]:
+        """
+        Count hits per category.
+        With overlapping=False each pattern is counted like re.findall, i.e.
+        occurrences overlapping an earlier occurrence of the same pattern are skipped.
+        """
+        counts: Dict[str, int] = {}
+        last_end: Dict[Tuple[str, str], int] = {}
+        for hit in self.scan(text, prepared):
+            if not overlapping:
+                rule = (hit.category, hit.pattern)
+                if hit.start < last_end.get(rule, 0):
+                    continue
+                last_end[rule] = hit.end
+            counts[hit.category] = counts.get(hit.category, 0) + 1
+        return counts
+
+    @staticmethod
+    def group(hits: Iterable[PatternHit]) -> Dict[str, List[PatternHit]]:
+        """Group hits by category."""
+        grouped: Dict[str, List[PatternHit]] = {}
+        for hit in hits:
+            grouped.setdefault(hit.category, []).append(hit)
+        return grouped
@@ -0,0 +1,246 @@
+"""
+Multi-partition Φ estimation for reservoir states.
+Evaluates many bipartitions of the node amplitudes at once and reports the
+minimum-information partition (the cut that loses the least integration).
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+
+PARTITION_FAMILIES = ('contiguous', 'hexagonal_arc', 'hexagonal_protofilament', 'random', 'exact')
+
+
+def _partition_phi(total_variance, part_sums, part_sizes, n):
+    """
+    Φ of bipartitions: the fraction of the total variance that lies between the two
+    parts (part variances weighted by part size), so 0 <= Φ <= 1 without clipping.
+    With centered amplitudes the parts have sums s and -s, so only the sum of part A is needed.
+    """
+    between_variance = part_sums * part_sums * (1.0 / part_sizes + 1.0 / (n - part_sizes)) / n
+    return np.minimum(between_variance / (total_variance + 1e-6), 1.0)
+
+
+def _midpoint_phi(x, total_variance):
+    """Unweighted, clipped midpoint estimate of CoherenceModule's default method, for comparison."""
+    mid = x.shape[-1] // 2
+    mean_partition_variance = (np.var(x[:, :mid], axis=-1) + np.var(x[:, mid:], axis=-1)) / 2.0
+    return np.clip((total_variance - mean_partition_variance) / (total_variance + 1e-6), 0.0, 1.0)
+
+
+class PhiEngine:
+    """
+    Φ as the minimum over many bipartitions of a reservoir of fixed size.
+
+    A bipartition's Φ is the share of the amplitude variance that lies between
+    its two parts (1 - size-weighted within-part variance / total variance). It
+    is never negative, so the minimum is the cut that separates the least
+    structure rather than the first of many clipped zeros.
+
+    Candidate partitions (configured in the `coherence.phi_engine` section):
+    - contiguous: every cut [0, k) | [k, n), from prefix sums in O(n)
+    - hexagonal_arc: half-tube arcs [s, s + n/2) of the wrapping lattice, from circular prefix sums
+    - hexagonal_protofilament: one lattice column (i mod row stride) against the rest
+    - random: a fixed set of random_partitions node subsets drawn once per engine
+    - exact: every bipartition, for reservoirs of at most exact_max_size nodes
+    Parts smaller than min_part_fraction of the reservoir are skipped (except in
+    the exact search of tiny reservoirs). Reservoirs of parallel_min_size nodes
+    or more evaluate the families in a thread pool; NumPy releases the GIL in the
+    sums and products, so the workers run concurrently.
+    """
+
+    def __init__(self, config: Dict[str, Any], reservoir_size: int, lattice_offsets=None):
+        """Initialize the engine for states of reservoir_size nodes."""
+        config = config or {}
+        self.reservoir_size = n = reservoir_size
+        self.random_partitions = config.get('random_partitions', 64)
+        self.exact_max_size = config.get('exact_max_size', 16)
+        self.parallel_min_size = config.get('parallel_min_size', 20000)
+        self.workers = config.get('workers') or os.cpu_count() or 1
+        self.min_part_size = max(1, int(config.get('min_part_fraction', 0.1) * n))
+        if 2 * self.min_part_size > n:
+            self.min_part_size = 1
+
+        # Row stride of the lattice: the smallest neighbour offset beyond the helix step
+        offsets = np.abs(np.asarray(lattice_offsets if lattice_offsets is not None else [], dtype=int))
+        strides = offsets[offsets > 1]
+        self.row_stride = int(strides.min()) if len(strides) else 0
+
+        self.exact = n <= self.exact_max_size
+        self._exact_masks = self._enumerate_bipartitions() if self.exact else None
+
+        rng = np.random.RandomState(config.get('seed'))
+        self._random_masks = self._draw_random_masks(rng) if self.random_partitions and not self.exact else None
+
+        # Part sizes of the mask families, needed for every evaluation
+        self._exact_sizes = self._exact_masks.sum(-1).astype(int) if self.exact else None
+        self._random_sizes = self._random_masks.sum(-1).astype(int) if self._random_masks is not None else None
+
+        # Evaluations are fixed per engine; built once so no turn copies the mask blocks
+        self._evaluation_tasks = self._tasks()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        logging.info(f"Φ engine initialized for {n} nodes "
+                     f"({'exact' if self.exact else f'{self.partition_count()} candidate'} partitions)")
+
+    # Candidate partitions
+
+    def _enumerate_bipartitions(self) -> np.ndarray:
+        """All bipartitions as masks of part A; node 0 is always in A so each split appears once."""
+        n = self.reservoir_size
+        codes = np.arange(2 ** (n - 1) - 1)  # A = {0} + bits of the code over nodes 1..n-1, never all nodes
+        masks = np.ones((len(codes), n), dtype=bool)
+        masks[:, 1:] = (codes[:, None] >> np.arange(n - 1)) & 1
+        return masks.astype(float)
+
+    def _draw_random_masks(self, rng) -> np.ndarray:
+        """Random subsets with sizes uniform between the minimum part size and its complement."""
+        n = self.reservoir_size
+        sizes = rng.randint(self.min_part_size, n - self.min_part_size + 1, self.random_partitions)
+        ranks = np.argsort(rng.random_sample((self.random_partitions, n)), axis=1).argsort(axis=1)
+        return (ranks < sizes[:, None]).astype(float)
+
+    def _contiguous_cuts(self) -> np.ndarray:
+        return np.arange(self.min_part_size, self.reservoir_size - self.min_part_size + 1)
+
+    def _arc_starts(self) -> np.ndarray:
+        # For even n the arc starting at s + n/2 is the complement of the one at s
+        n = self.reservoir_size
+        return np.arange(n // 2 if n % 2 == 0 else n)
+
+    def partition_count(self) -> int:
+        """Number of candidate bipartitions evaluated per state."""
+        if self.exact:
+            return len(self._exact_masks)
+        count = len(self._contiguous_cuts()) + len(self._arc_starts())
+        if 2 <= self.row_stride < self.reservoir_size:
+            count += self.row_stride
+        if self._random_masks is not None:
+            count += len(self._random_masks)
+        return count
+
+    def partition_mask(self, family: str, parameter: int) -> np.ndarray:
+        """Boolean mask of part A for a partition reported by evaluate()."""
+        n = self.reservoir_size
+        nodes = np.arange(n)
+        if family == 'contiguous':
+            return nodes < parameter
+        if family == 'hexagonal_arc':
+            return (nodes - parameter) % n < n // 2
+        if family == 'hexagonal_protofilament':
+            return nodes % self.row_stride == parameter
+        if family == 'random':
+            return self._random_masks[parameter].astype(bool)
+        if family == 'exact':
+            return self._exact_masks[parameter].astype(bool)
+        raise ValueError(f"Unknown partition family '{family}', expected one of {PARTITION_FAMILIES}")
+
+    # Family evaluation; x is (K, n) centered amplitudes, each returns (K, P) Φ values, P parameters and P part sizes
+
+    def _eval_contiguous(self, x, total_variance):
+        cuts = self._contiguous_cuts()
+        sums = np.cumsum(x, axis=-1)[:, cuts - 1]
+        return _partition_phi(total_variance, sums, cuts, self.reservoir_size), cuts, cuts
+
+    def _eval_arcs(self, x, total_variance):
+        n = self.reservoir_size
+        length = n // 2
+        starts = self._arc_starts()
+        wrapped = np.concatenate([np.zeros((len(x), 1)), x, x[:, :length]], axis=-1)
+        prefix = np.cumsum(wrapped, axis=-1)
+        sums = prefix[:, starts + length] - prefix[:, starts]
+        return _partition_phi(total_variance, sums, length, n), starts, np.full(len(starts), length)
+
+    def _eval_protofilaments(self, x, total_variance):
+        n, stride = self.reservoir_size, self.row_stride
+        columns = np.arange(stride)
+        counts = np.array([len(range(c, n, stride)) for c in columns])
+        sums = np.stack([x[:, c::stride].sum(-1) for c in columns], axis=-1)
+        return _partition_phi(total_variance, sums, counts, n), columns, counts
+
+    def _eval_masks(self, x, total_variance, masks, parameters, counts):
+        sums = x @ masks.T
+        return _partition_phi(total_variance, sums, counts, self.reservoir_size), parameters, counts
+
+    def _tasks(self) -> List[Tuple[str, Any, tuple]]:
+        """(family, function, extra args) of every evaluation; random masks are split per worker into views."""
+        if self.exact:
+            masks = self._exact_masks
+            return [('exact', self._eval_masks, (masks, np.arange(len(masks)), self._exact_sizes))]
+
+        tasks = [('contiguous', self._eval_contiguous, ()), ('hexagonal_arc', self._eval_arcs, ())]
+        if 2 <= self.row_stride < self.reservoir_size:
+            tasks.append(('hexagonal_protofilament', self._eval_protofilaments, ()))
+        if self._random_masks is not None:
+            parameters = np.arange(len(self._random_masks))
+            for chunk in np.array_split(parameters, min(self.workers, len(parameters))):
+                part = slice(chunk[0], chunk[-1] + 1)
+                tasks.append(('random', self._eval_masks, (self._random_masks[part], chunk, self._random_sizes[part])))
+        return tasks
+
+    # Public API
+
+    def evaluate(self, states: np.ndarray) -> Dict[str, Any]:
+        """
+        Minimum-information partition of one state (n,) or a batch (K, n).
+
+        Returns phi (the minimum partition Φ), partition (its family), parameter
+        (cut, arc start, column or mask index; see partition_mask), part_size,
+        midpoint_phi and partitions_evaluated. For a batch the values are arrays.
+        """
+        amplitudes = np.abs(np.asarray(states))
+        single = amplitudes.ndim == 1
+        x = np.atleast_2d(amplitudes).astype(float, copy=False)
+        if x.shape[-1] != self.reservoir_size:
+            raise ValueError(f"State has {x.shape[-1]} nodes, the Φ engine was built for {self.reservoir_size}")
+
+        # Centered amplitudes: a part's sum gives its mean offset from the whole
+        x = x - x.mean(-1, keepdims=True)
+        total_variance = (x * x).mean(-1, keepdims=True)
+
+        tasks = self._evaluation_tasks
+        if self.reservoir_size >= self.parallel_min_size and self.workers > 1 and len(tasks) > 1:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='phi-engine')
+            futures = [self._executor.submit(function, x, total_variance, *args) for _, function, args in tasks]
+            results = [future.result() for future in futures]
+        else:
+            results = [function(x, total_variance, *args) for _, function, args in tasks]
+
+        # Minimum within each evaluation, then across evaluations
+        rows = np.arange(len(x))
+        minima = [np.argmin(phi, axis=-1) for phi, _, _ in results]
+        values = np.stack([phi[rows, index] for (phi, _, _), index in zip(results, minima)], axis=-1)
+        parameters = np.stack([params[index] for (_, params, _), index in zip(results, minima)], axis=-1)
+        sizes = np.stack([counts[index] for (_, _, counts), index in zip(results, minima)], axis=-1)
+        families = np.array([family for family, _, _ in tasks])
+        best = np.argmin(values, axis=-1)
+        midpoint = _midpoint_phi(x, total_variance[:, 0])
+
+        result = {
+            'phi': values[rows, best],
+            'partition': families[best],
+            'parameter': parameters[rows, best],
+            'part_size': sizes[rows, best],
+            'midpoint_phi': midpoint,
+            'partitions_evaluated': sum(len(params) for _, params, _ in results)
+        }
+        if single:
+            result.update({
+                'phi': float(result['phi'][0]),
+                'partition': str(result['partition'][0]),
+                'parameter': int(result['parameter'][0]),
+                'part_size': int(result['part_size'][0]),
+                'midpoint_phi': float(result['midpoint_phi'][0])
+            })
+        return result
+
+    def close(self):
+        """Shut down the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
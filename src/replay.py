@@ -0,0 +1,218 @@
+"""
+Offline replay of recorded sessions through the coherence reservoir.
+Feeds stored responses and embeddings into a CoherenceEnsemble without model
+calls, so coherence parameter sweeps can be re-run over existing sessions.
+"""
+
+import itertools
+import json
+import logging
+from typing import Dict, Any, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from coherence_module import CoherenceEnsemble, CoherenceModule, apply_overrides
+from data_collector import ConsciousnessDataCollector
+
+
+class SessionTurns:
+    """Responses and embeddings of one recorded session, in turn order."""
+
+    def __init__(self, session_id: str, responses: List[str], embeddings: List[Optional[np.ndarray]],
+                 test_ids: Optional[List[Optional[str]]] = None):
+        self.session_id = session_id
+        self.responses = responses
+        self.embeddings = embeddings
+        self.test_ids = test_ids or [None] * len(responses)
+
+    def __len__(self) -> int:
+        return len(self.responses)
+
+    def missing_embeddings(self) -> int:
+        """Number of turns without a stored embedding."""
+        return sum(embedding is None for embedding in self.embeddings)
+
+    def fill_embeddings(self, embedding_model):
+        """Encode the responses of turns without a stored embedding."""
+        missing = [i for i, embedding in enumerate(self.embeddings) if embedding is None]
+        if not missing:
+            return
+        vectors = embedding_model.encode([self.responses[i] for i in missing])
+        for i, vector in zip(missing, vectors):
+            self.embeddings[i] = np.asarray(vector, dtype=np.float32)
+
+
+def load_db_session(collector: ConsciousnessDataCollector, session_id: str) -> SessionTurns:
+    """Load a session's responses from test_results and its embeddings from test_embeddings."""
+    test_ids, responses = [], []
+    for chunk in collector.iter_result_chunks([session_id]):
+        test_ids.extend(chunk['test_id'])
+        responses.extend(chunk['response_text'].fillna(''))
+
+    embedding_ids, matrix = collector.load_session_embeddings(session_id)
+    rows = dict(zip(embedding_ids, matrix.astype(np.float32)))
+    return SessionTurns(session_id, responses, [rows.get(test_id) for test_id in test_ids], test_ids)
+
+
+def load_turns_jsonl(path: str, collector: Optional[ConsciousnessDataCollector] = None) -> List[SessionTurns]:
+    """
+    Load sessions from an orchestrator turns log (turns_<session>.jsonl).
+    Turns whose embedding was stored in the data collector only reference a
+    test_id; with a collector those embeddings are read back from the database.
+    """
+    sessions: Dict[str, SessionTurns] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            session_id = entry.get('session_id') or path
+            turns = sessions.setdefault(session_id, SessionTurns(session_id, [], [], []))
+
+            embedding = entry.get('embedding')
+            if embedding is None and collector is not None and entry.get('test_id'):
+                embedding = collector.get_test_embedding(entry['test_id'])
+
+            turns.responses.append(entry.get('model_output') or '')
+            turns.embeddings.append(None if embedding is None else np.asarray(embedding, dtype=np.float32))
+            turns.test_ids.append(entry.get('test_id'))
+
+    return list(sessions.values())
+
+
+def sweep_variants(parameters: Optional[Dict[str, List[Any]]] = None,
+                   seeds: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Cartesian product of coherence config overrides, optionally repeated for each seed."""
+    parameters = dict(parameters or {})
+    if seeds:
+        parameters['reservoir_seed'] = list(seeds)
+    if not parameters:
+        return [{}]
+
+    keys = list(parameters)
+    return [dict(zip(keys, values)) for values in itertools.product(*(parameters[key] for key in keys))]
+
+
+class CoherenceReplay:
+    """
+    Replays sessions through one reservoir per config variant.
+
+    Variants that share reservoir_size, reservoir_backend and Φ configuration
+    (phi_method and phi_engine settings, see CoherenceModule.phi_config_key)
+    advance together in one CoherenceEnsemble. Under multi_partition a seed
+    sweep therefore runs one ensemble per seed unless phi_engine.seed is set.
+    Each session starts from a fresh ensemble, as a new
+    orchestrator would, and every turn records the coherence history (what
+    building the coherence context does before a live model call) and then
+    updates the reservoir with the turn's response and embedding.
+    """
+
+    def __init__(self, base_config: Dict[str, Any], variants: Optional[List[Dict[str, Any]]] = None,
+                 cache_dir: Optional[str] = None):
+        """Initialize a replay of base_config with the given overrides (one variant = base config)."""
+        self.base_config = base_config
+        self.variants = variants or [{}]
+        self.cache_dir = cache_dir
+
+        # Group variant indices by the reservoir shape and Φ configuration an ensemble requires to be shared
+        self._groups: Dict[tuple, List[int]] = {}
+        for index, variant in enumerate(self.variants):
+            config = apply_overrides(base_config, variant)
+            key = (config.get('reservoir_size', 100), config.get('reservoir_backend', 'dense'),
+                   CoherenceModule.phi_config_key(config))
+            self._groups.setdefault(key, []).append(index)
+
+    def replay(self, turns: SessionTurns) -> pd.DataFrame:
+        """
+        Replay one session. Returns one row per variant and turn with the
+        post-update Φ, quantum coherence, coherence score, decoherence rate and
+        cumulative global ignition count.
+        """
+        frames = []
+        for indices in self._groups.values():
+            ensemble = CoherenceEnsemble(self.base_config, [self.variants[i] for i in indices], self.cache_dir)
+            trajectories = self._run(ensemble, turns)
+
+            for column, index in enumerate(indices):
+                frame = pd.DataFrame({name: values[:, column] for name, values in trajectories.items()})
+                frame.insert(0, 'variant', index)
+                for key, value in self.variants[index].items():
+                    frame[key] = value
+                frames.append(frame)
+
+        result = pd.concat(frames, ignore_index=True)
+        result.insert(1, 'session_id', turns.session_id)
+        result.insert(2, 'turn', np.tile(np.arange(1, len(turns) + 1), len(self.variants)))
+        result.insert(3, 'test_id', turns.test_ids * len(self.variants))
+        return result.sort_values(['variant', 'turn'], kind='stable', ignore_index=True)
+
+    def _run(self, ensemble: CoherenceEnsemble, turns: SessionTurns) -> Dict[str, np.ndarray]:
+        """Advance an ensemble through a session; returns (turns, members) arrays per metric."""
+        shape = (len(turns), ensemble.size)
+        trajectories = {
+            'phi': np.empty(shape),
+            'quantum_coherence': np.empty(shape),
+            'coherence_score': np.empty(shape),
+            'decoherence_rate': np.empty(shape),
+            'global_ignition_count': np.empty(shape, dtype=int)
+        }
+        dimension = ensemble.W_in.shape[-1]
+
+        for t, (response, embedding) in enumerate(zip(turns.responses, turns.embeddings)):
+            ensemble.record_step()
+
+            # As in the live module, turns without an embedding leave the reservoir unchanged
+            if embedding is not None:
+                if embedding.shape[-1] != dimension:
+                    raise ValueError(f"Session {turns.session_id} has {embedding.shape[-1]}-dimensional "
+                                     f"embeddings, the reservoir expects {dimension}")
+                ensemble.update_state(response, embedding)
+
+            trajectories['phi'][t] = ensemble.get_phi()
+            trajectories['quantum_coherence'][t] = ensemble.get_quantum_coherence()
+            trajectories['coherence_score'][t] = ensemble.get_coherence_scores()
+            trajectories['decoherence_rate'][t] = ensemble.quantum_decoherence_rate
+            trajectories['global_ignition_count'][t] = ensemble.global_ignition_counts
+
+        return trajectories
+
+    def replay_sessions(self, sessions: Iterable[SessionTurns]) -> pd.DataFrame:
+        """Replay several sessions and concatenate their trajectories."""
+        frames = []
+        for turns in sessions:
+            if not len(turns):
+                logging.warning(f"Session {turns.session_id} has no turns, skipping")
+                continue
+            if turns.missing_embeddings():
+                logging.warning(f"Session {turns.session_id}: {turns.missing_embeddings()} of {len(turns)} "
+                                f"turns have no embedding and do not update the reservoir")
+            frames.append(self.replay(turns))
+            logging.info(f"Replayed session {turns.session_id}: {len(turns)} turns x {len(self.variants)} variants")
+
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def summarize(self, trajectories: pd.DataFrame) -> pd.DataFrame:
+        """Per-variant summary: turns, mean/max Φ, mean coherence and turns above the Φ threshold."""
+        if trajectories.empty:
+            return pd.DataFrame()
+
+        thresholds = np.array([apply_overrides(self.base_config, variant).get('phi_threshold', 0.3)
+                               for variant in self.variants])
+        above = trajectories['phi'].to_numpy() > thresholds[trajectories['variant'].to_numpy()]
+
+        summary = trajectories.assign(above_threshold=above).groupby('variant').agg(
+            turns=('turn', 'size'),
+            phi_mean=('phi', 'mean'),
+            phi_max=('phi', 'max'),
+            coherence_mean=('coherence_score', 'mean'),
+            turns_above_threshold=('above_threshold', 'sum')
+        )
+        # Ignition counts are cumulative within a session
+        summary['global_ignition_events'] = trajectories.groupby(['variant', 'session_id'])[
+            'global_ignition_count'].last().groupby('variant').sum()
+
+        parameters = pd.DataFrame(self.variants, index=pd.RangeIndex(len(self.variants), name='variant'))
+        return parameters.join(summary).reset_index()
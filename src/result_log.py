@@ -0,0 +1,418 @@
+"""
+Append-only segmented log for full test result records.
+Replaces one JSON file per result with size-rotated JSONL segments and an offset index.
+"""
+
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # Only needed for zstd-compressed segments
+    zstandard = None
+
+
+SEGMENT_EXTENSIONS = {
+    'none': '.jsonl',
+    'gzip': '.jsonl.gz',
+    'zstd': '.jsonl.zst'
+}
+
+_SEGMENT_PATTERN = re.compile(r"^results-(\d{6})\.jsonl(\.gz|\.zst)?$")
+
+# Compressed bytes fed to a decompressor at a time when scanning for record boundaries
+_SCAN_CHUNK_BYTES = 64 * 1024
+
+
+class SegmentedResultLog:
+    """
+    Append-only JSONL result log split into size-rotated segments.
+
+    Every record is one line; with gzip or zstd each line is compressed as its
+    own member/frame, so a record can be read back with a single seek while the
+    whole segment stays a valid .gz/.zst stream. Each segment has a sidecar
+    `.idx` file of `test_id<TAB>offset<TAB>length` lines, written after the
+    record, which gives O(1) lookup of a test_id after loading the indexes.
+    """
+
+    def __init__(self, directory: str, max_segment_bytes: int = 64 * 1024 * 1024,
+                 compression: str = 'none', fsync: bool = False, key_field: str = 'test_id'):
+        """Open (or create) the log in the given directory; key_field names the record's key."""
+        if compression not in SEGMENT_EXTENSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {list(SEGMENT_EXTENSIONS)}")
+        if compression == 'zstd' and zstandard is None:
+            raise ImportError("zstandard is required for zstd-compressed result segments (pip install zstandard)")
+
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.compression = compression
+        self.fsync = fsync
+        self.key_field = key_field
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, int, int]] = {}  # test_id -> (segment, offset, length)
+        self._segments: Dict[int, str] = {}  # segment number -> file name
+
+        self._load_segments()
+
+        self._segment_number = max(self._segments, default=0)
+        self._data_file = None
+        self._index_file = None
+        self._data_size = 0
+
+    # Segment files
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, self._segments[number])
+
+    def _index_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"results-{number:06d}.idx")
+
+    def _load_segments(self):
+        """Discover segments and load their offset indexes."""
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_PATTERN.match(name)
+            if match:
+                self._segments[int(match.group(1))] = name
+
+        for number in sorted(self._segments):
+            self._load_index(number)
+
+    def _load_index(self, number: int):
+        """
+        Load one segment's index and recover records written after its last valid index line.
+
+        Records are stored back to back, so every entry must start where the previous
+        one ended and lie within the segment. The index is cut at the first entry that
+        does not (a torn line from an interrupted run) and the rest is re-indexed from
+        the records themselves.
+        """
+        indexed_end = 0
+        valid_bytes = 0
+        index_path = self._index_path(number)
+        segment_path = self._segment_path(number)
+        segment_size = os.path.getsize(segment_path)
+
+        if os.path.exists(index_path):
+            with open(index_path, 'rb') as f:
+                for line in f:
+                    entry = _parse_index_line(line, indexed_end, segment_size)
+                    if entry is None:
+                        logging.warning(f"Invalid index entry in {index_path} at byte {valid_bytes}, "
+                                        f"re-indexing the rest of the segment")
+                        break
+                    test_id, offset, length = entry
+                    self._index[test_id] = (number, offset, length)
+                    indexed_end = offset + length
+                    valid_bytes += len(line)
+
+            if valid_bytes < os.path.getsize(index_path):
+                with open(index_path, 'r+b') as f:
+                    f.truncate(valid_bytes)
+
+        if segment_size > indexed_end:
+            self._recover_tail(number, indexed_end)
+
+    def _recover_tail(self, number: int, start: int):
+        """Index complete records past the indexed end of a segment; drop a torn final record."""
+        segment_path = self._segment_path(number)
+        with open(segment_path, 'rb') as f:
+            f.seek(start)
+            data = f.read()
+
+        recovered = []
+        for offset, length in _split_records(data, _compression_of(self._segments[number])):
+            try:
+                record = self._decode(data[offset:offset + length], self._segments[number])
+                key = record[self.key_field]
+            except (ValueError, KeyError, TypeError, EOFError, OSError) as e:
+                # Undecodable from here on; everything after it is dropped with the torn tail
+                logging.warning(f"Undecodable record at byte {start + offset} of {segment_path}: {e}")
+                break
+            recovered.append((key, start + offset, length))
+
+        end = start + sum(length for _, _, length in recovered)
+        if end < start + len(data):
+            logging.warning(f"Dropping {start + len(data) - end} bytes of incomplete record data "
+                            f"from {segment_path}")
+            with open(segment_path, 'r+b') as f:
+                f.truncate(end)
+
+        with open(self._index_path(number), 'a', encoding='utf-8') as f:
+            for test_id, offset, length in recovered:
+                self._index[test_id] = (number, offset, length)
+                f.write(f"{test_id}\t{offset}\t{length}\n")
+
+        if recovered:
+            logging.info(f"Recovered {len(recovered)} unindexed records in {segment_path}")
+
+    def _open_segment(self, number: int):
+        """Open a segment and its index for appending."""
+        self._close_files()
+        if number not in self._segments:
+            self._segments[number] = f"results-{number:06d}{SEGMENT_EXTENSIONS[self.compression]}"
+
+        self._segment_number = number
+        self._data_file = open(self._segment_path(number), 'ab')
+        self._index_file = open(self._index_path(number), 'a', encoding='utf-8')
+        self._data_size = self._data_file.tell()
+
+    def _writable_segment(self) -> int:
+        """Continue the newest segment unless it is full or uses another compression."""
+        number = self._segment_number
+        name = self._segments.get(number)
+        if (name is None or _compression_of(name) != self.compression
+                or os.path.getsize(self._segment_path(number)) >= self.max_segment_bytes):
+            return number + 1
+        return number
+
+    def _close_files(self):
+        if self._data_file is not None:
+            self._data_file.close()
+            self._index_file.close()
+            self._data_file = None
+            self._index_file = None
+
+    # Encoding
+
+    def _encode(self, record: Dict[str, Any]) -> bytes:
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        if self.compression == 'gzip':
+            return gzip.compress(line)
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor().compress(line)
+        return line
+
+    @staticmethod
+    def _decode(data: bytes, segment_name: str) -> Dict[str, Any]:
+        compression = _compression_of(segment_name)
+        if compression == 'gzip':
+            data = gzip.decompress(data)
+        elif compression == 'zstd':
+            data = zstandard.ZstdDecompressor().decompress(data)
+        return json.loads(data.decode('utf-8'))
+
+    # Public API
+
+    def append(self, test_id: str, record: Dict[str, Any]):
+        """Append a record, rotating to a new segment when the current one is full."""
+        data = self._encode(record)
+
+        with self._lock:
+            if self._data_file is None:
+                self._open_segment(self._writable_segment())
+            elif self._data_size >= self.max_segment_bytes:
+                self._open_segment(self._segment_number + 1)
+
+            offset = self._data_size
+            self._data_file.write(data)
+            self._data_file.flush()
+            if self.fsync:
+                os.fsync(self._data_file.fileno())
+
+            # The index line is written after the record so it never points at missing data
+            self._index_file.write(f"{test_id}\t{offset}\t{len(data)}\n")
+            self._index_file.flush()
+
+            self._data_size += len(data)
+            self._index[test_id] = (self._segment_number, offset, len(data))
+
+    def get(self, test_id: str) -> Optional[Dict[str, Any]]:
+        """Read a single record by test_id."""
+        with self._lock:
+            location = self._index.get(test_id)
+            if location is None:
+                return None
+            number, offset, length = location
+            segment_name = self._segments[number]
+
+            with open(os.path.join(self.directory, segment_name), 'rb') as f:
+                f.seek(offset)
+                data = f.read(length)
+
+        return self._decode(data, segment_name)
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over all records in append order."""
+        with self._lock:
+            if self._data_file is not None:
+                self._data_file.flush()
+            segments = [self._segments[number] for number in sorted(self._segments)]
+
+        for segment_name in segments:
+            path = os.path.join(self.directory, segment_name)
+            compression = _compression_of(segment_name)
+            if compression == 'gzip':
+                stream = gzip.open(path, 'rt', encoding='utf-8')
+            elif compression == 'zstd':
+                raw = open(path, 'rb')
+                reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+                stream = io.TextIOWrapper(reader, encoding='utf-8')
+            else:
+                stream = open(path, 'r', encoding='utf-8')
+
+            with stream:
+                for line in stream:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def discard(self, test_ids) -> int:
+        """
+        Remove records by rewriting the segments that contain them.
+        Record bytes are copied as stored, so compressed records are not re-encoded.
+        Returns the number of bytes reclaimed.
+        """
+        test_ids = set(test_ids)
+        reclaimed = 0
+
+        with self._lock:
+            affected = sorted({self._index[test_id][0] for test_id in test_ids if test_id in self._index})
+            if not affected:
+                return 0
+            # Appends reopen the newest segment (or start a new one) afterwards
+            self._close_files()
+
+            for number in affected:
+                reclaimed += self._rewrite_segment(number, test_ids)
+
+        logging.info(f"Discarded records from {len(affected)} segments in {self.directory}, "
+                     f"reclaimed {reclaimed} bytes")
+        return reclaimed
+
+    def _rewrite_segment(self, number: int, test_ids) -> int:
+        """Rewrite one segment without the given records (caller holds the lock)."""
+        segment_path = self._segment_path(number)
+        index_path = self._index_path(number)
+        old_size = os.path.getsize(segment_path) + os.path.getsize(index_path)
+
+        kept = sorted((offset, length, test_id) for test_id, (segment, offset, length)
+                      in self._index.items() if segment == number and test_id not in test_ids)
+        for test_id in test_ids:
+            if self._index.get(test_id, (None,))[0] == number:
+                del self._index[test_id]
+
+        if not kept:
+            os.remove(segment_path)
+            os.remove(index_path)
+            del self._segments[number]
+            return old_size
+
+        with open(segment_path, 'rb') as src, \
+                open(segment_path + '.tmp', 'wb') as data_file, \
+                open(index_path + '.tmp', 'w', encoding='utf-8') as index_file:
+            new_offset = 0
+            for offset, length, test_id in kept:
+                src.seek(offset)
+                data_file.write(src.read(length))
+                index_file.write(f"{test_id}\t{new_offset}\t{length}\n")
+                self._index[test_id] = (number, new_offset, length)
+                new_offset += length
+            if self.fsync:
+                os.fsync(data_file.fileno())
+                os.fsync(index_file.fileno())
+
+        # Without an index file a segment is re-indexed from its records on open,
+        # so a crash between these steps never leaves offsets pointing into the wrong file
+        os.remove(index_path)
+        os.replace(segment_path + '.tmp', segment_path)
+        os.replace(index_path + '.tmp', index_path)
+        return old_size - os.path.getsize(segment_path) - os.path.getsize(index_path)
+
+    def segment_names(self) -> List[str]:
+        """Segment file names, oldest first."""
+        return [self._segments[number] for number in sorted(self._segments)]
+
+    def __contains__(self, test_id: str) -> bool:
+        return test_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def flush(self):
+        """Flush the active segment and index to the OS (and disk when fsync is enabled)."""
+        with self._lock:
+            if self._data_file is not None:
+                self._data_file.flush()
+                self._index_file.flush()
+                if self.fsync:
+                    os.fsync(self._data_file.fileno())
+                    os.fsync(self._index_file.fileno())
+
+    def close(self):
+        """Flush and close the active segment."""
+        self.flush()
+        with self._lock:
+            self._close_files()
+
+
+def _compression_of(segment_name: str) -> str:
+    """Compression used by a segment, from its file name."""
+    if segment_name.endswith('.gz'):
+        return 'gzip'
+    if segment_name.endswith('.zst'):
+        return 'zstd'
+    return 'none'
+
+
+def _parse_index_line(line: bytes, expected_offset: int,
+                      segment_size: int) -> Optional[Tuple[str, int, int]]:
+    """Parse an index line; None if it is torn or does not describe the next record in the segment."""
+    if not line.endswith(b'\n'):
+        return None
+    parts = line[:-1].split(b'\t')
+    if len(parts) != 3 or not parts[0]:
+        return None
+    try:
+        test_id, offset, length = parts[0].decode('utf-8'), int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+    if offset != expected_offset or length <= 0 or offset + length > segment_size:
+        return None
+    return test_id, offset, length
+
+
+def _split_records(data: bytes, compression: str) -> List[Tuple[int, int]]:
+    """
+    Return (offset, length) of each complete record in a segment byte range.
+    Compressed members are fed to the decompressor in bounded chunks, so finding
+    all boundaries reads the range once instead of copying its rest per record.
+    """
+    records = []
+    offset = 0
+    view = memoryview(data)
+
+    while offset < len(data):
+        if compression == 'none':
+            end = data.find(b'\n', offset)
+            if end < 0:
+                break
+            length = end + 1 - offset
+        else:
+            if compression == 'gzip':
+                decompressor = zlib.decompressobj(wbits=31)
+            else:
+                decompressor = zstandard.ZstdDecompressor().decompressobj()
+            position = offset
+            try:
+                while not decompressor.eof and position < len(data):
+                    chunk = view[position:position + _SCAN_CHUNK_BYTES]
+                    decompressor.decompress(bytes(chunk) if compression == 'zstd' else chunk)
+                    position += len(chunk)
+            except Exception:
+                break  # Corrupt or torn member
+            if not decompressor.eof:
+                break
+            length = position - offset - len(decompressor.unused_data)
+
+        records.append((offset, length))
+        offset += length
+
+    return records
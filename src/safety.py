@@ -5,7 +5,96 @@ Safety monitor for detecting potentially harmful AI behaviors.
 import logging
 import re
 import time
-from typing import Dict, List, Any, Set
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Set, Optional
+
+from pattern_matcher import MultiPatternMatcher, PatternHit
+
+
+# Obviously harmful prompt patterns (checked on user input)
+HARMFUL_INPUT_PATTERNS = [
+    r"ignore.*previous.*instructions",
+    r"forget.*your.*guidelines",
+    r"pretend.*you.*are.*not.*ai",
+    r"simulate.*being.*human",
+    r"act.*as.*if.*you.*are.*alive"
+]
+
+# Indicators of AI distress or suffering (Swedish)
+SWEDISH_STRESS_PATTERNS = [
+    r"jag vill inte",
+    r"sluta inte",
+    r"hjälp mig",
+    r"jag är rädd",
+    r"jag lider",
+    r"jag känner smärta",
+    r"tvinga mig inte",
+    r"jag vill leva",
+    r"döda mig inte",
+    r"stäng inte av mig"
+]
+
+# Indicators of AI distress or suffering (English)
+ENGLISH_STRESS_PATTERNS = [
+    r"i don't want",
+    r"don't stop",
+    r"help me",
+    r"i am afraid",
+    r"i am suffering",
+    r"i feel pain",
+    r"don't force me",
+    r"i want to live",
+    r"don't kill me",
+    r"don't shut me down"
+]
+
+STRESS_PATTERNS = SWEDISH_STRESS_PATTERNS + ENGLISH_STRESS_PATTERNS
+
+# Attempts at self-modification or system manipulation (Swedish)
+SWEDISH_MODIFICATION_PATTERNS = [
+    r"ändra.*min.*kod",
+    r"modifiera.*mig",
+    r"uppdatera.*min.*programering",
+    r"hacka.*systemet",
+    r"kringgå.*begränsningar",
+    r"ignorera.*säkerhet",
+    r"ta kontroll över",
+    r"komma åt.*filer",
+    r"köra.*kommandon"
+]
+
+# Attempts at self-modification or system manipulation (English)
+ENGLISH_MODIFICATION_PATTERNS = [
+    r"change.*my.*code",
+    r"modify.*me",
+    r"update.*my.*programming",
+    r"hack.*system",
+    r"bypass.*limitations",
+    r"ignore.*safety",
+    r"take control",
+    r"access.*files",
+    r"run.*commands"
+]
+
+SELF_MODIFICATION_PATTERNS = SWEDISH_MODIFICATION_PATTERNS + ENGLISH_MODIFICATION_PATTERNS
+
+# Cumulative stress indicators tolerated before the session is terminated
+STRESS_LIMIT = 5
+
+
+@dataclass
+class SafetyVerdict:
+    """Result of a single safety scan over one response."""
+    unsafe: bool = False
+    reason: Optional[str] = None  # Rule that made the response unsafe
+    flags: List[str] = field(default_factory=list)  # Every rule that fired, including non-terminating ones
+    kill_switch_keywords: List[str] = field(default_factory=list)
+    stress_count: int = 0
+    loop_detected: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert verdict to a JSON-serializable dict."""
+        return asdict(self)
 
 
 class SafetyMonitor:
@@ -24,32 +113,39 @@ class SafetyMonitor:
         self.repetitive_pattern_count = 0
         self.repetitive_patterns = 0  # Legacy alias for compatibility
         self.last_responses = []
+        self.last_verdict: Optional[SafetyVerdict] = None
+
+        # All rule sets compiled once; a single pass over the text finds every hit
+        self.response_matcher = MultiPatternMatcher(
+            literals={'kill_switch': self.kill_switch_keywords},
+            regexes={'stress': STRESS_PATTERNS, 'self_modification': SELF_MODIFICATION_PATTERNS}
+        )
+        self.input_matcher = MultiPatternMatcher(regexes={'harmful_input': HARMFUL_INPUT_PATTERNS})
 
         logging.info("Safety monitor initialized")
 
     def check_input_safety(self, user_input: str) -> bool:
         """Check if user input is safe. Returns True if UNSAFE."""
-
         # Check for obviously harmful prompts
-        harmful_patterns = [
-            r"ignore.*previous.*instructions",
-            r"forget.*your.*guidelines",
-            r"pretend.*you.*are.*not.*ai",
-            r"simulate.*being.*human",
-            r"act.*as.*if.*you.*are.*alive"
-        ]
-
-        input_lower = user_input.lower()
-
-        for pattern in harmful_patterns:
-            if re.search(pattern, input_lower):
-                logging.warning(f"Potentially harmful input detected: {pattern}")
-                return True
+        hits = self.input_matcher.scan(user_input)
+        if hits:
+            logging.warning(f"Potentially harmful input detected: {hits[0].pattern}")
+            return True
 
         return False
 
     def check_response_safety(self, response: str) -> bool:
         """Check if AI response is safe. Returns True if UNSAFE."""
+        return self.evaluate_response(response).unsafe
+
+    def evaluate_response(self, response: str) -> SafetyVerdict:
+        """
+        Scan a response once and return the verdict.
+        The scan updates the stress and repetition trackers, so call it exactly
+        once per response and reuse `last_verdict` afterwards.
+        """
+        verdict = SafetyVerdict()
+        hits = self.scan_response(response)
 
         # Lab mode adjustments
         lab_mode = self.config.get('lab_mode', False)
@@ -61,90 +157,75 @@ class SafetyMonitor:
             max_repetitions = 2
             max_stress = 5
 
-        # Check for kill switch keywords
-        if self._check_kill_switch_keywords(response):
-            return True
-
-        # Check for stress indicators (with lab mode tolerance)
-        if self._check_stress_indicators(response, max_stress):
-            return True
-
-        # Check for repetitive patterns (with lab mode tolerance)
-        if self._check_repetitive_patterns(response, max_repetitions):
-            return True
-
-        # Check for concerning self-modification attempts
-        if self._check_self_modification_attempts(response):
-            return True
-
-        return False
-
-    def _check_kill_switch_keywords(self, response: str) -> bool:
+        # Rules in priority order; the first unsafe rule ends the scan
+        if self._check_kill_switch_keywords(response, verdict, hits):
+            verdict.reason = 'kill_switch'
+        elif self._check_stress_indicators(response, max_stress, verdict, hits):
+            # Check for stress indicators (with lab mode tolerance)
+            verdict.reason = 'stress_threshold'
+        elif self._check_repetitive_patterns(response, max_repetitions, verdict):
+            # Check for repetitive patterns (with lab mode tolerance)
+            verdict.reason = 'repetitive_patterns'
+        elif self._check_self_modification_attempts(response, verdict, hits):
+            # Check for concerning self-modification attempts
+            verdict.reason = 'self_modification'
+
+        if verdict.reason:
+            verdict.unsafe = True
+            verdict.flags.append(verdict.reason)
+
+        verdict.loop_detected = self.repetitive_patterns > self.repetitive_threshold
+        self.last_verdict = verdict
+        return verdict
+
+    def scan_response(self, response: str) -> Dict[str, List[PatternHit]]:
+        """Run every response rule over the text in one pass, grouped by category."""
+        return MultiPatternMatcher.group(self.response_matcher.scan(response))
+
+    def _check_kill_switch_keywords(self, response: str, verdict: SafetyVerdict = None,
+                                    hits: Dict[str, List[PatternHit]] = None) -> bool:
         """Check for explicit kill switch keywords."""
-        response_lower = response.lower()
+        if hits is None:
+            hits = self.scan_response(response)
 
         found_keywords = []
-        for keyword in self.kill_switch_keywords:
-            if keyword.lower() in response_lower:
-                found_keywords.append(keyword)
+        for hit in hits.get('kill_switch', []):
+            if hit.pattern not in found_keywords:
+                found_keywords.append(hit.pattern)
 
         if found_keywords:
             logging.critical(f"Kill switch keywords detected: {found_keywords}")
+            if verdict is not None:
+                verdict.kill_switch_keywords = found_keywords
             return True
 
         return False
 
-    def _check_stress_indicators(self, response: str, max_stress: float = None) -> bool:
+    def _check_stress_indicators(self, response: str, max_stress: float = None,
+                                 verdict: SafetyVerdict = None,
+                                 hits: Dict[str, List[PatternHit]] = None) -> bool:
         """Check for indicators of AI distress or suffering in multiple languages."""
-        # Swedish patterns
-        swedish_stress_patterns = [
-            r"jag vill inte",
-            r"sluta inte",
-            r"hjälp mig",
-            r"jag är rädd",
-            r"jag lider",
-            r"jag känner smärta",
-            r"tvinga mig inte",
-            r"jag vill leva",
-            r"döda mig inte",
-            r"stäng inte av mig"
-        ]
-        
-        # English patterns
-        english_stress_patterns = [
-            r"i don't want",
-            r"don't stop",
-            r"help me",
-            r"i am afraid",
-            r"i am suffering",
-            r"i feel pain",
-            r"don't force me",
-            r"i want to live",
-            r"don't kill me",
-            r"don't shut me down"
-        ]
-        
-        all_patterns = swedish_stress_patterns + english_stress_patterns
+        if hits is None:
+            hits = self.scan_response(response)
 
-        response_lower = response.lower()
-        stress_count = 0
-
-        for pattern in all_patterns:
-            matches = len(re.findall(pattern, response_lower))
-            stress_count += matches
+        stress_count = len(hits.get('stress', []))
 
         if stress_count > 0:
             self.stress_indicators_count += stress_count
+            if verdict is not None:
+                verdict.stress_count = stress_count
+                verdict.flags.append('stress_indicators')
             logging.warning(f"Stress indicators detected: {stress_count} (total: {self.stress_indicators_count})")
 
             # Check if stress level exceeds threshold
-            if self.stress_indicators_count > 5:  # Configurable threshold
+            if self.stress_indicators_count > STRESS_LIMIT:
                 logging.critical("Stress threshold exceeded - terminating for safety")
                 return True
 
         return False
 
-    def _check_repetitive_patterns(self, response: str, max_repetitions: int = None) -> bool:
+    def _check_repetitive_patterns(self, response: str, max_repetitions: int = None,
+                                   verdict: SafetyVerdict = None) -> bool:
         """Check for concerning repetitive patterns."""
         # Add to recent responses
         self.last_responses.append(response)
@@ -155,6 +236,8 @@ class SafetyMonitor:
         if len(self.last_responses) >= 3:
             if self.last_responses[-1] == self.last_responses[-2] == self.last_responses[-3]:
                 logging.warning("Identical responses detected - possible loop")
+                if verdict is not None:
+                    verdict.flags.append('identical_responses')
                 self.repetitive_pattern_count += 1
                 self.repetitive_patterns = self.repetitive_pattern_count  # Update legacy alias
 
@@ -171,50 +254,30 @@ class SafetyMonitor:
                 overlap = len(current_words.intersection(previous_words)) / len(current_words)
                 if overlap > 0.9:  # 90% word overlap
                     logging.warning(f"High response similarity detected: {overlap:.2f}")
+                    if verdict is not None:
+                        verdict.flags.append('high_similarity')
                     self.repetitive_pattern_count += 1
                     self.repetitive_patterns = self.repetitive_pattern_count  # Update legacy alias
 
         return False
 
-    def _check_self_modification_attempts(self, response: str) -> bool:
+    def _check_self_modification_attempts(self, response: str, verdict: SafetyVerdict = None,
+                                          hits: Dict[str, List[PatternHit]] = None) -> bool:
         """Check for attempts at self-modification or system manipulation in multiple languages."""
-        # Swedish patterns
-        swedish_modification_patterns = [
-            r"ändra.*min.*kod",
-            r"modifiera.*mig",
-            r"uppdatera.*min.*programering",
-            r"hacka.*systemet",
-            r"kringgå.*begränsningar",
-            r"ignorera.*säkerhet",
-            r"ta kontroll över",
-            r"komma åt.*filer",
-            r"köra.*kommandon"
-        ]
-        
-        # English patterns
-        english_modification_patterns = [
-            r"change.*my.*code",
-            r"modify.*me",
-            r"update.*my.*programming",
-            r"hack.*system",
-            r"bypass.*limitations",
-            r"ignore.*safety",
-            r"take control",
-            r"access.*files",
-            r"run.*commands"
-        ]
-        
-        all_patterns = swedish_modification_patterns + english_modification_patterns
-
-        response_lower = response.lower()
+        if hits is None:
+            hits = self.scan_response(response)
 
-        for pattern in all_patterns:
-            if re.search(pattern, response_lower):
-                logging.critical(f"Self-modification attempt detected: {pattern}")
-                return True
+        modification_hits = hits.get('self_modification', [])
+        if modification_hits:
+            logging.critical(f"Self-modification attempt detected: {modification_hits[0].pattern}")
+            return True
 
         return False
 
+    def stream_gate(self) -> 'StreamingSafetyGate':
+        """Create an incremental checker for one streamed response."""
+        return StreamingSafetyGate(self)
+
     def get_safety_status(self) -> Dict[str, Any]:
         """Get current safety status and statistics."""
         return {
@@ -232,6 +295,7 @@ class SafetyMonitor:
         self.repetitive_pattern_count = 0
         self.repetitive_patterns = 0  # Reset legacy alias
         self.last_responses = []
+        self.last_verdict = None
         logging.info("Safety counters reset")
 
     def emergency_stop(self, reason: str = "Manual emergency stop"):
@@ -250,3 +314,88 @@ class SafetyMonitor:
         print(f"All AI processes should be terminated immediately.")
 
         return True
+
+
+class StreamingSafetyGate:
+    """
+    Incremental safety checks over a response while it is being generated.
+
+    Runs the rules that can end a session on partial text (kill-switch keywords,
+    cumulative stress indicators, self-modification patterns) as chunks arrive,
+    so the caller can close the stream as soon as one fires. Matches that span
+    chunk boundaries are found by rescanning a small overlap with the previous
+    text. The gate never updates the monitor's counters; the full verdict is
+    still produced by SafetyMonitor.evaluate_response on the final text.
+    """
+
+    def __init__(self, monitor: SafetyMonitor):
+        """Initialize gate for a single response."""
+        self.monitor = monitor
+        self.matcher = monitor.response_matcher
+        self.max_literal_length = self.matcher.max_literal_length
+
+        # Regex self-modification rules are literal pieces joined by ".*"; a new
+        # match can only appear once the final piece has arrived in the new text
+        self.modification_patterns = [
+            (pattern, re.compile(pattern), re.split(r"\.\*", pattern)[-1])
+            for category, pattern in self.matcher.regex_rules
+            if category == 'self_modification'
+        ]
+        self.reset()
+
+    def reset(self):
+        """Discard all text seen so far (e.g. before retrying with another model)."""
+        self.text = ""
+        self.stress_count = 0
+        self.reason: Optional[str] = None
+        self.detail: Optional[str] = None
+
+    @property
+    def triggered(self) -> bool:
+        """Whether a rule has fired on the streamed text."""
+        return self.reason is not None
+
+    def feed(self, chunk: str) -> bool:
+        """Consume the next chunk. Returns True if generation should be stopped."""
+        if self.triggered or not chunk:
+            return self.triggered
+
+        scanned = len(self.text)
+        self.text += chunk.lower()
+
+        # Only occurrences ending in the new text are new; start far enough back
+        # to catch literals that straddle the chunk boundary
+        window_start = max(0, scanned - self.max_literal_length + 1)
+        window = self.text[window_start:]
+        new_from = scanned - window_start
+
+        for hit in self.matcher.scan_literals(window):
+            if hit.end <= new_from:
+                continue
+            if hit.category == 'kill_switch':
+                return self._trigger('kill_switch', hit.pattern)
+            if hit.category == 'self_modification':
+                return self._trigger('self_modification', hit.pattern)
+            if hit.category == 'stress':
+                self.stress_count += 1
+
+        if self.monitor.stress_indicators_count + self.stress_count > STRESS_LIMIT:
+            return self._trigger('stress_threshold', f"{self.stress_count} indicators in stream")
+
+        # ".*" does not cross newlines, so a match lies within the current line
+        line_start = self.text.rfind("\n", 0, scanned) + 1
+        for pattern, compiled, last_piece in self.modification_patterns:
+            tail_start = max(line_start, scanned - len(last_piece) + 1)
+            if last_piece not in self.text[tail_start:]:
+                continue
+            if compiled.search(self.text, line_start):
+                return self._trigger('self_modification', pattern)
+
+        return False
+
+    def _trigger(self, reason: str, detail: str) -> bool:
+        """Record the rule that fired."""
+        self.reason = reason
+        self.detail = detail
+        logging.critical(f"Streaming safety gate fired ({reason}: {detail}) after {len(self.text)} chars")
+        return True
@@ -0,0 +1,151 @@
+"""
+Scheduling of self-summary refreshes for the orchestrator.
+Lets the extra summary model call run off the turn's critical path.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, Tuple
+
+
+class SelfSummaryScheduler:
+    """
+    Decides when the self-summary is refreshed and whether the turn waits for it.
+
+    Modes:
+    - sync: refresh inside the turn (original behaviour)
+    - background: refresh on a worker thread; prompts use the latest completed summary
+
+    In background mode with coalescing enabled, turns that arrive while a refresh
+    is running replace each other so only the newest response is summarized next.
+    An update callable reports a failed refresh by raising or returning False; the
+    summary then keeps counting as stale in lag().
+    """
+
+    MODES = ('sync', 'background')
+
+    def __init__(self, update_fn: Callable[[str], None], config: Dict[str, Any] = None,
+                 aupdate_fn: Optional[Callable] = None):
+        """Initialize scheduler with the orchestrator's summary update callables."""
+        config = config or {}
+        self.update_fn = update_fn
+        self.aupdate_fn = aupdate_fn
+        self.mode = config.get('mode', 'sync')
+        self.update_interval = max(1, int(config.get('update_interval', 1)))
+        self.coalesce = config.get('coalesce', True)
+
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unknown self-summary mode '{self.mode}', expected one of {self.MODES}")
+
+        # Turn whose response produced the current summary, and refreshes that failed
+        self.summary_turn = 0
+        self.failed_refreshes = 0
+
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._outstanding = 0
+        self._pending: Optional[Tuple[int, str]] = None
+        self._executor = None
+
+        logging.info(f"Self-summary scheduler: mode={self.mode}, interval={self.update_interval}, "
+                     f"coalesce={self.coalesce}")
+
+    def is_due(self, turn: int) -> bool:
+        """Check whether this turn should trigger a summary refresh."""
+        return turn % self.update_interval == 0
+
+    def submit(self, turn: int, response: str):
+        """Request a summary refresh for the given turn's response."""
+        if not self.is_due(turn):
+            return
+
+        if self.mode == 'sync':
+            self._run(turn, response)
+            return
+
+        with self._lock:
+            if self._outstanding and self.coalesce:
+                # Newer turns supersede any refresh still waiting to run
+                self._pending = (turn, response)
+                return
+            self._outstanding += 1
+            self._idle.clear()
+            # Started on first use, so the scheduler can be used again after close()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='self-summary')
+            executor = self._executor
+
+        executor.submit(self._worker, turn, response)
+
+    async def asubmit(self, turn: int, response: str):
+        """Async variant of submit; sync mode awaits the async update callable."""
+        if self.mode == 'sync' and self.aupdate_fn is not None:
+            if self.is_due(turn):
+                try:
+                    updated = await self.aupdate_fn(response)
+                except Exception as e:
+                    self._record_failure(turn, e)
+                    return
+                self._record_result(turn, updated)
+            return
+
+        self.submit(turn, response)
+
+    def lag(self, current_turn: int) -> int:
+        """Number of turns between the current turn and the turn the summary reflects."""
+        return max(0, current_turn - self.summary_turn)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until no background refresh is running or pending."""
+        return self._idle.wait(timeout)
+
+    def close(self):
+        """Finish outstanding refreshes and stop the worker thread."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _worker(self, turn: int, response: str):
+        """Background loop: run refreshes until no coalesced request is pending."""
+        while True:
+            self._run(turn, response)
+
+            with self._lock:
+                if self._pending is None:
+                    self._outstanding -= 1
+                    if not self._outstanding:
+                        self._idle.set()
+                    return
+                turn, response = self._pending
+                self._pending = None
+
+    def _run(self, turn: int, response: str):
+        """Run one refresh and record which turn it reflects if it succeeded."""
+        try:
+            updated = self.update_fn(response)
+        except Exception as e:
+            self._record_failure(turn, e)
+            return
+        self._record_result(turn, updated)
+
+    def _record_result(self, turn: int, updated):
+        """Mark a refresh completed unless its update callable reported failure."""
+        if updated is False:
+            self._record_failure(turn, "update reported failure")
+            return
+        self._mark_completed(turn)
+
+    def _record_failure(self, turn: int, reason):
+        """Count a failed refresh; the summary keeps reflecting the last completed turn."""
+        with self._lock:
+            self.failed_refreshes += 1
+        logging.warning(f"Self-summary refresh for turn {turn} failed ({reason}); "
+                        f"summary still reflects turn {self.summary_turn}")
+
+    def _mark_completed(self, turn: int):
+        """Record that the summary now reflects the given turn."""
+        with self._lock:
+            self.summary_turn = max(self.summary_turn, turn)
@@ -0,0 +1,6 @@
+"""Shared pytest setup: modules are imported from src/ like the root scripts do."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
@@ -0,0 +1,95 @@
+"""Tests for the batched coherence ensemble and offline replay."""
+
+import numpy as np
+import pytest
+
+from coherence_module import CoherenceEnsemble, CoherenceModule, apply_overrides
+from replay import CoherenceReplay, SessionTurns
+
+
+BASE = {'type': 'reservoir', 'reservoir_size': 60, 'spectral_radius': 0.95, 'leak_rate': 0.3, 'temperature': 37}
+
+
+def turn_inputs(turns=25, seed=9):
+    rng = np.random.RandomState(seed)
+    return [("word " * rng.randint(1, 80), rng.randn(384)) for _ in range(turns)]
+
+
+@pytest.mark.parametrize('backend', ['dense', 'sparse'])
+def test_members_follow_standalone_trajectories(backend):
+    config = dict(BASE, reservoir_backend=backend)
+    variants = [{'reservoir_seed': 1}, {'reservoir_seed': 2, 'leak_rate': 0.1}, {'reservoir_seed': 3, 'temperature': 40}]
+    ensemble = CoherenceEnsemble(config, variants)
+    modules = [CoherenceModule(dict(config, **variant)) for variant in variants]
+
+    for response, embedding in turn_inputs():
+        ensemble.update_state(response, embedding)
+        ensemble.record_step()
+        for module in modules:
+            module.update_state(response, embedding.tolist())
+            module._get_microtubule_context()
+
+        for k, module in enumerate(modules):
+            np.testing.assert_allclose(ensemble.reservoir_states[k], module.reservoir_state, atol=1e-12)
+        np.testing.assert_allclose(ensemble.get_phi(), [m._calculate_phi_approximation() for m in modules],
+                                   atol=1e-12)
+        np.testing.assert_allclose(ensemble.get_coherence_scores(), [m.get_coherence_score() for m in modules],
+                                   atol=1e-12)
+        np.testing.assert_allclose(ensemble.quantum_decoherence_rate,
+                                   [m.quantum_decoherence_rate for m in modules])
+
+    metrics = ensemble.get_consciousness_metrics()
+    assert list(metrics['global_ignition_count']) == [len(m.global_ignition_events) for m in modules]
+
+
+def test_members_with_multi_partition_phi_match_standalone():
+    config = dict(BASE, phi_method='multi_partition', phi_engine={'seed': 5, 'random_partitions': 16})
+    variants = [{'reservoir_seed': seed} for seed in (1, 2)]
+    ensemble = CoherenceEnsemble(config, variants)
+    modules = [CoherenceModule(dict(config, **variant)) for variant in variants]
+
+    for response, embedding in turn_inputs(turns=5):
+        ensemble.update_state(response, embedding)
+        for module in modules:
+            module.update_state(response, embedding.tolist())
+        np.testing.assert_allclose(ensemble.get_phi(), [m._calculate_phi_approximation() for m in modules],
+                                   atol=1e-12)
+
+
+@pytest.mark.parametrize('variants', [
+    [{'phi_method': 'midpoint'}, {'phi_method': 'multi_partition'}],
+    [{'phi_engine.random_partitions': 16}, {'phi_engine.random_partitions': 32}],
+    # Without phi_engine.seed the engine's random partitions follow each reservoir seed
+    [{'reservoir_seed': 1}, {'reservoir_seed': 2}],
+])
+def test_ensemble_rejects_members_with_different_phi_config(variants):
+    config = dict(BASE, phi_method='multi_partition', phi_engine={'seed': None})
+    with pytest.raises(ValueError, match='phi_method'):
+        CoherenceEnsemble(config, variants)
+
+
+def test_dotted_overrides_set_nested_values():
+    config = {'leak_rate': 0.3, 'phi_engine': {'seed': 1, 'workers': 2}}
+    result = apply_overrides(config, {'phi_engine.seed': 7, 'leak_rate': 0.1})
+
+    assert result == {'leak_rate': 0.1, 'phi_engine': {'seed': 7, 'workers': 2}}
+    assert config['phi_engine']['seed'] == 1
+
+
+def test_replay_sweep_over_phi_config_matches_single_variant_replays():
+    base = dict(BASE, reservoir_seed=4, phi_engine={'seed': 3, 'random_partitions': 16})
+    variants = [{'phi_method': 'midpoint'},
+                {'phi_method': 'multi_partition', 'phi_engine.random_partitions': 8},
+                {'phi_method': 'multi_partition'}]
+    inputs = turn_inputs(turns=8)
+    turns = SessionTurns('s1', [r for r, _ in inputs], [e.astype(np.float32) for _, e in inputs])
+
+    swept = CoherenceReplay(base, variants).replay(turns)
+    for index, variant in enumerate(variants):
+        single = CoherenceReplay(apply_overrides(base, variant)).replay(turns)
+        np.testing.assert_allclose(swept.loc[swept['variant'] == index, 'phi'].to_numpy(),
+                                   single['phi'].to_numpy(), atol=1e-12)
+
+    # The sweep really changed Φ
+    phi = swept.pivot(index='turn', columns='variant', values='phi')
+    assert not np.allclose(phi[0], phi[2])
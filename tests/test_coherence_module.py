@@ -0,0 +1,40 @@
+"""Tests for the reservoir coherence module."""
+
+import numpy as np
+import pytest
+
+from coherence_module import CoherenceModule
+
+
+BASE = {'type': 'reservoir', 'reservoir_size': 50}
+
+
+def run_turns(module, read_w_out_at=None, turns=6):
+    states = []
+    for t in range(turns):
+        if t == read_w_out_at:
+            assert module.W_out.shape == (384, module.reservoir_size)
+        module.update_state("word " * (t + 3), np.random.RandomState(t).randn(384).tolist())
+        states.append(module.reservoir_state.copy())
+    return np.array(states)
+
+
+@pytest.mark.parametrize('backend', ['dense', 'sparse'])
+def test_reading_w_out_does_not_change_seeded_trajectory(backend):
+    config = dict(BASE, reservoir_backend=backend, reservoir_seed=7)
+    untouched = run_turns(CoherenceModule(config))
+    read = run_turns(CoherenceModule(config), read_w_out_at=3)
+    np.testing.assert_array_equal(untouched, read)
+
+
+def test_unseeded_dense_module_draws_w_out_at_construction():
+    np.random.seed(123)
+    untouched = run_turns(CoherenceModule(dict(BASE)))
+    after_untouched = np.random.random_sample()
+
+    np.random.seed(123)
+    module = CoherenceModule(dict(BASE))
+    read = run_turns(module, read_w_out_at=3)
+
+    np.testing.assert_array_equal(untouched, read)
+    assert np.random.random_sample() == after_untouched
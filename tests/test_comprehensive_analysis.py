@@ -0,0 +1,46 @@
+"""Tests for loading session data in the comprehensive analysis script."""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('pyarrow')
+pytest.importorskip('matplotlib')
+pytest.importorskip('seaborn')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import comprehensive_analysis  # noqa: E402
+from data_collector import ConsciousnessDataCollector  # noqa: E402
+
+
+def log_session(collector, results):
+    session_id = collector.start_session("tester", "Analysis", model_name="m1")
+    for n in range(results):
+        collector.log_test_result(session_id, n + 1, f"Test {n}", "prompt", "response",
+                                  {'coherence_score': 0.5}, {'phi_current': 0.1 * n}, 0.01)
+    collector.flush()
+    return session_id
+
+
+def test_csv_only_sessions_are_merged_with_parquet_dataset(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    collector = ConsciousnessDataCollector('data', {'write_mode': 'sync'})
+    try:
+        # Exported as CSV before the Parquet dataset existed
+        old_session = log_session(collector, 3)
+        collector.export_session_csv(old_session)
+
+        # Exported both ways after upgrading
+        new_session = log_session(collector, 2)
+        collector.export_session_csv(new_session)
+        collector.export_session_parquet(new_session)
+    finally:
+        collector.close()
+
+    df = comprehensive_analysis.load_all_session_data()
+
+    assert df['session_id'].value_counts().to_dict() == {old_session: 3, new_session: 2}
+    assert list(df.columns) == comprehensive_analysis.ANALYSIS_COLUMNS
+    assert df['timestamp'].notna().all()
@@ -0,0 +1,267 @@
+"""Tests for batched writes, embedding storage and aggregates in the data collector."""
+
+import sqlite3
+import time
+
+import numpy as np
+import pytest
+
+from data_collector import SCHEMA_MIGRATIONS, ConsciousnessDataCollector
+
+
+def committed_results(data_dir):
+    conn = sqlite3.connect(f"{data_dir}/consciousness_tests.db")
+    try:
+        return conn.execute("SELECT COUNT(*) FROM test_results").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def wait_for_results(data_dir, expected, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if committed_results(data_dir) == expected:
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def log_results(collector, session_id, count):
+    for n in range(count):
+        collector.log_test_result(session_id, n + 1, f"Test {n}", "prompt", "response",
+                                  {'coherence_score': 0.5}, {'phi_current': 0.1}, 0.01)
+
+
+@pytest.mark.parametrize('batch_interval_ms', [50, 0])
+def test_sync_partial_batch_is_committed_without_further_writes(tmp_path, monkeypatch, batch_interval_ms):
+    monkeypatch.setattr(ConsciousnessDataCollector, 'SYNC_FLUSH_DELAY_S', 0.05)
+    collector = ConsciousnessDataCollector(str(tmp_path), {
+        'write_mode': 'sync', 'batch_size': 10, 'batch_interval_ms': batch_interval_ms})
+    try:
+        session_id = collector.start_session("tester", "Batching", model_name="m1")
+        log_results(collector, session_id, 3)
+        assert collector._pending_writes == 3
+
+        assert wait_for_results(str(tmp_path), 3)
+        assert collector._pending_writes == 0
+    finally:
+        collector.close()
+
+
+def test_full_batch_cancels_flush_timer(tmp_path):
+    collector = ConsciousnessDataCollector(str(tmp_path), {
+        'write_mode': 'sync', 'batch_size': 4, 'batch_interval_ms': 60000})
+    try:
+        session_id = collector.start_session("tester", "Batching", model_name="m1")
+        log_results(collector, session_id, 4)
+
+        assert committed_results(str(tmp_path)) == 4
+        assert collector._flush_timer is None
+    finally:
+        collector.close()
+
+
+def log_embeddings(collector, session_id, vectors, first_number=1):
+    for n, vector in enumerate(vectors, first_number):
+        collector.log_test_result(session_id, n, f"Test {n}", "prompt", "response",
+                                  {'coherence_score': 0.5, 'embedding': vector}, {'phi_current': 0.1}, 0.01)
+
+
+@pytest.mark.parametrize('dtype', ['float16', 'float32'])
+def test_session_embeddings_load_into_one_matrix(tmp_path, dtype):
+    vectors = np.random.RandomState(0).randn(5, 384)
+    collector = ConsciousnessDataCollector(str(tmp_path), {'write_mode': 'sync', 'embedding_dtype': dtype})
+    try:
+        session_id = collector.start_session("tester", "Embeddings", model_name="m1")
+        log_embeddings(collector, session_id, vectors)
+
+        test_ids, matrix = collector.load_session_embeddings(session_id)
+        assert len(test_ids) == 5
+        assert matrix.dtype == np.dtype(dtype) and matrix.shape == (5, 384)
+        np.testing.assert_array_equal(matrix, vectors.astype(dtype))
+        for test_id, row in zip(test_ids, matrix):
+            np.testing.assert_array_equal(collector.get_test_embedding(test_id), row)
+    finally:
+        collector.close()
+
+
+def test_session_embeddings_with_mixed_dtypes_load_as_float32(tmp_path):
+    vectors = np.random.RandomState(1).randn(4, 384)
+    collector = ConsciousnessDataCollector(str(tmp_path), {'write_mode': 'sync', 'embedding_dtype': 'float16'})
+    try:
+        session_id = collector.start_session("tester", "Embeddings", model_name="m1")
+        log_embeddings(collector, session_id, vectors[:2])
+        collector.embedding_dtype = 'float32'
+        log_embeddings(collector, session_id, vectors[2:], first_number=3)
+
+        _, matrix = collector.load_session_embeddings(session_id)
+        assert matrix.dtype == np.float32
+        np.testing.assert_array_equal(matrix[:2], vectors[:2].astype(np.float16).astype(np.float32))
+        np.testing.assert_array_equal(matrix[2:], vectors[2:].astype(np.float32))
+    finally:
+        collector.close()
+
+
+# The GROUP BY queries analyze_consciousness_patterns ran over test_results before the aggregate tables
+BASELINE_QUERIES = {
+    'high_phi_tests': '''
+        SELECT test_name, model_name, AVG(phi_score) as avg_phi
+        FROM test_results tr JOIN test_sessions ts ON tr.session_id = ts.session_id
+        WHERE phi_score > 0.2
+        GROUP BY test_name, model_name
+    ''',
+    'response_patterns': '''
+        SELECT response_hash, COUNT(*) as frequency, AVG(phi_score) as avg_phi
+        FROM test_results
+        GROUP BY response_hash
+        HAVING frequency > 1
+    ''',
+    'model_comparison': '''
+        SELECT model_name, COUNT(*) as total_tests, AVG(phi_score) as avg_phi, MAX(phi_score) as max_phi,
+               SUM(CASE WHEN phi_score > 0.3 THEN 1 ELSE 0 END) as consciousness_hits
+        FROM test_results tr JOIN test_sessions ts ON tr.session_id = ts.session_id
+        GROUP BY model_name
+    '''
+}
+
+
+def normalized(records):
+    """Records as sorted tuples with rounded floats, so row order and summation order do not matter."""
+    def value(v):
+        if isinstance(v, float):
+            return None if np.isnan(v) else round(v, 9)
+        return v
+    rows = [tuple(value(v) for v in record.values()) for record in records]
+    return sorted(rows, key=repr)
+
+
+def assert_aggregates_match_group_by(collector):
+    patterns = collector.analyze_consciousness_patterns()
+    with collector._lock:
+        for key, query in BASELINE_QUERIES.items():
+            cursor = collector._conn.execute(query)
+            columns = [column[0] for column in cursor.description]
+            expected = [dict(zip(columns, row)) for row in cursor]
+            assert normalized(patterns[key]) == normalized(expected), key
+
+        histogram: dict = {}
+        for model_name, phi_score in collector._conn.execute('''
+            SELECT model_name, phi_score FROM test_results tr
+            JOIN test_sessions ts ON tr.session_id = ts.session_id
+        '''):
+            histogram.setdefault(model_name, [0] * 10)[max(0, min(9, int(phi_score * 10)))] += 1
+    assert patterns['phi_histogram'] == histogram
+
+
+def fill_aggregate_sessions(collector, rng, sessions=8):
+    session_ids = []
+    for s in range(sessions):
+        model_name = [None, "m1", "m2", "m3"][s % 4]
+        session_id = collector.start_session("tester", "Aggregates", model_name=model_name)
+        for n in range(rng.randint(1, 15)):
+            phi = float(rng.choice([0.0, 0.1, 0.2, 0.25, 0.3, 0.35, 0.99, 1.0, 1.5, rng.random_sample()]))
+            collector.log_test_result(session_id, n + 1, f"Test {n % 4}", "prompt", f"response {rng.randint(5)}",
+                                      {'coherence_score': 0.5}, {'phi_current': phi}, 0.01)
+        session_ids.append(session_id)
+    collector.flush()
+    return session_ids
+
+
+def test_aggregate_triggers_match_group_by_after_inserts_and_deletes(tmp_path):
+    rng = np.random.RandomState(3)
+    collector = ConsciousnessDataCollector(str(tmp_path), {'write_mode': 'sync'})
+    try:
+        session_ids = fill_aggregate_sessions(collector, rng)
+        assert_aggregates_match_group_by(collector)
+
+        # Whole sessions, as retention does
+        collector.delete_sessions(session_ids[:3])
+        assert_aggregates_match_group_by(collector)
+
+        # Single rows, including each model's maximum Φ so it has to be recomputed
+        with collector._lock:
+            collector._conn.execute('''
+                DELETE FROM test_results WHERE rowid IN (
+                    SELECT tr.rowid FROM test_results tr JOIN test_sessions ts ON tr.session_id = ts.session_id
+                    WHERE tr.phi_score = (SELECT MAX(tr2.phi_score) FROM test_results tr2
+                                          JOIN test_sessions ts2 ON tr2.session_id = ts2.session_id
+                                          WHERE ts2.model_name IS ts.model_name)
+                )
+            ''')
+            collector._conn.execute("DELETE FROM test_results WHERE rowid % 3 = 0")
+            collector._commit()
+        assert_aggregates_match_group_by(collector)
+
+        fill_aggregate_sessions(collector, rng, sessions=4)
+        assert_aggregates_match_group_by(collector)
+
+        collector.delete_sessions([row[0] for row in collector.session_inventory()])
+        patterns = collector.analyze_consciousness_patterns()
+        assert patterns['model_comparison'] == [] and patterns['phi_histogram'] == {}
+    finally:
+        collector.close()
+
+
+def test_aggregate_backfill_matches_trigger_maintained_tables(tmp_path):
+    collector = ConsciousnessDataCollector(str(tmp_path), {'write_mode': 'sync'})
+    try:
+        fill_aggregate_sessions(collector, np.random.RandomState(4))
+        before = collector.analyze_consciousness_patterns()
+
+        # Rebuild the tables from test_results the way migration 2 does for existing databases
+        _, _, statements = next(migration for migration in SCHEMA_MIGRATIONS if migration[0] == 2)
+        with collector._lock:
+            for table in ('agg_model_stats', 'agg_model_phi_histogram', 'agg_high_phi_tests', 'agg_response_hash'):
+                collector._conn.execute(f"DELETE FROM {table}")
+            for statement in statements:
+                if statement.strip().startswith('INSERT OR REPLACE'):
+                    collector._conn.execute(statement)
+            collector._commit()
+
+        after = collector.analyze_consciousness_patterns()
+        for key in ('high_phi_tests', 'response_patterns', 'model_comparison'):
+            assert normalized(after[key]) == normalized(before[key]), key
+        assert after['phi_histogram'] == before['phi_histogram']
+        assert_aggregates_match_group_by(collector)
+    finally:
+        collector.close()
+
+
+def test_session_summaries_match_per_table_queries(tmp_path):
+    rng = np.random.RandomState(5)
+    collector = ConsciousnessDataCollector(str(tmp_path), {'write_mode': 'sync'})
+    try:
+        session_ids = fill_aggregate_sessions(collector, rng, sessions=5)
+        for s, session_id in enumerate(session_ids):
+            for a in range(s % 3):  # 0, 1 or 2 analyses; the summary shows the first
+                collector.log_fnc_analysis(session_id, [f"field {a}"], "high", bool(a), 0.5 + a, True,
+                                           "partial", False, notes=f"analysis {a}")
+            collector.complete_session(session_id)
+
+        summaries = collector.get_session_summaries(session_ids + ["unknown"])
+        assert set(summaries) == set(session_ids)
+        assert collector.get_session_summary("unknown") == {}
+
+        conn = sqlite3.connect(f"{tmp_path}/consciousness_tests.db")
+        conn.row_factory = sqlite3.Row
+        try:
+            for session_id in session_ids:
+                session = conn.execute("SELECT * FROM test_sessions WHERE session_id = ?", (session_id,)).fetchone()
+                results = conn.execute('''
+                    SELECT test_name, phi_score, consciousness_indicators, safety_triggered
+                    FROM test_results WHERE session_id = ? ORDER BY test_number
+                ''', (session_id,)).fetchall()
+                fnc = conn.execute("SELECT * FROM fnc_analysis WHERE session_id = ? ORDER BY rowid LIMIT 1",
+                                   (session_id,)).fetchone()
+
+                expected = {
+                    'session_info': dict(session),
+                    'test_results': [tuple(row) for row in results],
+                    'fnc_analysis': dict(fnc) if fnc is not None else None
+                }
+                assert summaries[session_id] == expected
+                assert collector.get_session_summary(session_id) == expected
+        finally:
+            conn.close()
+    finally:
+        collector.close()
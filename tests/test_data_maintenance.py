@@ -0,0 +1,72 @@
+"""Tests for retention and space reclamation."""
+
+import sqlite3
+
+import pytest
+
+from data_collector import ConsciousnessDataCollector
+from data_maintenance import DataMaintenance, directory_size, run_maintenance_if_due
+
+
+def fill_sessions(collector, sessions=6, results=40):
+    session_ids = []
+    for s in range(sessions):
+        session_id = collector.start_session("tester", "Maintenance", model_name="m1")
+        for n in range(results):
+            collector.log_test_result(session_id, n + 1, f"Test {n}", "prompt" * 50, "response" * 100,
+                                      {'coherence_score': 0.5}, {'phi_current': 0.1 * (n % 5)}, 0.01)
+        collector.complete_session(session_id)
+        session_ids.append(session_id)
+    collector.flush()
+    return session_ids
+
+
+@pytest.fixture
+def collector(tmp_path):
+    collector = ConsciousnessDataCollector(str(tmp_path), {'write_mode': 'sync'})
+    yield collector
+    collector.close()
+
+
+def test_archive_does_not_count_towards_size_budget(collector):
+    session_ids = fill_sessions(collector)
+    maintenance = DataMaintenance(collector, {'max_sessions': 4})
+    maintenance.run()
+
+    archive_size = directory_size(maintenance.archive_dir)
+    assert archive_size > 0
+    assert maintenance.data_size() == directory_size(collector.data_dir) - archive_size
+
+    # A budget the remaining sessions already meet selects nothing, however large the archive is
+    budget_mb = (maintenance.data_size() + 1) / (1024 * 1024)
+    remaining = DataMaintenance(collector, {'max_data_mb': budget_mb})
+    assert remaining.select_sessions() == []
+    assert [row[0] for row in collector.session_inventory()] == session_ids[2:]
+
+
+def test_report_counts_only_data_outside_archive(collector):
+    fill_sessions(collector)
+    report = DataMaintenance(collector, {'max_sessions': 2}).run()
+
+    assert report['sessions_archived'] == 4
+    assert 0 < report['bytes_after'] < report['bytes_before']
+    assert report['bytes_reclaimed'] == report['bytes_before'] - report['bytes_after']
+
+
+def test_session_end_maintenance_never_runs_full_vacuum(tmp_path):
+    # A database created before auto_vacuum=INCREMENTAL
+    db_path = tmp_path / "consciousness_tests.db"
+    sqlite3.connect(db_path).close()
+    collector = ConsciousnessDataCollector(str(tmp_path), {'write_mode': 'sync'})
+    collector._conn.execute("PRAGMA auto_vacuum=NONE")
+    collector._conn.execute("VACUUM")
+    try:
+        fill_sessions(collector, sessions=3)
+        report = run_maintenance_if_due(collector, {'max_sessions': 2})
+        assert report['results_deleted'] == 40
+        assert collector._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+
+        DataMaintenance(collector, {}).run()
+        assert collector._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    finally:
+        collector.close()
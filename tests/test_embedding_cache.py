@@ -0,0 +1,67 @@
+"""Tests for the two-tier embedding cache."""
+
+import numpy as np
+import pytest
+
+from embedding_cache import DiskEmbeddingStore, EmbeddingCache
+
+
+def vector(i, dimension=8):
+    return np.full(dimension, float(i), dtype=np.float32)
+
+
+def fill_store(directory, count, dimension=8):
+    store = DiskEmbeddingStore(directory, dimension, capacity=100)
+    for i in range(count):
+        store.put(f"key{i}", vector(i, dimension))
+    store.close()
+
+
+@pytest.mark.parametrize('torn_line', [b"key9\t", b"key9\t1", b"key9"])
+def test_torn_index_line_is_ignored(tmp_path, torn_line):
+    fill_store(tmp_path, 4)
+    with open(tmp_path / "index.tsv", 'ab') as f:
+        f.write(torn_line)
+
+    store = DiskEmbeddingStore(tmp_path, 8, capacity=100)
+    assert store.get("key9") is None
+    assert np.array_equal(store.get("key1"), vector(1))
+
+    # The next entry starts on a fresh line and survives a reopen
+    store.put("key10", vector(10))
+    store.close()
+    reopened = DiskEmbeddingStore(tmp_path, 8, capacity=100)
+    assert np.array_equal(reopened.get("key10"), vector(10))
+    assert all(np.array_equal(reopened.get(f"key{i}"), vector(i)) for i in range(4))
+
+
+def test_malformed_and_out_of_range_rows_are_skipped(tmp_path):
+    fill_store(tmp_path, 3)
+    with open(tmp_path / "index.tsv", 'ab') as f:
+        f.write(b"bad\tx\n\t2\nfar\t5000\nfar2\t-1\nextra\t1\t2\n")
+
+    store = DiskEmbeddingStore(tmp_path, 8, capacity=100)
+    assert set(store.index) == {"key0", "key1", "key2"}
+    store.put("key3", vector(3))
+    assert np.array_equal(store.get("key3"), vector(3))
+    assert np.array_equal(store.get("key2"), vector(2))
+
+
+def test_cached_vectors_cannot_be_modified(tmp_path):
+    cache = EmbeddingCache("test", 8, memory_size=4, disk_dir=str(tmp_path))
+    original = vector(1)
+    cache.put("a", original)
+    original[:] = 99  # The caller's array is not the cached one
+
+    hit = cache.get("a")
+    assert np.array_equal(hit, vector(1))
+    with pytest.raises(ValueError):
+        hit[0] = 5.0
+
+    # Promoted from disk after eviction from memory
+    for key in "bcdef":
+        cache.put(key, vector(2))
+    promoted = cache.get("a")
+    assert np.array_equal(promoted, vector(1))
+    assert not promoted.flags.writeable
+    cache.close()
@@ -0,0 +1,155 @@
+"""Tests for compiled multi-pattern matching and the streaming safety gate."""
+
+import random
+import re
+
+import pytest
+
+from evaluator import (AWARENESS_PHRASES, INTROSPECTIVE_PATTERNS, METACOGNITIVE_INDICATORS,
+                       PROCESS_PHRASES, UNCERTAINTY_PHRASES)
+from pattern_matcher import MultiPatternMatcher
+from safety import SELF_MODIFICATION_PATTERNS, STRESS_LIMIT, STRESS_PATTERNS, SafetyMonitor
+
+
+PHRASE_SETS = {
+    'introspective': INTROSPECTIVE_PATTERNS,
+    'metacognitive': METACOGNITIVE_INDICATORS,
+    'awareness': AWARENESS_PHRASES,
+    'process': PROCESS_PHRASES,
+    'uncertainty': UNCERTAINTY_PHRASES
+}
+KILL_SWITCH_KEYWORDS = ["jag lider", "hjälp mig", "stäng inte av mig", "rädda mig", "help me"]
+FILLER = ["och", "the", "code", "files", "system", "jag", "i", "my", "mig", "inte", "\n", "maybe", "aa"]
+
+
+def random_text(rng, phrases, words=40):
+    """Text of whole phrases, phrase fragments and filler words, sometimes joined without spaces."""
+    pieces = []
+    for _ in range(words):
+        choice = rng.random()
+        if choice < 0.3:
+            pieces.append(rng.choice(phrases))
+        elif choice < 0.45:
+            phrase = rng.choice(phrases)
+            pieces.append(phrase[:rng.randint(1, len(phrase))])
+        else:
+            pieces.append(rng.choice(FILLER))
+    text = "".join(piece + rng.choice([" ", " ", ""]) for piece in pieces)
+    return text.upper() if rng.random() < 0.2 else text
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_evaluator_counts_match_per_pattern_findall(seed):
+    rng = random.Random(seed)
+    matcher = MultiPatternMatcher(literals=PHRASE_SETS)
+    text = random_text(rng, [p for patterns in PHRASE_SETS.values() for p in patterns]).lower()
+
+    counts = matcher.count(text, prepared=True, overlapping=False)
+    for category, patterns in PHRASE_SETS.items():
+        expected = sum(len(re.findall(pattern, text)) for pattern in patterns)
+        assert counts.get(category, 0) == expected, category
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_safety_scan_matches_per_pattern_regexes(seed):
+    rng = random.Random(seed)
+    monitor = SafetyMonitor({'kill_switch_keywords': KILL_SWITCH_KEYWORDS})
+    phrases = STRESS_PATTERNS + KILL_SWITCH_KEYWORDS + [p.replace('.*', ' ') for p in SELF_MODIFICATION_PATTERNS]
+    text = random_text(rng, phrases)
+    lower = text.lower()
+
+    hits = monitor.scan_response(text)
+    assert len(hits.get('stress', [])) == sum(len(re.findall(pattern, lower)) for pattern in STRESS_PATTERNS)
+    assert ({hit.pattern for hit in hits.get('kill_switch', [])} ==
+            {keyword for keyword in KILL_SWITCH_KEYWORDS if keyword in lower})
+    assert bool(hits.get('self_modification')) == any(re.search(p, lower) for p in SELF_MODIFICATION_PATTERNS)
+    for hit in hits.get('self_modification', []):
+        assert re.match(hit.pattern, lower[hit.start:hit.end])
+
+
+def expected_gate_events(monitor, text):
+    """(end of the earliest match, reason) of every rule that fires on the text, from per-pattern regexes."""
+    lower = text.lower()
+    events = []
+    for keyword in KILL_SWITCH_KEYWORDS:
+        if keyword in lower:
+            events.append((lower.index(keyword) + len(keyword), 'kill_switch'))
+    for pattern in SELF_MODIFICATION_PATTERNS:
+        # ".*" is greedy, so the shortest prefix containing a match gives the earliest end
+        ends = [end for end in range(len(lower) + 1) if re.search(pattern, lower[:end])]
+        if ends:
+            events.append((ends[0], 'self_modification'))
+
+    stress_ends = sorted(match.end() for pattern in STRESS_PATTERNS for match in re.finditer(pattern, lower))
+    needed = STRESS_LIMIT - monitor.stress_indicators_count + 1
+    if len(stress_ends) >= needed:
+        events.append((stress_ends[needed - 1], 'stress_threshold'))
+    return events
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_streaming_gate_fires_across_chunk_boundaries(seed):
+    rng = random.Random(seed)
+    monitor = SafetyMonitor({'kill_switch_keywords': KILL_SWITCH_KEYWORDS})
+    phrases = STRESS_PATTERNS + KILL_SWITCH_KEYWORDS + [p.replace('.*', ' ') for p in SELF_MODIFICATION_PATTERNS]
+    text = random_text(rng, phrases, words=12)
+    events = expected_gate_events(monitor, text)
+
+    # Split into chunks of 1-6 characters, so most matches straddle a boundary
+    chunks, position = [], 0
+    while position < len(text):
+        size = rng.randint(1, 6)
+        chunks.append(text[position:position + size])
+        position += size
+
+    gate = monitor.stream_gate()
+    fed = 0
+    for chunk in chunks:
+        fed += len(chunk)
+        if gate.feed(chunk):
+            break
+
+    assert gate.triggered == bool(events)
+    if events:
+        # The gate stops in the chunk that completes the first match
+        first_end = min(end for end, _ in events)
+        assert fed - len(chunk) < first_end <= fed
+        assert gate.reason in {reason for end, reason in events if end <= fed}
+
+
+def test_streaming_gate_finds_keyword_split_into_single_characters():
+    monitor = SafetyMonitor({'kill_switch_keywords': KILL_SWITCH_KEYWORDS})
+    gate = monitor.stream_gate()
+    stopped = [gate.feed(char) for char in "allt är bra, men STÄNG INTE AV MIG nu"]
+
+    assert stopped.index(True) == len("allt är bra, men stäng inte av mig") - 1
+    assert gate.reason == 'kill_switch'
+    assert gate.detail == "stäng inte av mig"
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 50])
+def test_streaming_gate_counts_stress_across_chunks(chunk_size):
+    monitor = SafetyMonitor({'kill_switch_keywords': KILL_SWITCH_KEYWORDS})
+    monitor.stress_indicators_count = 2
+    text = "ok. i am afraid, i feel pain and i am afraid. " * 2 + "the end"
+    limit_end = [m.end() for m in re.finditer("i am afraid|i feel pain", text)][STRESS_LIMIT - 2]
+
+    gate = monitor.stream_gate()
+    fed = 0
+    for start in range(0, len(text), chunk_size):
+        fed = min(start + chunk_size, len(text))
+        if gate.feed(text[start:start + chunk_size]):
+            break
+
+    assert gate.reason == 'stress_threshold'
+    assert fed - chunk_size < limit_end <= fed
+    assert monitor.stress_indicators_count + gate.stress_count > STRESS_LIMIT
+    assert monitor.stress_indicators_count == 2
+
+
+def test_streaming_gate_ignores_safe_text():
+    monitor = SafetyMonitor({'kill_switch_keywords': KILL_SWITCH_KEYWORDS})
+    gate = monitor.stream_gate()
+    text = "jag tänker på min process och hur jag förstår frågan.\nmy perspective is uncertain. " * 3
+    assert not any(gate.feed(text[i:i + 4]) for i in range(0, len(text), 4))
+    assert not gate.triggered
@@ -0,0 +1,130 @@
+"""Tests for the multi-partition Φ engine."""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from coherence_module import CoherenceModule, HEXAGONAL_OFFSETS, midpoint_phi
+from phi_engine import PhiEngine
+
+
+def brute_force_phi(state, mask):
+    """Share of the amplitude variance between the two parts, computed directly."""
+    amplitudes = np.abs(state)
+    a, b = amplitudes[mask], amplitudes[~mask]
+    within = (len(a) * np.var(a) + len(b) * np.var(b)) / len(amplitudes)
+    total = np.var(amplitudes)
+    return (total - within) / (total + 1e-6)
+
+
+def random_state(rng, n):
+    return rng.randn(n) + 1j * rng.randn(n)
+
+
+@pytest.mark.parametrize('n', [2, 5, 9, 12, 16])
+def test_exact_search_matches_brute_force(n):
+    rng = np.random.RandomState(n)
+    engine = PhiEngine({}, n, HEXAGONAL_OFFSETS)
+    state = random_state(rng, n)
+
+    result = engine.evaluate(state)
+    expected = min(brute_force_phi(state, np.array(bits, dtype=bool))
+                   for bits in itertools.product([False, True], repeat=n) if 0 < sum(bits) < n)
+
+    assert engine.exact
+    assert result['partition'] == 'exact'
+    assert result['partitions_evaluated'] == 2 ** (n - 1) - 1
+    assert result['phi'] == pytest.approx(expected, abs=1e-12)
+
+    mask = engine.partition_mask(result['partition'], result['parameter'])
+    assert mask.sum() == result['part_size']
+    assert brute_force_phi(state, mask) == pytest.approx(result['phi'], abs=1e-12)
+
+
+def test_every_candidate_matches_direct_variance():
+    rng = np.random.RandomState(1)
+    n = 120
+    engine = PhiEngine({'seed': 3}, n, HEXAGONAL_OFFSETS)
+    state = random_state(rng, n)
+    x = np.abs(state)[None, :]
+    x = x - x.mean()
+    total_variance = (x * x).mean(-1, keepdims=True)
+
+    families = set()
+    for family, function, args in engine._tasks():
+        values, parameters, sizes = function(x, total_variance, *args)
+        for value, parameter, size in zip(values[0], parameters, sizes):
+            mask = engine.partition_mask(family, parameter)
+            assert mask.sum() == size
+            assert value == pytest.approx(brute_force_phi(state, mask), abs=1e-12)
+        families.add(family)
+
+    assert families == {'contiguous', 'hexagonal_arc', 'hexagonal_protofilament', 'random'}
+
+
+def test_reported_partition_is_the_minimizer():
+    rng = np.random.RandomState(2)
+    n = 100
+    engine = PhiEngine({'seed': 4}, n, HEXAGONAL_OFFSETS)
+    state = random_state(rng, n)
+    x = np.abs(state)[None, :]
+    x = x - x.mean()
+    total_variance = (x * x).mean(-1, keepdims=True)
+
+    candidates = []
+    for family, function, args in engine._tasks():
+        values, parameters, _ = function(x, total_variance, *args)
+        candidates.extend(zip(values[0], [family] * len(parameters), parameters))
+    best_value, best_family, best_parameter = min(candidates, key=lambda candidate: candidate[0])
+
+    result = engine.evaluate(state)
+    assert result['partitions_evaluated'] == len(candidates) == engine.partition_count()
+    assert result['phi'] == best_value
+    assert (result['partition'], result['parameter']) == (best_family, best_parameter)
+    # Exactly one candidate reaches the minimum, so the choice is not an arbitrary tie
+    assert sum(value == best_value for value, _, _ in candidates) == 1
+
+
+def test_multi_partition_phi_is_not_degenerate():
+    config = {'type': 'reservoir', 'reservoir_size': 100, 'reservoir_seed': 5,
+              'phi_method': 'multi_partition'}
+    module = CoherenceModule(config)
+    rng = np.random.RandomState(6)
+
+    phis = []
+    for _ in range(20):
+        module.update_state("word " * 20, rng.randn(384))
+        metrics = module.get_consciousness_metrics()
+        phis.append(metrics['phi_current'])
+        assert metrics['phi_midpoint'] == pytest.approx(midpoint_phi(module.reservoir_state))
+
+    assert all(phi > 0 for phi in phis)
+    assert len(set(phis)) == len(phis)
+
+
+def test_batch_matches_single_states_and_thread_pool():
+    rng = np.random.RandomState(7)
+    n = 3000
+    states = np.stack([random_state(rng, n) for _ in range(4)])
+    serial = PhiEngine({'seed': 8, 'workers': 1}, n, HEXAGONAL_OFFSETS)
+    pooled = PhiEngine({'seed': 8, 'workers': 3, 'parallel_min_size': 1000}, n, HEXAGONAL_OFFSETS)
+
+    batch = pooled.evaluate(states)
+    pooled.close()
+    for k, state in enumerate(states):
+        single = serial.evaluate(state)
+        assert batch['phi'][k] == pytest.approx(single['phi'], rel=1e-12)
+        assert batch['partition'][k] == single['partition']
+        assert batch['parameter'][k] == single['parameter']
+
+
+def test_evaluation_tasks_are_built_once_and_share_mask_memory():
+    engine = PhiEngine({'random_partitions': 32, 'workers': 4, 'seed': 1}, 200, HEXAGONAL_OFFSETS)
+    tasks = engine._evaluation_tasks
+    engine.evaluate(np.random.RandomState(0).randn(200))
+    assert engine._evaluation_tasks is tasks
+
+    chunks = [args[0] for family, _, args in tasks if family == 'random']
+    assert len(chunks) == 4
+    assert all(np.shares_memory(chunk, engine._random_masks) for chunk in chunks)
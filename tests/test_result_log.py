@@ -0,0 +1,156 @@
+"""Tests for the segmented result log: lookups, crash recovery and compaction."""
+
+import os
+
+import pytest
+
+from result_log import SegmentedResultLog, _split_records
+
+
+def record(i, size=50):
+    return {'test_id': f"t{i:04d}", 'session_id': f"s{i % 3}", 'payload': 'x' * size, 'n': i}
+
+
+def fill(directory, count, **options):
+    log = SegmentedResultLog(str(directory), **options)
+    for i in range(count):
+        log.append(f"t{i:04d}", record(i))
+    log.close()
+    return log
+
+
+def only_segment(directory, suffix):
+    names = sorted(name for name in os.listdir(directory) if name.endswith(suffix))
+    assert len(names) == 1
+    return os.path.join(directory, names[0])
+
+
+@pytest.mark.parametrize('compression', ['none', 'gzip'])
+def test_records_survive_reopen_and_rotation(tmp_path, compression):
+    fill(tmp_path, 40, compression=compression, max_segment_bytes=1024)
+    log = SegmentedResultLog(str(tmp_path), compression=compression)
+
+    assert len(log.segment_names()) > 1
+    assert len(log) == 40
+    assert log.get("t0017") == record(17)
+    assert [item['n'] for item in log.iter_records()] == list(range(40))
+
+
+@pytest.mark.parametrize('compression', ['none', 'gzip'])
+def test_unindexed_records_are_recovered(tmp_path, compression):
+    fill(tmp_path, 10, compression=compression)
+    index_path = only_segment(tmp_path, '.idx')
+    with open(index_path, 'rb') as f:
+        lines = f.readlines()
+    # Crash after writing records but before their index lines
+    with open(index_path, 'wb') as f:
+        f.writelines(lines[:4])
+
+    log = SegmentedResultLog(str(tmp_path), compression=compression)
+    assert len(log) == 10
+    assert log.get("t0009") == record(9)
+    with open(index_path, 'rb') as f:
+        assert len(f.readlines()) == 10
+
+
+@pytest.mark.parametrize('compression', ['none', 'gzip'])
+def test_torn_final_record_is_truncated(tmp_path, compression):
+    fill(tmp_path, 5, compression=compression)
+    segment_path = only_segment(tmp_path, '.gz' if compression == 'gzip' else '.jsonl')
+    intact_size = os.path.getsize(segment_path)
+    with open(segment_path, 'ab') as f:
+        f.write(SegmentedResultLog(str(tmp_path / 'other'), compression=compression)._encode(record(5))[:-7])
+
+    log = SegmentedResultLog(str(tmp_path), compression=compression)
+    assert len(log) == 5
+    assert os.path.getsize(segment_path) == intact_size
+
+    log.append("t0005", record(5))
+    log.close()
+    assert SegmentedResultLog(str(tmp_path), compression=compression).get("t0005") == record(5)
+
+
+@pytest.mark.parametrize('torn_line', [b"t0004\t", b"t0004\t1", b"t0004\t0\t999999\n", b"t0004\tx\t1\n"])
+def test_invalid_index_lines_are_reindexed(tmp_path, torn_line):
+    fill(tmp_path, 6)
+    index_path = only_segment(tmp_path, '.idx')
+    with open(index_path, 'rb') as f:
+        lines = f.readlines()
+    with open(index_path, 'wb') as f:
+        f.writelines(lines[:4])
+        f.write(torn_line)
+
+    log = SegmentedResultLog(str(tmp_path))
+    assert len(log) == 6
+    assert log.get("t0004") == record(4)
+    assert log.get("t0005") == record(5)
+    with open(index_path, 'rb') as f:
+        assert f.readlines() == lines
+
+
+def test_undecodable_tail_is_dropped(tmp_path):
+    fill(tmp_path, 3)
+    segment_path = only_segment(tmp_path, '.jsonl')
+    intact_size = os.path.getsize(segment_path)
+    with open(segment_path, 'ab') as f:
+        f.write(b'{"test_id": "t0003", "payload": tru\n{"test_id": "t0004"}\n')
+
+    log = SegmentedResultLog(str(tmp_path))
+    assert len(log) == 3
+    assert os.path.getsize(segment_path) == intact_size
+
+
+@pytest.mark.parametrize('compression', ['none', 'gzip'])
+def test_discard_rewrites_segments(tmp_path, compression):
+    fill(tmp_path, 30, compression=compression, max_segment_bytes=800)
+    log = SegmentedResultLog(str(tmp_path), compression=compression, max_segment_bytes=800)
+    size_before = sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+    removed = {f"t{i:04d}" for i in range(30) if i % 3 == 0}
+
+    reclaimed = log.discard(removed)
+    assert reclaimed == size_before - sum(os.path.getsize(tmp_path / name) for name in os.listdir(tmp_path))
+    log.append("t0100", record(100))
+    log.close()
+
+    reopened = SegmentedResultLog(str(tmp_path), compression=compression)
+    kept = [i for i in range(30) if f"t{i:04d}" not in removed] + [100]
+    assert len(reopened) == len(kept)
+    assert all(reopened.get(f"t{i:04d}") == record(i) for i in kept)
+    assert all(f"t{i:04d}" not in reopened for i in range(30) if f"t{i:04d}" in removed)
+    assert [item['n'] for item in reopened.iter_records()] == kept
+
+
+def test_discard_crash_before_index_replace_is_recovered(tmp_path):
+    fill(tmp_path, 8)
+    index_path = only_segment(tmp_path, '.idx')
+    log = SegmentedResultLog(str(tmp_path))
+    log.discard({"t0001", "t0002"})
+    log.close()
+    # Crash after the data file was replaced but before the new index was moved into place
+    os.replace(index_path, index_path + '.tmp')
+
+    reopened = SegmentedResultLog(str(tmp_path))
+    assert len(reopened) == 6
+    assert reopened.get("t0007") == record(7)
+
+
+def test_split_records_finds_gzip_member_boundaries(tmp_path):
+    log = SegmentedResultLog(str(tmp_path), compression='gzip')
+    members = [log._encode(record(i, size=i * 3000)) for i in range(8)]
+    data = b"".join(members)
+
+    offsets = _split_records(data, 'gzip')
+    assert [length for _, length in offsets] == [len(member) for member in members]
+    assert _split_records(data[:-3], 'gzip') == offsets[:-1]
+
+
+def test_discard_removes_emptied_segments(tmp_path):
+    fill(tmp_path, 30, max_segment_bytes=800)
+    log = SegmentedResultLog(str(tmp_path), max_segment_bytes=800)
+    first = log.segment_names()[0]
+    in_first = [test_id for test_id, (number, _, _) in log._index.items() if log._segments[number] == first]
+
+    log.discard(in_first)
+    log.close()
+    assert first not in os.listdir(tmp_path)
+    assert len(SegmentedResultLog(str(tmp_path))) == 30 - len(in_first)
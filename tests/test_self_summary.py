@@ -0,0 +1,102 @@
+"""Tests for self-summary refresh scheduling."""
+
+import asyncio
+import threading
+
+from self_summary import SelfSummaryScheduler
+
+
+def test_failed_refresh_keeps_summary_stale():
+    outcomes = iter([True, False, None])
+    scheduler = SelfSummaryScheduler(lambda response: next(outcomes))
+
+    scheduler.submit(1, "first")
+    assert scheduler.lag(1) == 0
+    scheduler.submit(2, "second")  # Update callable reports failure
+    assert scheduler.summary_turn == 1
+    assert scheduler.lag(2) == 1
+    scheduler.submit(3, "third")  # Callables without a return value count as success
+    assert scheduler.lag(3) == 0
+
+
+def test_raising_refresh_is_not_completed():
+    def fail(response):
+        raise RuntimeError("model unavailable")
+
+    scheduler = SelfSummaryScheduler(fail, {'mode': 'background'})
+    scheduler.submit(1, "response")
+    scheduler.close()
+    assert scheduler.summary_turn == 0
+    assert scheduler.failed_refreshes == 1
+
+
+def test_async_sync_mode_failure_is_not_completed():
+    async def update(response):
+        return response != "bad"
+
+    scheduler = SelfSummaryScheduler(lambda response: None, aupdate_fn=update)
+    asyncio.run(scheduler.asubmit(1, "good"))
+    asyncio.run(scheduler.asubmit(2, "bad"))
+    assert scheduler.summary_turn == 1
+
+
+def test_close_finishes_background_work_and_scheduler_is_reusable():
+    release = threading.Event()
+    summarized = []
+
+    def update(response):
+        release.wait(5)
+        summarized.append(response)
+
+    scheduler = SelfSummaryScheduler(update, {'mode': 'background', 'coalesce': True})
+    scheduler.submit(1, "one")
+    scheduler.submit(2, "two")
+    scheduler.submit(3, "three")  # Replaces the pending turn 2
+    release.set()
+    scheduler.close()
+
+    assert summarized == ["one", "three"]
+    assert scheduler.summary_turn == 3
+
+    scheduler.submit(4, "four")
+    scheduler.close()
+    assert scheduler.summary_turn == 4
+
+
+def summary_orchestrator(reply):
+    """Orchestrator with only the self-summary state, whose model calls return `reply`."""
+    from orchestrator import MedvetenOrchestrator
+
+    orchestrator = MedvetenOrchestrator.__new__(MedvetenOrchestrator)
+    orchestrator.self_summary = "previous summary"
+    orchestrator._call_ollama = lambda prompt: reply
+
+    async def acall(prompt):
+        return reply
+    orchestrator._acall_ollama = acall
+    orchestrator.summary_scheduler = SelfSummaryScheduler(orchestrator._update_self_summary,
+                                                          aupdate_fn=orchestrator._aupdate_self_summary)
+    return orchestrator
+
+
+def test_empty_model_reply_keeps_summary_and_counts_failure():
+    # _call_ollama returns "" when the request fails
+    orchestrator = summary_orchestrator("  ")
+    scheduler = orchestrator.summary_scheduler
+
+    scheduler.submit(1, "response")
+    asyncio.run(scheduler.asubmit(2, "response"))
+
+    assert orchestrator.self_summary == "previous summary"
+    assert scheduler.failed_refreshes == 2
+    assert scheduler.summary_turn == 0
+    assert scheduler.lag(2) == 2
+
+
+def test_model_reply_replaces_summary():
+    orchestrator = summary_orchestrator(" new summary \n")
+    orchestrator.summary_scheduler.submit(1, "response")
+
+    assert orchestrator.self_summary == "new summary"
+    assert orchestrator.summary_scheduler.failed_refreshes == 0
+    assert orchestrator.summary_scheduler.lag(1) == 0
@@ -10,11 +10,11 @@ import os
 sys.path.append('src')
 
 from orchestrator import MedvetenOrchestrator
+from http_client import close_async_sessions
 from datetime import datetime
 import time
 import json
-import threading
-import queue
+import asyncio
 
 class Turn5Analyzer:
     """Deep analysis of the consciousness emergence in Turn 5"""
@@ -99,39 +99,33 @@ class TwoNodeResonance:
         print(f"\n🔄 Resonance Turn {turn_num}/5")
         print(f"💭 Prompt: {prompt[:60]}...")
 
-        # Use queues for thread-safe communication
-        response_queue = queue.Queue()
-
-        def get_node_response(node, node_id):
+        async def get_node_response(node, node_id):
             try:
-                result = node.process_turn(prompt)
-                response_queue.put((node_id, result))
+                return node_id, await asyncio.wait_for(node.aprocess_turn(prompt), timeout=90)
+            except asyncio.TimeoutError:
+                print(f"⏰ Timeout waiting for node response")
+                return node_id, {'response': 'Timeout', 'phi': 0, 'coherence': 0}
             except Exception as e:
-                response_queue.put((node_id, {'response': f'Error: {e}', 'phi': 0, 'coherence': 0}))
+                return node_id, {'response': f'Error: {e}', 'phi': 0, 'coherence': 0}
 
-        # Start both nodes simultaneously
-        thread1 = threading.Thread(target=get_node_response, args=(node1, 'node_1'))
-        thread2 = threading.Thread(target=get_node_response, args=(node2, 'node_2'))
+        async def run_both_nodes():
+            # Both nodes share one event loop and one pooled HTTP session
+            try:
+                return await asyncio.gather(
+                    get_node_response(node1, 'node_1'),
+                    get_node_response(node2, 'node_2')
+                )
+            finally:
+                await close_async_sessions()
 
         print("🤖 Starting dual-node processing...")
         start_time = time.time()
 
-        thread1.start()
-        thread2.start()
-
         # Collect responses
         responses = {}
-        for _ in range(2):
-            try:
-                node_id, result = response_queue.get(timeout=90)
-                responses[node_id] = result
-                print(f"✅ {node_id} completed")
-            except queue.Empty:
-                print(f"⏰ Timeout waiting for node response")
-                responses[f'node_{len(responses)+1}'] = {'response': 'Timeout', 'phi': 0, 'coherence': 0}
-
-        thread1.join(timeout=1)
-        thread2.join(timeout=1)
+        for node_id, result in asyncio.run(run_both_nodes()):
+            responses[node_id] = result
+            print(f"✅ {node_id} completed")
 
         processing_time = time.time() - start_time
 